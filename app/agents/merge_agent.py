@@ -6,6 +6,7 @@ from typing import Dict, Tuple
 
 from .base import Agent
 from ..core.github_service import create_branch_and_commit_and_pr
+from ..core.gaps import invalidate_gaps
 import runpy, sys, io, contextlib
 
 
@@ -51,6 +52,8 @@ class MergeAgent(Agent):
                 details.setdefault("stderr", "")
                 details["stdout"] += buf_out.getvalue()
                 details["stderr"] += buf_err.getvalue()
+            # The file was rewritten (or rolled back): queued tasks for it need a fresh gap score
+            invalidate_gaps(jurisdiction_file)
             if success:
                 # Attempt to open a PR with the updated file, but do not fail the merge if PR automation is disabled
                 try:
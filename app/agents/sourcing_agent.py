@@ -1,22 +1,29 @@
 from __future__ import annotations
 
 import hashlib
-from dataclasses import dataclass
+import heapq
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from datetime import datetime, UTC
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import httpx
-from bs4 import BeautifulSoup
-from tenacity import retry, stop_after_attempt, wait_exponential
 from time import sleep
-
-from ..config.settings import settings
+from urllib.parse import urljoin
 
 from .base import Agent
 from ..config.settings import settings
 from ..core.logger import setup_logger
 from ..core.vector_store import VectorStore
-from ..core.search import get_default_search_provider
+from ..core.search import get_default_search_provider, search_many
+from ..core.query_planner import QueryPlan
+from ..core.frontier import Candidate, CrawlFrontier
+from ..core.urlnorm import canonical_url, learn_redirect, resolve_url
+from ..core.html_text import chunk_text, html_to_text
+from ..core.pipeline import Pipeline, Stage
 
 
 @dataclass
@@ -27,6 +34,31 @@ class SourceDocument:
     content: str
     jurisdiction_tags: List[str]
     snippet: Optional[str] = None
+    size_bytes: int = 0
+
+
+@dataclass
+class SourcingStats:
+    fetched: int = 0
+    failed: int = 0
+    retried: int = 0
+    indexed: int = 0
+    bytes: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+    errors: List[Dict[str, str]] = field(default_factory=list)
+    pipeline: Dict = field(default_factory=dict)
+
+    def summary(self) -> Dict:
+        return {
+            "fetched": self.fetched,
+            "failed": self.failed,
+            "retried": self.retried,
+            "indexed": self.indexed,
+            "bytes": self.bytes,
+            "timings": dict(self.timings),
+            "errors": self.errors[:20],
+            "pipeline": self.pipeline,
+        }
 
 
 class SourcingAgent(Agent):
@@ -34,14 +66,27 @@ class SourcingAgent(Agent):
         super().__init__("sourcing_agent")
         self.vector_store = vector_store
         self.logger = setup_logger("sourcing_agent")
+        # Per-jurisdiction crawl budget and fetch stats of the last search_and_collect/collect_plan
+        self.last_crawl_budget: Dict[str, Dict] = {}
+        self.last_stats = SourcingStats()
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.5, min=0.5, max=6))
     def _fetch(self, url: str) -> Optional[str]:
+        """Single attempt; retries with per-URL backoff are scheduled by `_crawl`."""
         try:
             # Simple rate limit
             if settings.requests_per_second:
                 sleep(1.0 / max(1, settings.requests_per_second))
             resp = httpx.get(url, timeout=20)
+            # Follow redirects by hand so the alias -> target is recorded in the redirect map
+            current = url
+            for _ in range(5):
+                location = resp.headers.get("location") if resp.status_code in (301, 302, 303, 307, 308) else None
+                if not location:
+                    break
+                current = urljoin(current, location)
+                resp = httpx.get(current, timeout=20)
+            if current != url:
+                learn_redirect(url, current)
             if resp.status_code == 200:
                 return resp.text
             raise RuntimeError(f"status={resp.status_code}")
@@ -50,8 +95,7 @@ class SourcingAgent(Agent):
             raise
 
     def _parse_html(self, html: str) -> str:
-        soup = BeautifulSoup(html, "lxml")
-        return soup.get_text("\n", strip=True)
+        return html_to_text(html)
 
     def _metadoc(self, doc: SourceDocument) -> Dict:
         return {
@@ -62,61 +106,220 @@ class SourcingAgent(Agent):
             "ingested_at": datetime.now(UTC).isoformat(),
         }
 
-    def add_to_vector(self, docs: List[SourceDocument]) -> None:
-        # Dedupe by content hash, skip duplicates in this batch
-        seen = set()
-        texts = []
-        metas = []
-        for d in docs:
-            m = self._metadoc(d)
-            # hash
-            h = hashlib.sha256(d.content.encode("utf-8")).hexdigest()
-            if h in seen:
-                continue
-            seen.add(h)
-            m["content_hash"] = h
-            texts.append(d.content)
-            metas.append(m)
-        if texts:
-            self.vector_store.add_texts(texts, metas)
+    def _dedupe(self, doc: SourceDocument, seen: Dict[str, Dict]) -> Optional[Dict]:
+        """Metadata to index `doc` with, or None if the same content was already kept (its tags are merged in)."""
+        h = hashlib.sha256(doc.content.encode("utf-8")).hexdigest()
+        if h in seen:
+            # Same content under another URL: keep one copy and merge its tags into the kept metadata.
+            # Chunks already indexed keep the tags they were stored with.
+            kept = seen[h]["jurisdiction_tags"]
+            kept[:] = list(dict.fromkeys(kept + doc.jurisdiction_tags))
+            return None
+        meta = self._metadoc(doc)
+        meta["content_hash"] = h
+        seen[h] = meta
+        return meta
 
     def search_and_collect(self, jurisdiction: str, queries: List[str]) -> List[SourceDocument]:
-        results: List[SourceDocument] = []
+        stats = SourcingStats()
         provider = get_default_search_provider()
-        # Expand: for non-URL queries, use provider to find candidate URLs
-        expanded_urls: List[str] = []
+        # Expand: for non-URL queries, use provider to find candidate URLs.
+        # All search queries are awaited together; the frontier dedupes canonical URLs.
+        started = time.monotonic()
+        hits_by_query = search_many(provider, [q for q in queries if not q.startswith("http")], num_results=5)
+        stats.timings["search"] = round(time.monotonic() - started, 4)
+        frontier = CrawlFrontier([jurisdiction])
         for q in queries:
             if q.startswith("http"):
-                expanded_urls.append(q)
+                frontier.add(q, [jurisdiction])
+            else:
+                for h in hits_by_query.get(q, []):
+                    if h.url:
+                        frontier.add(h.url, [jurisdiction], query=q, title=h.title, snippet=h.snippet)
+        return self._crawl(frontier, stats)
+
+    def _fetched_pages(self, frontier: CrawlFrontier, stats: SourcingStats) -> Iterator[Tuple[Candidate, str]]:
+        """
+        Fetch frontier candidates best first, SOURCING_FETCH_CONCURRENCY at a time,
+        until every jurisdiction's budget is spent; yields (candidate, html).
+
+        Each URL is isolated: a failure is re-queued with its own exponential
+        backoff (SOURCING_FETCH_ATTEMPTS tries) and then recorded as failed
+        without affecting other URLs.
+        """
+        concurrency = max(1, int(os.getenv("SOURCING_FETCH_CONCURRENCY", "4")))
+        max_attempts = max(1, int(os.getenv("SOURCING_FETCH_ATTEMPTS", "3")))
+        min_backoff = float(os.getenv("SOURCING_RETRY_MIN_BACKOFF", "0.5"))
+        max_backoff = float(os.getenv("SOURCING_RETRY_MAX_BACKOFF", "6"))
+
+        in_flight: Dict[Future, Tuple[Candidate, int]] = {}
+        retries: List[Tuple[float, int, Candidate, int]] = []  # heap of (ready_at, seq, candidate, attempt)
+        seq = 0
+
+        pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="sourcing")
+        try:
+            while True:
+                now = time.monotonic()
+                while retries and retries[0][0] <= now and len(in_flight) < concurrency:
+                    _, _, candidate, attempt = heapq.heappop(retries)
+                    in_flight[pool.submit(self._fetch, resolve_url(candidate.url))] = (candidate, attempt)
+                while len(in_flight) < concurrency and (candidate := frontier.next()) is not None:
+                    in_flight[pool.submit(self._fetch, resolve_url(candidate.url))] = (candidate, 1)
+                if not in_flight and not retries:
+                    break
+                timeout = max(0.0, retries[0][0] - now) if retries else None
+                if not in_flight:
+                    # Only backoffs pending: wait() on no futures returns at once, so sleep to the next retry
+                    time.sleep(timeout)
+                    continue
+                done, _ = wait(set(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    candidate, attempt = in_flight.pop(fut)
+                    try:
+                        html = fut.result()
+                    except Exception as e:
+                        if attempt < max_attempts:
+                            backoff = min(max_backoff, min_backoff * 2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+                            seq += 1
+                            heapq.heappush(retries, (time.monotonic() + backoff, seq, candidate, attempt + 1))
+                            stats.retried += 1
+                            continue
+                        self.logger.error(f"giving up on {candidate.url} after {attempt} attempts: {e}")
+                        stats.failed += 1
+                        stats.errors.append({"url": candidate.url, "error": str(e)[:200]})
+                        frontier.record(candidate, 0, useful=False)
+                        continue
+                    size = len(html.encode("utf-8", errors="ignore")) if html else 0
+                    # Usefulness is judged on the raw body: parsing happens downstream, after the budget decision
+                    frontier.record(candidate, size, useful=bool(html and html.strip()))
+                    stats.bytes += size
+                    if html:
+                        stats.fetched += 1
+                        yield candidate, html
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _crawl(self, frontier: CrawlFrontier, stats: SourcingStats) -> List[SourceDocument]:
+        """
+        Crawl the frontier through a bounded pipeline: fetch -> parse -> chunk ->
+        embed -> index, each stage with its own workers (SOURCING_PARSE_WORKERS,
+        SOURCING_EMBED_WORKERS; the chunk and index stages are single writers).
+        Full queues (SOURCING_PIPELINE_QUEUE) push back on the fetcher, and
+        documents are indexed in batches of up to SOURCING_INDEX_BATCH chunks as
+        they arrive, so earlier results survive later errors.
+        """
+        queue_size = max(1, int(os.getenv("SOURCING_PIPELINE_QUEUE", "16")))
+        parse_workers = max(1, int(os.getenv("SOURCING_PARSE_WORKERS", "2")))
+        embed_workers = max(1, int(os.getenv("SOURCING_EMBED_WORKERS", "1")))
+        embed_batch = max(1, int(os.getenv("SOURCING_EMBED_BATCH", "32")))
+        index_batch = max(1, int(os.getenv("SOURCING_INDEX_BATCH", "8")))
+        index_linger = float(os.getenv("SOURCING_INDEX_LINGER_S", "0.5"))
+        chunk_chars = int(os.getenv("SOURCING_CHUNK_CHARS", "0"))
+        # Stores without precomputed-embedding support embed inside add_texts on the index stage
+        embed = getattr(self.vector_store, "embed_documents", None)
+        add_embeddings = getattr(self.vector_store, "add_embeddings", None)
+
+        docs: List[SourceDocument] = []
+        seen_hashes: Dict[str, Dict] = {}
+
+        def parse(page: Tuple[Candidate, str]) -> List[SourceDocument]:
+            candidate, html = page
+            return [self._to_document(candidate.url, candidate.tags, html)]
+
+        def chunk(doc: SourceDocument) -> List[Tuple[str, Dict]]:
+            docs.append(doc)
+            meta = self._dedupe(doc, seen_hashes)
+            if meta is None:
+                return []
+            pieces = chunk_text(doc.content, chunk_chars)
+            if len(pieces) <= 1:
+                return [(p, meta) for p in pieces]
+            key = canonical_url(doc.url)
+            return [
+                (piece, dict(meta, chunk=i, chunks=len(pieces), dedupe_key=f"{key}#chunk={i}"))
+                for i, piece in enumerate(pieces)
+            ]
+
+        def embed_batch_fn(batch: List[Tuple[str, Dict]]) -> List[Tuple[str, Dict, Optional[List[float]]]]:
+            if embed is None or add_embeddings is None:
+                return [(text, meta, None) for text, meta in batch]
+            vectors = embed([text for text, _ in batch])
+            return [(text, meta, vec) for (text, meta), vec in zip(batch, vectors)]
+
+        def index(batch: List[Tuple[str, Dict, Optional[List[float]]]]) -> List[Dict]:
+            texts = [text for text, _, _ in batch]
+            metas = [meta for _, meta, _ in batch]
+            if add_embeddings is not None and all(vec is not None for _, _, vec in batch):
+                add_embeddings(texts, [vec for _, _, vec in batch], metas)
             else:
-                hits = provider.search(q, num_results=5)
-                expanded_urls.extend([h.url for h in hits if h.url])
-        # Deduplicate
-        seen = set()
-        for url in expanded_urls:
-            if url in seen:
-                continue
-            seen.add(url)
-            html = self._fetch(url)
-            if not html:
-                continue
-            text = self._parse_html(html)
-            title = url.split("//")[-1]
-            snippet = text[:500]
-            results.append(
-                SourceDocument(
-                    url=url,
-                    title=title,
-                    published_at=None,
-                    content=text,
-                    jurisdiction_tags=[jurisdiction],
-                    snippet=snippet,
-                )
-            )
-        if results:
-            self.add_to_vector(results)
-        return results
+                self.vector_store.add_texts(texts, metas)
+            return metas
+
+        pipeline = Pipeline(
+            [
+                Stage("parse", parse, workers=parse_workers),
+                Stage("chunk", chunk),
+                Stage("embed", embed_batch_fn, workers=embed_workers, batch_size=embed_batch),
+                Stage("index", index, batch_size=index_batch, linger_s=index_linger),
+            ],
+            queue_size=queue_size,
+            source_name="fetch",
+        )
+        try:
+            indexed = pipeline.run(self._fetched_pages(frontier, stats))
+            stats.indexed += sum(1 for meta in indexed if not meta.get("chunk"))
+        finally:
+            summary = pipeline.summary()
+            for name, stage in summary["stages"].items():
+                stats.timings[name] = round(stats.timings.get(name, 0.0) + stage["busy_s"], 4)
+            stats.pipeline = summary
+            self.last_crawl_budget = frontier.summary()
+            self.last_stats = stats
+        return docs
+
+    def _to_document(self, url: str, jurisdiction_tags: List[str], html: str) -> SourceDocument:
+        text = self._parse_html(html)
+        return SourceDocument(
+            url=url,
+            title=url.split("//")[-1],
+            published_at=None,
+            content=text,
+            jurisdiction_tags=list(jurisdiction_tags),
+            snippet=text[:500],
+            size_bytes=len(html.encode("utf-8", errors="ignore")),
+        )
+
+    def collect_plan(self, plan: QueryPlan, num_results: int = 5) -> Dict[str, List[SourceDocument]]:
+        """
+        Source a whole `QueryPlan`: each unique query is searched once and each URL
+        fetched once; documents are tagged with every jurisdiction that led to them.
+        Returns the documents per jurisdiction.
+        """
+        stats = SourcingStats()
+        provider = get_default_search_provider()
+        started = time.monotonic()
+        hits_by_query = search_many(provider, plan.queries, num_results=num_results)
+        stats.timings["search"] = round(time.monotonic() - started, 4)
+        # One frontier for the batch: a shared URL is fetched once and charged to each jurisdiction's budget
+        frontier = CrawlFrontier(plan.jurisdictions)
+        for query, jurisdictions in plan.queries.items():
+            for hit in hits_by_query.get(query, []):
+                if hit.url:
+                    frontier.add(hit.url, jurisdictions, query=query, title=hit.title, snippet=hit.snippet)
+        for url, jurisdictions in plan.urls.items():
+            frontier.add(url, jurisdictions)
+
+        docs = self._crawl(frontier, stats)
+        per_jurisdiction: Dict[str, List[SourceDocument]] = {j: [] for j in plan.jurisdictions}
+        for doc in docs:
+            for tag in doc.jurisdiction_tags:
+                per_jurisdiction.setdefault(tag, []).append(doc)
+        return per_jurisdiction
 
     def run(self, jurisdiction: str, queries: List[str]):
         docs = self.search_and_collect(jurisdiction, queries)
-        return {"num_docs": len(docs)}
+        return {
+            "num_docs": len(docs),
+            "crawl_budget": self.last_crawl_budget.get(jurisdiction),
+            "stats": self.last_stats.summary(),
+        }
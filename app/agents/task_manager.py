@@ -2,39 +2,58 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional, Tuple
 from datetime import datetime, UTC
 
 from .base import Agent
-from ..core.queue import ResearchQueue
+from ..core.queue import LeaseKeeper, ResearchQueue, default_worker_id
 from ..core.types import ResearchTask
 from ..core.logger import setup_logger
 from ..config.settings import settings
 
 
 class TaskManagerAgent(Agent):
-    def __init__(self, queue_path: Path):
+    def __init__(self, queue_path: Path, worker_id: Optional[str] = None):
         super().__init__("task_manager")
+        # Lease owner for every task this agent claims
+        self.worker_id = worker_id or default_worker_id()
         self.queue = ResearchQueue(queue_path)
         self.queue.load()
         self.logger = setup_logger("task_manager")
 
-    def insert_task(self, jurisdiction_path: str, priority: int = 0) -> None:
+    def insert_task(self, jurisdiction_path: str, priority: int = 0) -> bool:
+        """Enqueue a jurisdiction; False when it was already pending (the higher priority is kept)."""
         task = ResearchTask(
             jurisdiction_path=jurisdiction_path,
             priority=priority,
             inserted_at=datetime.now(UTC),
         )
-        self.queue.add_task(task)
+        return self.queue.add_task(task)
+
+    def insert_tasks(self, items: Iterable[Tuple[str, int]]) -> int:
+        """Enqueue (jurisdiction_path, priority) pairs in one write; returns how many were not already pending."""
+        now = datetime.now(UTC)
+        tasks = [ResearchTask(jurisdiction_path=path, priority=priority, inserted_at=now) for path, priority in items]
+        return self.queue.add_tasks(tasks)
 
     def next(self, base_dir: Path | None = None) -> Optional[ResearchTask]:
-        return self.queue.next_task(base_dir=base_dir)
+        return self.queue.next_task(base_dir=base_dir, worker_id=self.worker_id)
+
+    def keep_alive(self, task: ResearchTask) -> LeaseKeeper:
+        """Start heartbeating the lease on a claimed task; call `stop()` when done with it."""
+        return LeaseKeeper(self.queue, task.jurisdiction_path, self.worker_id).start()
+
+    def hand_off(self, jurisdiction_path: str, owner: str) -> None:
+        if not self.queue.hand_off(jurisdiction_path, self.worker_id, owner):
+            self.logger.warning(f"Lease on {jurisdiction_path} lost before hand-off to {owner}")
 
     def mark_completed(self, jurisdiction_path: str) -> None:
-        self.queue.mark_completed(jurisdiction_path)
+        if not self.queue.mark_completed(jurisdiction_path, worker_id=self.worker_id):
+            self.logger.warning(f"Lease on {jurisdiction_path} was reclaimed; completion not recorded on the queue")
 
     def mark_error(self, jurisdiction_path: str, error: str) -> None:
-        self.queue.mark_error(jurisdiction_path, error)
+        if not self.queue.mark_error(jurisdiction_path, error, worker_id=self.worker_id):
+            self.logger.warning(f"Lease on {jurisdiction_path} was reclaimed; error not recorded on the queue")
 
     def run(self, **kwargs):
-        return {"pending": len([t for t in self.queue.tasks if t.status == "pending"]) }
+        return {"pending": self.queue.count("pending")}
@@ -1,25 +1,36 @@
 from __future__ import annotations
 
+import copy
 import json
+import time
+import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, Tuple
 
-from celery import shared_task
-from tenacity import retry, stop_after_attempt, wait_exponential
+from celery import chain, shared_task
+from celery.signals import worker_process_init
 
 from ..config.settings import settings
 from ..core.paths import project_root
 from ..core.logger import setup_logger, set_trace_id
-from ..core.vector_store import VectorStore
 from ..core.db import record_run
-from .sourcing_agent import SourcingAgent
-from .extraction_agent import ExtractionAgent
-from .validation_agent import ValidationAgent
-from .merge_agent import MergeAgent
+from ..core.checkpoints import StageRun, file_digest, get_checkpoint_store, input_hash
+from .worker_resources import StageAgents, get_worker_resources, warm_worker_resources
 
 
 logger = setup_logger("tasks")
 
+# The single retry policy for pipeline tasks: RETRY_MAX_ATTEMPTS runs in total (the first included),
+# exponential backoff between them. Retries resume from stage checkpoints rather than re-sourcing.
+RETRY_MAX_ATTEMPTS = max(1, int(getattr(settings, "retry_max_attempts", 3)))
+RETRY_MIN_SECONDS = float(getattr(settings, "retry_min_seconds", 0.5))
+RETRY_MAX_SECONDS = float(getattr(settings, "retry_max_seconds", 8.0))
+
+
+def retry_countdown(retries: int) -> float:
+    """Backoff before retry number `retries + 1`."""
+    return min(RETRY_MAX_SECONDS, RETRY_MIN_SECONDS * (2 ** retries))
+
 
 def _notify_slack_safe(message: str) -> None:
     try:
@@ -37,63 +48,329 @@ def _push_dlq_safe(payload: dict) -> None:
         pass
 
 
-@shared_task(name="app.agents.tasks.process_jurisdiction", autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={"max_retries": 3})
-@retry(
-    stop=stop_after_attempt(getattr(settings, "retry_max_attempts", 3)),
-    wait=wait_exponential(
-        multiplier=getattr(settings, "retry_min_seconds", 0.5),
-        min=getattr(settings, "retry_min_seconds", 0.5),
-        max=getattr(settings, "retry_max_seconds", 8.0),
-    ),
-    reraise=True,
+@worker_process_init.connect
+def _init_worker_process(**_kwargs) -> None:
+    # Prefork children load the index and build agents once, before their first task
+    warm_worker_resources()
+
+
+# --- Pipeline stages ---------------------------------------------------------------------------------------
+#
+# Each stage takes and returns a small run context. Stages hand off references, not payloads: `sources` is
+# the content hash of the sourcing result (the documents themselves are in the vector store), `patch_id` is
+# the content hash of the patch written to `patch_path`. Outputs are checkpointed per run id, so a retried
+# stage or a re-dispatched run skips work already done.
+
+
+def new_context(
+    jurisdiction_path: str,
+    run_id: str,
+    skip_validation: bool = False,
+    skip_merge: bool = False,
+    queue_path: Optional[str] = None,
+    queue_owner: Optional[str] = None,
+) -> dict:
+    return {
+        "jurisdiction_path": jurisdiction_path,
+        "run_id": run_id,
+        "skip_validation": skip_validation,
+        "skip_merge": skip_merge,
+        # The research-queue claim handed to this run (runner --use-celery); closed by the run's last task
+        "queue": {"path": queue_path, "owner": queue_owner} if queue_path and queue_owner else None,
+        "status": "running",
+        "sources": None,
+        "patch_id": None,
+        "patch_path": None,
+        "resumed": [],
+        # Per task (or chain stage): {"cold", "refreshed", "setup_ms", "ms"}
+        "timings": {},
+    }
+
+
+def _stages(ctx: dict) -> StageRun:
+    return StageRun(ctx["run_id"], get_checkpoint_store())
+
+
+def _failed(ctx: dict, stage: str, status: str, details: dict, label: str) -> dict:
+    jurisdiction = ctx["jurisdiction_path"]
+    record_run(settings.database_url, jurisdiction, status="error", metrics=details, trace_id=ctx["run_id"])
+    _push_dlq_safe({"jurisdiction": jurisdiction, "stage": stage, "details": details})
+    _notify_slack_safe(f"{label}: {jurisdiction}")
+    ctx.update(status=status, details=details)
+    return ctx
+
+
+def _errored(ctx: dict, stage: str, e: Exception, attempt: int) -> dict:
+    jurisdiction = ctx["jurisdiction_path"]
+    logger.exception(f"Celery task failed: {jurisdiction} stage={stage}: {e}")
+    record_run(settings.database_url, jurisdiction, status="error", metrics={"error": str(e), "attempts": attempt}, trace_id=ctx["run_id"])
+    _push_dlq_safe({"jurisdiction": jurisdiction, "stage": stage, "error": str(e)})
+    _notify_slack_safe(f"Error: {jurisdiction}")
+    ctx.update(status="error", error=str(e))
+    return ctx
+
+
+def _load_patch(ctx: dict) -> Tuple[Path, Optional[dict]]:
+    """The patch written by extraction; None when the file no longer matches `patch_id` (another run rewrote it)."""
+    patch_path = project_root() / ctx["patch_path"]
+    try:
+        patch = json.loads(patch_path.read_text())
+    except (OSError, ValueError):
+        return patch_path, None
+    return patch_path, (patch if input_hash(patch) == ctx["patch_id"] else None)
+
+
+def run_sourcing(ctx: dict, agents: StageAgents) -> dict:
+    jurisdiction = ctx["jurisdiction_path"]
+    record_run(settings.database_url, jurisdiction, status="in_progress", trace_id=ctx["run_id"])
+    _notify_slack_safe(f"Started: {jurisdiction}")
+    stages = _stages(ctx)
+    queries = [f"https://law.justia.com/codes/{jurisdiction}"]
+    sourced, _ = stages.stage(
+        "sourcing",
+        {"jurisdiction": jurisdiction, "queries": queries},
+        lambda: agents.sourcing.run(jurisdiction, queries),
+    )
+    ctx.update(sources=input_hash(sourced), resumed=ctx["resumed"] + stages.resumed)
+    return ctx
+
+
+def run_extraction(ctx: dict, agents: StageAgents) -> dict:
+    jurisdiction = ctx["jurisdiction_path"]
+    stages = _stages(ctx)
+    schema_skeleton = {"jurisdiction": jurisdiction}
+    extracted, _ = stages.stage(
+        "extraction",
+        {"schema": schema_skeleton, "sources": ctx["sources"]},
+        lambda: {"patch": agents.extraction.run(jurisdiction, schema_skeleton)},
+    )
+    patch = extracted["patch"]
+    patch_rel = Path("research_inputs") / f"{Path(jurisdiction).stem}.json"
+    (project_root() / patch_rel).write_text(json.dumps(patch, indent=2))
+    ctx.update(patch_id=input_hash(patch), patch_path=str(patch_rel), resumed=ctx["resumed"] + stages.resumed)
+    return ctx
+
+
+def run_validation(ctx: dict, agents: StageAgents) -> dict:
+    if ctx["skip_validation"]:
+        return ctx
+    jurisdiction = ctx["jurisdiction_path"]
+    patch_path, patch = _load_patch(ctx)
+    if patch is None:
+        return _failed(ctx, "validation", "stale_patch", {"patch_path": ctx["patch_path"]}, "Patch changed before validation")
+    jurisdiction_file = project_root() / jurisdiction
+    stages = _stages(ctx)
+
+    def validate() -> dict:
+        ok, details = agents.validation.run(jurisdiction_file, patch_path)
+        return {"ok": ok, "details": details}
+
+    validated, _ = stages.stage(
+        "validation",
+        {"patch": ctx["patch_id"], "target": file_digest(jurisdiction_file)},
+        validate,
+        keep=lambda out: bool(out["ok"]),
+    )
+    ctx["resumed"] = ctx["resumed"] + stages.resumed
+    if not validated["ok"]:
+        return _failed(ctx, "validation", "validation_failed", validated["details"], "Validation failed")
+    return ctx
+
+
+def run_merge(ctx: dict, agents: StageAgents) -> dict:
+    if ctx["skip_merge"]:
+        return ctx
+    patch_path, patch = _load_patch(ctx)
+    if patch is None:
+        return _failed(ctx, "merge", "stale_patch", {"patch_path": ctx["patch_path"]}, "Patch changed before merge")
+    ok, details = agents.merge.run(project_root() / ctx["jurisdiction_path"], patch_path)
+    if not ok:
+        return _failed(ctx, "merge", "merge_failed", details, "Merge failed")
+    return ctx
+
+
+def complete_run(ctx: dict) -> dict:
+    """Records a run whose stages all passed and clears its checkpoints."""
+    jurisdiction = ctx["jurisdiction_path"]
+    _stages(ctx).complete()
+    metrics = {"timings": ctx["timings"]}
+    if ctx["resumed"]:
+        metrics["resumed_stages"] = ctx["resumed"]
+    record_run(settings.database_url, jurisdiction, status="completed", metrics=metrics, trace_id=ctx["run_id"])
+    _notify_slack_safe(f"Completed: {jurisdiction}")
+    ctx["status"] = "completed"
+    return ctx
+
+
+def close_claim(ctx: dict) -> None:
+    """Mark the handed-off queue claim completed or error with the run's outcome, so it does not stay in progress."""
+    claim = ctx.get("queue")
+    if not claim:
+        return
+    jurisdiction = ctx["jurisdiction_path"]
+    try:
+        from ..core.queue import ResearchQueue  # Lazy: only runs dispatched from the runner carry a claim
+
+        queue = ResearchQueue(Path(claim["path"]))
+        queue.load()
+        if ctx["status"] == "completed":
+            closed = queue.mark_completed(jurisdiction, worker_id=claim["owner"])
+        else:
+            closed = queue.mark_error(jurisdiction, ctx.get("error") or ctx["status"], worker_id=claim["owner"])
+        if not closed:
+            logger.warning(f"queue claim for {jurisdiction} no longer held by {claim['owner']}")
+    except Exception as e:
+        logger.warning(f"could not close queue claim for {jurisdiction}: {e}")
+
+
+PIPELINE: Tuple[Tuple[str, Callable[[dict, StageAgents], dict]], ...] = (
+    ("sourcing", run_sourcing),
+    ("extraction", run_extraction),
+    ("validation", run_validation),
+    ("merge", run_merge),
 )
-def process_jurisdiction(jurisdiction_path: str, skip_validation: bool = False, skip_merge: bool = False, trace_id: Optional[str] = None) -> dict:
-    if trace_id:
-        set_trace_id(trace_id)
-    logger.info(f"Processing task via Celery: {jurisdiction_path}")
 
-    record_run(settings.database_url, jurisdiction_path, status="in_progress", trace_id=trace_id)
-    _notify_slack_safe(f"Started: {jurisdiction_path}")
 
-    vector = VectorStore(index_path=settings.vector_db_path, api_key=settings.openai_api_key, base_url=settings.openai_base_url)
-    sourcing = SourcingAgent(vector)
-    extraction = ExtractionAgent(vector)
-    validation = ValidationAgent()
-    merge = MergeAgent()
+def pipeline_result(ctx: dict) -> dict:
+    if ctx["status"] == "completed":
+        return {"status": "completed", "jurisdiction": ctx["jurisdiction_path"]}
+    if ctx["status"] == "error":
+        return {"status": "error", "error": ctx.get("error")}
+    return {"status": ctx["status"], "details": ctx.get("details")}
 
+
+def _record_timing(ctx: dict, key: str, setup: dict, started: float) -> None:
+    """Latency of one task (or chain stage), with the setup it paid (cold) or skipped (warm)."""
+    ms = round((time.monotonic() - started) * 1000, 1)
+    ctx["timings"][key] = {**setup, "ms": ms}
+    resources = get_worker_resources()
+    resources.observe(setup["cold"], ms)
+    logger.info(
+        f"{key} {ctx['jurisdiction_path']} took {ms:.0f}ms ({'cold' if setup['cold'] else 'warm'}, setup {setup['setup_ms']:.0f}ms)"
+        f" | worker pid={resources.pid} {resources.summary()}"
+    )
+
+
+@shared_task(bind=True, name="app.agents.tasks.process_jurisdiction", max_retries=RETRY_MAX_ATTEMPTS - 1)
+def process_jurisdiction(
+    self,
+    jurisdiction_path: str,
+    skip_validation: bool = False,
+    skip_merge: bool = False,
+    trace_id: Optional[str] = None,
+    queue_path: Optional[str] = None,
+    queue_owner: Optional[str] = None,
+) -> dict:
+    """All stages in one task on the `research` queue; `dispatch_pipeline` runs them as separately routed tasks."""
+    # The Celery task id is kept across retries, so it identifies the run when no trace id was passed
+    run_id = trace_id or f"celery-{self.request.id}"
+    set_trace_id(run_id)
+    attempt = self.request.retries + 1
+    logger.info(f"Processing task via Celery: {jurisdiction_path} attempt={attempt}/{RETRY_MAX_ATTEMPTS}")
+
+    started = time.monotonic()
+    ctx = new_context(jurisdiction_path, run_id, skip_validation, skip_merge, queue_path, queue_owner)
     try:
-        queries = [f"https://law.justia.com/codes/{jurisdiction_path}"]
-        sourcing.run(jurisdiction_path, queries)
-
-        schema_skeleton = {"jurisdiction": jurisdiction_path}
-        patch = extraction.run(jurisdiction_path, schema_skeleton)
-
-        patch_path = project_root() / "research_inputs" / f"{Path(jurisdiction_path).stem}.json"
-        patch_path.write_text(json.dumps(patch, indent=2))
-
-        jurisdiction_file = project_root() / jurisdiction_path
-        if not skip_validation:
-            ok, details = validation.run(jurisdiction_file, patch_path)
-            if not ok:
-                record_run(settings.database_url, jurisdiction_path, status="error", metrics=details, trace_id=trace_id)
-                _push_dlq_safe({"jurisdiction": jurisdiction_path, "stage": "validation", "details": details})
-                _notify_slack_safe(f"Validation failed: {jurisdiction_path}")
-                return {"status": "validation_failed", "details": details}
-
-        if not skip_merge:
-            ok, details = merge.run(jurisdiction_file, patch_path)
-            if not ok:
-                record_run(settings.database_url, jurisdiction_path, status="error", metrics=details, trace_id=trace_id)
-                _push_dlq_safe({"jurisdiction": jurisdiction_path, "stage": "merge", "details": details})
-                _notify_slack_safe(f"Merge failed: {jurisdiction_path}")
-                return {"status": "merge_failed", "details": details}
-
-        record_run(settings.database_url, jurisdiction_path, status="completed", trace_id=trace_id)
-        _notify_slack_safe(f"Completed: {jurisdiction_path}")
-        return {"status": "completed", "jurisdiction": jurisdiction_path}
+        agents, setup = get_worker_resources().acquire()
+        for _, run in PIPELINE:
+            ctx = run(ctx, agents)
+            if ctx["status"] != "running":
+                break
+        _record_timing(ctx, "task", setup, started)
+        if ctx["status"] == "running":
+            ctx = complete_run(ctx)
     except Exception as e:
-        logger.exception(f"Celery task failed: {jurisdiction_path}: {e}")
-        record_run(settings.database_url, jurisdiction_path, status="error", metrics={"error": str(e)}, trace_id=trace_id)
-        _push_dlq_safe({"jurisdiction": jurisdiction_path, "stage": "task", "error": str(e)})
-        _notify_slack_safe(f"Error: {jurisdiction_path}")
-        return {"status": "error", "error": str(e)}
+        if self.request.retries < self.max_retries:
+            countdown = retry_countdown(self.request.retries)
+            logger.warning(f"Celery task attempt {attempt} failed: {jurisdiction_path}: {e}; retrying in {countdown:.1f}s")
+            raise self.retry(exc=e, countdown=countdown)
+        ctx = _errored(ctx, "task", e, attempt)
+    close_claim(ctx)
+    return pipeline_result(ctx)
+
+
+def _stage_task(task, stage: str, ctx: dict) -> dict:
+    if ctx["status"] != "running":
+        # An earlier stage failed; pass its outcome down the chain
+        return ctx
+    set_trace_id(ctx["run_id"])
+    attempt = task.request.retries + 1
+    logger.info(f"Running stage={stage} for {ctx['jurisdiction_path']} attempt={attempt}/{RETRY_MAX_ATTEMPTS}")
+    run = dict(PIPELINE)[stage]
+    started = time.monotonic()
+    # Stages update the context in place; a retry must start from the context it was handed
+    work = copy.deepcopy(ctx)
+    try:
+        agents, setup = get_worker_resources().acquire()
+        work = run(work, agents)
+        _record_timing(work, stage, setup, started)
+        return work
+    except Exception as e:
+        if task.request.retries < task.max_retries:
+            countdown = retry_countdown(task.request.retries)
+            logger.warning(f"Stage {stage} attempt {attempt} failed: {ctx['jurisdiction_path']}: {e}; retrying in {countdown:.1f}s")
+            raise task.retry(exc=e, countdown=countdown)
+        return _errored(copy.deepcopy(ctx), stage, e, attempt)
+
+
+# Sourcing, extraction and validation are idempotent (checkpointed, side effects keyed by content), so a task
+# lost with its worker is redelivered. Merge and process_jurisdiction can open a PR and are acknowledged early.
+@shared_task(bind=True, name="app.agents.tasks.source_stage", max_retries=RETRY_MAX_ATTEMPTS - 1, acks_late=True)
+def source_stage(self, ctx: dict) -> dict:
+    return _stage_task(self, "sourcing", ctx)
+
+
+@shared_task(bind=True, name="app.agents.tasks.extract_stage", max_retries=RETRY_MAX_ATTEMPTS - 1, acks_late=True)
+def extract_stage(self, ctx: dict) -> dict:
+    return _stage_task(self, "extraction", ctx)
+
+
+@shared_task(bind=True, name="app.agents.tasks.validate_stage", max_retries=RETRY_MAX_ATTEMPTS - 1, acks_late=True)
+def validate_stage(self, ctx: dict) -> dict:
+    return _stage_task(self, "validation", ctx)
+
+
+@shared_task(bind=True, name="app.agents.tasks.merge_stage", max_retries=RETRY_MAX_ATTEMPTS - 1)
+def merge_stage(self, ctx: dict) -> dict:
+    ctx = _stage_task(self, "merge", ctx)
+    if ctx["status"] == "running":
+        ctx = complete_run(ctx)
+    # Earlier failures pass through to here, so every outcome closes the queue claim
+    close_claim(ctx)
+    return pipeline_result(ctx)
+
+
+def pipeline_chain(
+    jurisdiction_path: str,
+    skip_validation: bool = False,
+    skip_merge: bool = False,
+    trace_id: Optional[str] = None,
+    queue_path: Optional[str] = None,
+    queue_owner: Optional[str] = None,
+):
+    """
+    The pipeline as a chain of stage tasks, each routed to its own queue (see `celery_app.STAGE_QUEUES`).
+    The merge task always runs last: it completes the run, closes the research-queue claim held by
+    `queue_owner` (if any) and returns the same result as `process_jurisdiction`.
+    Tasks reuse their worker process's vector store and agents (`worker_resources`).
+    """
+    ctx = new_context(
+        jurisdiction_path, trace_id or f"celery-{uuid.uuid4().hex}", skip_validation, skip_merge, queue_path, queue_owner
+    )
+    steps = [source_stage.s(ctx), extract_stage.s()]
+    if not skip_validation:
+        steps.append(validate_stage.s())
+    steps.append(merge_stage.s())
+    return chain(*steps)
+
+
+def dispatch_pipeline(
+    jurisdiction_path: str,
+    skip_validation: bool = False,
+    skip_merge: bool = False,
+    trace_id: Optional[str] = None,
+    queue_path: Optional[str] = None,
+    queue_owner: Optional[str] = None,
+):
+    """Sends the stage chain; the returned result is the merge task's."""
+    return pipeline_chain(jurisdiction_path, skip_validation, skip_merge, trace_id, queue_path, queue_owner).apply_async()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from ..config.settings import settings
+from ..core.logger import setup_logger
+from ..core.vector_store import VectorStore
+from .sourcing_agent import SourcingAgent
+from .extraction_agent import ExtractionAgent
+from .validation_agent import ValidationAgent
+from .merge_agent import MergeAgent
+
+
+logger = setup_logger("worker_resources")
+
+
+@dataclass
+class StageAgents:
+    sourcing: SourcingAgent
+    extraction: ExtractionAgent
+    validation: ValidationAgent
+    merge: MergeAgent
+
+
+class WorkerResources:
+    """
+    The vector store and pipeline agents reused by every task a Celery worker process runs.
+
+    The store is loaded once per process and reloaded only when another process has written the index since
+    (`VectorStore.refresh`). Agents keep per-run state and their LLM client, so each pool thread gets its
+    own set (prefork children have one thread). `acquire` reports whether the calling task paid the setup
+    (cold) or reused it (warm); `observe` keeps per-process latency totals for both, with a process-init
+    warm-up counted as the cold sample.
+    """
+
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self.vector = VectorStore(index_path=settings.vector_db_path, api_key=settings.openai_api_key, base_url=settings.openai_base_url)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, float]] = {
+            "cold": {"tasks": 0, "ms": 0.0},
+            "warm": {"tasks": 0, "ms": 0.0},
+        }
+
+    def acquire(self) -> Tuple[StageAgents, dict]:
+        """This thread's agents with a current index, and the setup this cost: {"cold", "refreshed", "setup_ms"}."""
+        started = time.monotonic()
+        agents: Optional[StageAgents] = getattr(self._local, "agents", None)
+        cold = agents is None
+        if agents is None:
+            agents = StageAgents(
+                sourcing=SourcingAgent(self.vector),
+                extraction=ExtractionAgent(self.vector),
+                validation=ValidationAgent(),
+                merge=MergeAgent(),
+            )
+            self._local.agents = agents
+        refreshed = self.vector.refresh()
+        # A reload counts as cold: the task waited on the index as on a first load
+        return agents, {
+            "cold": cold or refreshed,
+            "refreshed": refreshed,
+            "setup_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+
+    def observe(self, cold: bool, ms: float) -> None:
+        with self._lock:
+            entry = self._totals["cold" if cold else "warm"]
+            entry["tasks"] += 1
+            entry["ms"] += ms
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-process task counts and mean latency (ms) for cold and warm tasks."""
+        with self._lock:
+            return {
+                kind: {"tasks": int(v["tasks"]), "avg_ms": round(v["ms"] / v["tasks"], 1) if v["tasks"] else 0.0}
+                for kind, v in self._totals.items()
+            }
+
+
+_resources: Optional[WorkerResources] = None
+_resources_lock = threading.Lock()
+
+
+def get_worker_resources() -> WorkerResources:
+    """This process's resources, created on first use (and again in a forked child)."""
+    global _resources
+    with _resources_lock:
+        if _resources is None or _resources.pid != os.getpid():
+            _resources = WorkerResources()
+        return _resources
+
+
+def warm_worker_resources() -> None:
+    """Build the resources and load the index before the first task (Celery `worker_process_init`)."""
+    started = time.monotonic()
+    try:
+        resources = get_worker_resources()
+        resources.acquire()
+    except Exception as e:
+        # Tasks build them lazily instead
+        logger.warning(f"worker warm-up failed pid={os.getpid()} err={e}")
+        return
+    ms = (time.monotonic() - started) * 1000
+    # The warm-up is where this process pays its cold start; the tasks after it run warm
+    resources.observe(True, ms)
+    logger.info(f"worker resources ready pid={os.getpid()} in {ms:.0f}ms")
+
+
+def reset_worker_resources() -> None:
+    global _resources
+    with _resources_lock:
+        _resources = None
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+
 from celery import Celery
 from .logger import setup_logger
 from ..config.settings import settings
@@ -7,6 +9,23 @@ from ..config.settings import settings
 
 logger = setup_logger("celery")
 
+# Pipeline stage tasks -> queue. Each queue is consumed by its own worker pool, sized for the stage's
+# bottleneck (docker-compose.yml): crawling is I/O-bound, extraction LLM-bound, validation CPU-bound and
+# merges are serialized. Everything else, including the single-task `process_jurisdiction`, stays on `research`.
+STAGE_QUEUES = {
+    "app.agents.tasks.source_stage": "sourcing",
+    "app.agents.tasks.extract_stage": "extraction",
+    "app.agents.tasks.validate_stage": "validation",
+    "app.agents.tasks.merge_stage": "merge",
+}
+
+
+def _proc_alive_timeout() -> float:
+    try:
+        return float(os.getenv("CELERY_PROC_ALIVE_TIMEOUT", "60"))
+    except Exception:
+        return 60.0
+
 
 def create_celery_app() -> Celery:
     broker = settings.redis_url or "memory://"
@@ -19,7 +38,15 @@ def create_celery_app() -> Celery:
     )
     app.conf.update(
         task_default_queue="research",
-        task_routes={"app.agents.tasks.*": {"queue": "research"}},
+        task_routes={
+            **{name: {"queue": queue} for name, queue in STAGE_QUEUES.items()},
+            "app.agents.tasks.*": {"queue": "research"},
+        },
+        # Late acks (redelivery after a killed worker) are set per task, on the idempotent stages only:
+        # merge opens PRs before its checkpoint could record it, so it is acknowledged on receipt
+        worker_prefetch_multiplier=1,
+        # Pool children load the vector index in worker_process_init; Celery's 4s default would kill them
+        worker_proc_alive_timeout=_proc_alive_timeout(),
         task_serializer="json",
         result_serializer="json",
         accept_content=["json"],
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from .logger import setup_logger
+from .paths import project_root
+
+logger = setup_logger("checkpoints")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stage_checkpoints (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    output TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_stage_checkpoints_created ON stage_checkpoints (created_at);
+"""
+
+
+def input_hash(inputs: Any) -> str:
+    """Stable sha256 of a stage's inputs (JSON with sorted keys)."""
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    """Content hash of a file that feeds a stage ("missing" when absent)."""
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return "missing"
+
+
+class CheckpointStore:
+    """
+    Per-stage outputs of a pipeline run, so a retry resumes at the first stage
+    without a checkpoint instead of re-sourcing.
+
+    Keyed by (run id, stage). The run id is the task's trace id, which stays the
+    same across retries. Each entry also stores the hash of the stage's inputs,
+    and an entry whose inputs changed (new sources, a different patch, an edited
+    jurisdiction file) is ignored. Entries expire after `ttl_seconds`; a
+    completed run clears its own.
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: float = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, run_id: str, stage: str, inputs_hash: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT input_hash, output, created_at FROM stage_checkpoints WHERE run_id = ? AND stage = ?",
+                (run_id, stage),
+            ).fetchone()
+        if row is None or row[0] != inputs_hash:
+            return None
+        if self.ttl_seconds and time.time() - row[2] > self.ttl_seconds:
+            return None
+        try:
+            return json.loads(row[1])
+        except Exception:
+            return None
+
+    def put(self, run_id: str, stage: str, inputs_hash: str, output: Dict[str, Any]) -> None:
+        now = time.time()
+        try:
+            payload = json.dumps(output, ensure_ascii=False, default=str)
+        except Exception as e:
+            logger.warning(f"checkpoint skipped (unserializable) run={run_id} stage={stage} err={e}")
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stage_checkpoints (run_id, stage, input_hash, output, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (run_id, stage, inputs_hash, payload, now),
+            )
+            if self.ttl_seconds:
+                conn.execute("DELETE FROM stage_checkpoints WHERE created_at < ?", (now - self.ttl_seconds,))
+
+    def clear(self, run_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM stage_checkpoints WHERE run_id = ?", (run_id,))
+
+    def stages(self, run_id: str) -> Dict[str, str]:
+        """Checkpointed stages of a run -> input hash."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT stage, input_hash FROM stage_checkpoints WHERE run_id = ?", (run_id,)).fetchall()
+        return {r[0]: r[1] for r in rows}
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    if os.getenv("CHECKPOINTS_ENABLED", "1") in ("0", "false", "False"):
+        return None
+    override = os.getenv("CHECKPOINT_PATH")
+    path = Path(override) if override else project_root() / ".cache" / "checkpoints.db"
+    try:
+        ttl = float(os.getenv("CHECKPOINT_TTL_S", str(7 * 24 * 3600)))
+    except Exception:
+        ttl = 7 * 24 * 3600
+    try:
+        return CheckpointStore(path, ttl_seconds=ttl)
+    except Exception as e:
+        logger.warning(f"checkpoints unavailable path={path} err={e}")
+        return None
+
+
+class StageRun:
+    """
+    Runs pipeline stages for one run id through the checkpoint store.
+
+    `stage(name, inputs, fn)` returns the checkpointed output when `inputs` hash
+    to the stored value, and otherwise runs `fn` and stores its output if
+    `keep(output)` holds (failed validations are not kept, so they run again).
+    Without a store (CHECKPOINTS_ENABLED=0) every stage runs.
+    """
+
+    def __init__(self, run_id: str, store: Optional[CheckpointStore] = None):
+        self.run_id = run_id
+        self.store = store
+        self.resumed: list[str] = []
+
+    def stage(
+        self,
+        name: str,
+        inputs: Any,
+        fn: Callable[[], Dict[str, Any]],
+        keep: Callable[[Dict[str, Any]], bool] = lambda out: True,
+    ) -> Tuple[Dict[str, Any], bool]:
+        digest = input_hash(inputs)
+        if self.store is not None:
+            try:
+                cached = self.store.get(self.run_id, name, digest)
+            except Exception as e:
+                logger.warning(f"checkpoint read failed run={self.run_id} stage={name} err={e}")
+                cached = None
+            if cached is not None:
+                logger.info(f"Resuming {self.run_id} past stage={name} from checkpoint")
+                self.resumed.append(name)
+                return cached, True
+        output = fn()
+        try:
+            # Same shape a resumed run sees, so hashes of downstream inputs match across attempts
+            output = json.loads(json.dumps(output, ensure_ascii=False, default=str))
+        except Exception:
+            pass
+        if self.store is not None and keep(output):
+            try:
+                self.store.put(self.run_id, name, digest, output)
+            except Exception as e:
+                logger.warning(f"checkpoint write failed run={self.run_id} stage={name} err={e}")
+        return output, False
+
+    def complete(self) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.clear(self.run_id)
+        except Exception as e:
+            logger.warning(f"checkpoint clear failed run={self.run_id} err={e}")
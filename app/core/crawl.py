@@ -1,20 +1,50 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from dataclasses import dataclass
+from typing import IO, Any, Dict
+import hashlib
+import io
 import time
 import random
+import tempfile
 import urllib.parse
 import urllib.robotparser
 import httpx
 import os
 
+from .deadline import UNBOUNDED, Deadline, DeadlineExceeded
+from .extract_cache import get_default_extraction_cache
 from .logger import setup_logger
+from .ocr import get_backend as get_ocr_backend, get_default_cache as get_ocr_cache, ocr_pages
+from .pdf_extract import PdfPage, extract_pdf_text, page_anchors
+from .urlnorm import canonical_url, learn_redirects, resolve_url
 
 logger = setup_logger("crawl")
 
 
 _LAST_REQUEST_BY_HOST: dict[str, float] = {}
 
+# Magic-byte signatures checked against the first chunk of a response body
+_MAGIC_SIGNATURES: list[tuple[bytes, str]] = [
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+]
+
+_SUFFIX_TYPES: dict[str, str] = {
+    ".pdf": "application/pdf",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+}
+
 
 def get_user_agents() -> list[str]:
     ua_fixed = os.getenv("CRAWL_USER_AGENT")
@@ -37,22 +67,31 @@ def choose_user_agent() -> str:
     return random.choice(agents)
 
 
-def respect_robots(url: str, user_agent: str) -> bool:
+def respect_robots(url: str, user_agent: str, deadline: Deadline | None = None) -> bool:
     if os.getenv("CRAWL_RESPECT_ROBOTS", "1") in ("0", "false", "False"):
         return True
     try:
         parts = urllib.parse.urlsplit(url)
         robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+        # Fetch with a bounded timeout (RobotFileParser.read has none), then mirror its status handling
+        timeout = (deadline or UNBOUNDED).timeout(float(os.getenv("CRAWL_ROBOTS_TIMEOUT", "5")), "robots")
+        resp = httpx.get(robots_url, headers={"User-Agent": user_agent}, timeout=timeout, follow_redirects=True)
+        if resp.status_code in (401, 403):
+            return False
+        if resp.status_code >= 400:
+            return True
         rp = urllib.robotparser.RobotFileParser()
         rp.set_url(robots_url)
-        rp.read()
+        rp.parse(resp.text.splitlines())
         return rp.can_fetch(user_agent, url)
+    except DeadlineExceeded:
+        raise
     except Exception:
         # Fail-open if robots cannot be retrieved
         return True
 
 
-def polite_delay(url: str) -> None:
+def polite_delay(url: str, deadline: Deadline | None = None) -> None:
     try:
         min_delay = float(os.getenv("CRAWL_DELAY_SECONDS", "1.0"))
     except Exception:
@@ -65,10 +104,170 @@ def polite_delay(url: str) -> None:
     last = _LAST_REQUEST_BY_HOST.get(host, 0.0)
     wait = (last + min_delay) - now
     if wait > 0:
+        remaining = deadline.remaining() if deadline is not None else None
+        if remaining is not None and wait > remaining:
+            raise DeadlineExceeded("polite_delay")
         time.sleep(wait)
     _LAST_REQUEST_BY_HOST[host] = time.monotonic()
 
 
+def get_max_body_bytes() -> int:
+    try:
+        return int(os.getenv("CRAWL_MAX_BYTES", str(25 * 1024 * 1024)))
+    except Exception:
+        return 25 * 1024 * 1024
+
+
+def sniff_content_type(head: bytes, declared: str | None = None, url: str = "") -> str:
+    """
+    Decide the mime type of a response from its first bytes.
+
+    Magic bytes win over the declared Content-Type (servers often send PDFs as
+    octet-stream or text/html), which in turn wins over the URL suffix.
+    """
+    stripped = head.lstrip()
+    for magic, mime in _MAGIC_SIGNATURES:
+        if stripped.startswith(magic):
+            return mime
+    declared_mime = (declared or "").split(";")[0].strip().lower()
+    if declared_mime and declared_mime not in ("application/octet-stream", "binary/octet-stream"):
+        return declared_mime
+    lowered = stripped[:512].lower()
+    if lowered.startswith((b"<!doctype html", b"<html")) or b"<html" in lowered:
+        return "text/html"
+    path = urllib.parse.urlsplit(url).path.lower()
+    for suffix, mime in _SUFFIX_TYPES.items():
+        if path.endswith(suffix):
+            return mime
+    return declared_mime or "application/octet-stream"
+
+
+def is_textual_type(mime: str) -> bool:
+    return mime.startswith("text/") or mime in ("application/xhtml+xml", "application/xml", "application/json")
+
+
+@dataclass
+class FetchedBody:
+    """Result of a streaming fetch: text bodies are held in memory, binary bodies spooled to disk."""
+
+    url: str
+    status_code: int
+    content_type: str = ""
+    size: int = 0
+    truncated: bool = False
+    text: str | None = None
+    spool: IO[bytes] | None = None
+    content_hash: str = ""  # sha256 of the bytes read
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200 and not (self.truncated and self.is_binary)
+
+    @property
+    def is_pdf(self) -> bool:
+        return self.content_type == "application/pdf"
+
+    @property
+    def is_image(self) -> bool:
+        return self.content_type.startswith("image/")
+
+    @property
+    def is_binary(self) -> bool:
+        return not is_textual_type(self.content_type)
+
+    def read_bytes(self) -> bytes:
+        if self.spool is None:
+            return (self.text or "").encode("utf-8")
+        self.spool.seek(0)
+        return self.spool.read()
+
+    def close(self) -> None:
+        if self.spool is not None:
+            try:
+                self.spool.close()
+            finally:
+                self.spool = None
+
+
+def stream_fetch(
+    url: str,
+    user_agent: str,
+    timeout: float | None = None,
+    max_bytes: int | None = None,
+    client: httpx.Client | None = None,
+    deadline: Deadline | None = None,
+) -> FetchedBody:
+    """
+    Stream a URL, sniffing the content type from the first chunk and enforcing a size cap.
+
+    Textual bodies are decoded once in memory; PDFs, images and other binaries go
+    to an anonymous temp file so large documents never sit in RAM twice. When the
+    cap is hit, reading stops and `truncated` is set; truncated binaries are not
+    `ok` because a partial PDF/image cannot be parsed. If `deadline` runs out
+    mid-body, reading stops the same way and `timed_out` is set.
+    """
+    if timeout is None:
+        timeout = float(os.getenv("CRAWL_HTTP_TIMEOUT", "20"))
+    if deadline is not None:
+        timeout = deadline.timeout(timeout, "fetch")
+    if max_bytes is None:
+        max_bytes = get_max_body_bytes()
+    http = client or httpx
+    # Known aliases go straight to their redirect target; new redirects are learned for next time
+    fetch_url = resolve_url(url)
+    with http.stream("GET", fetch_url, headers={"User-Agent": user_agent}, timeout=timeout, follow_redirects=True) as resp:
+        learn_redirects(fetch_url, resp)
+        body = FetchedBody(url=str(resp.url), status_code=resp.status_code)
+        if resp.status_code != 200:
+            return body
+        declared = resp.headers.get("content-type")
+        try:
+            declared_length = int(resp.headers.get("content-length") or 0)
+        except ValueError:
+            declared_length = 0
+        if max_bytes and declared_length > max_bytes:
+            body.content_type = sniff_content_type(b"", declared, url)
+            body.size = declared_length
+            body.truncated = True
+            logger.warning(f"body too large bytes={declared_length} cap={max_bytes} url={url}")
+            return body
+
+        chunks: list[bytes] = []
+        digest = hashlib.sha256()
+        for chunk in resp.iter_bytes():
+            if not chunk:
+                continue
+            if not body.content_type:
+                body.content_type = sniff_content_type(chunk, declared, url)
+                if body.is_binary:
+                    body.spool = tempfile.TemporaryFile()
+            if max_bytes and body.size + len(chunk) > max_bytes:
+                chunk = chunk[: max_bytes - body.size]
+                body.truncated = True
+            body.size += len(chunk)
+            digest.update(chunk)
+            if body.spool is not None:
+                body.spool.write(chunk)
+            else:
+                chunks.append(chunk)
+            if body.truncated:
+                logger.warning(f"body truncated at cap={max_bytes} url={url}")
+                break
+            if deadline is not None and deadline.expired:
+                body.truncated = body.timed_out = True
+                logger.warning(f"body truncated at deadline bytes={body.size} url={url}")
+                break
+        if not body.content_type:
+            body.content_type = sniff_content_type(b"", declared, url)
+        body.content_hash = digest.hexdigest()
+        if body.spool is None:
+            body.text = b"".join(chunks).decode(resp.encoding or "utf-8", errors="replace")
+        else:
+            body.spool.seek(0)
+    return body
+
+
 def firecrawl_fetch(url: str) -> Dict[str, Any] | None:
     api_key = os.getenv("FIRECRAWL_API_KEY", "").strip()
     if not api_key:
@@ -107,7 +306,7 @@ def is_document_ai_configured() -> bool:
     )
 
 
-def extract_with_document_ai(buffer: bytes, mime_type: str) -> str:
+def extract_with_document_ai(buffer: bytes, mime_type: str, timeout: float | None = None) -> str:
     from google.cloud import documentai  # type: ignore
 
     project_id = os.getenv("GOOGLE_CLOUD_PROJECT", "").strip()
@@ -126,7 +325,7 @@ def extract_with_document_ai(buffer: bytes, mime_type: str) -> str:
         name = client.processor_path(project_id, location, processor_id)
     raw_document = documentai.RawDocument(content=buffer, mime_type=mime_type)
     request = documentai.ProcessRequest(name=name, raw_document=raw_document)
-    result = client.process_document(request=request)
+    result = client.process_document(request=request, timeout=timeout)
     document = result.document
     return document.text if document and document.text else ""
 
@@ -135,24 +334,90 @@ def is_vision_configured() -> bool:
     return bool(os.getenv("GOOGLE_CLOUD_PROJECT"))
 
 
-def extract_with_vision(buffer: bytes) -> str:
+def extract_with_vision(buffer: bytes, timeout: float | None = None) -> str:
     from google.cloud import vision  # type: ignore
 
     client = vision.ImageAnnotatorClient()
     image = vision.Image(content=buffer)
-    response = client.document_text_detection(image=image)
+    response = client.document_text_detection(image=image, timeout=timeout)
     annotation = response.full_text_annotation
     return annotation.text if annotation and annotation.text else ""
 
 
-def fetch_and_extract(url: str, threshold: int = 500, ocr_strategy: str = "ocr_only") -> Dict[str, Any]:
+def extract_with_unstructured(buffer: bytes, mime_type: str, strategy: str = "ocr_only") -> str:
+    # Lazy import unstructured only when needed; partition from bytes so the URL is not re-downloaded
+    from unstructured.partition.auto import partition  # type: ignore
+
+    elements = partition(file=io.BytesIO(buffer), content_type=mime_type, strategy=strategy)  # type: ignore[arg-type]
+    return "\n".join(str(el) for el in elements)
+
+
+def ocr_buffer(
+    buffer: bytes,
+    mime_type: str,
+    strategy: str = "ocr_only",
+    prefer_google: bool = True,
+    deadline: Deadline | None = None,
+) -> tuple[str, str | None]:
+    """
+    OCR already-downloaded bytes with the configured engines, in preference order.
+
+    Returns (text, engine); engine is None when nothing produced text. Remote
+    engines get their request timeout from `deadline`; no engine starts after it.
+    """
+    deadline = deadline or UNBOUNDED
+    ocr_timeout = float(os.getenv("CRAWL_OCR_TIMEOUT", "120"))
+    engines: list[tuple[str, Any]] = []
+    local_backend = os.getenv("CRAWL_OCR_BACKEND", "").strip()
+    backend = get_ocr_backend(local_backend) if local_backend else None
+    if backend is not None:
+        # An explicit local backend (e.g. tesseract) runs first and works offline
+        engines.append((local_backend, lambda: backend(buffer, mime_type)))
+    if mime_type == "application/pdf" and is_document_ai_configured():
+        engines.append(
+            ("google_document_ai", lambda: extract_with_document_ai(buffer, mime_type, deadline.timeout(ocr_timeout, "ocr")))
+        )
+    if mime_type.startswith("image/") and is_vision_configured():
+        engines.append(("google_vision", lambda: extract_with_vision(buffer, deadline.timeout(ocr_timeout, "ocr"))))
+    local = (f"unstructured:{strategy}", lambda: extract_with_unstructured(buffer, mime_type, strategy))
+    if prefer_google:
+        engines.append(local)
+    else:
+        engines.insert(0, local)
+    for name, run in engines:
+        deadline.check("ocr")
+        try:
+            text = run()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"ocr engine failed engine={name} err={e}")
+            continue
+        if text:
+            return text, name
+    return "", None
+
+
+def fetch_and_extract(
+    url: str,
+    threshold: int = 500,
+    ocr_strategy: str = "ocr_only",
+    deadline: Deadline | None = None,
+) -> Dict[str, Any]:
     """
     Best-effort fetch and extract text and metadata from a URL.
 
     Notes
-    - Heavy dependencies (trafilatura, playwright, unstructured) are imported lazily.
-    - OCR attempted for PDFs/images via Unstructured when primary extraction is insufficient.
-    - Returns a dictionary with keys: text, meta, source.
+    - Heavy dependencies (trafilatura, playwright, unstructured, pypdf) are imported lazily.
+    - The body is streamed (see `stream_fetch`); its content type is sniffed from the
+      first chunk so PDF/image handling is decided before any extraction runs.
+    - PDFs use the local text layer first; OCR runs only on pages without one, over
+      the bytes already downloaded.
+    - Results are cached across processes by (canonical url, body sha256); an unchanged document
+      skips extraction, rendering and OCR and is returned with `meta.cache_hit`.
+    - `deadline` bounds robots, fetch, render and OCR. When it runs out, whatever was
+      extracted so far is returned with `meta.timed_out` (and never cached).
+    - Returns a dictionary with keys: text, meta, source. `meta.timings` holds per-stage seconds.
     """
     if os.getenv("CRAWL_USE_FIRECRAWL", "0") in ("1", "true", "True"):
         firecrawl = firecrawl_fetch(url)
@@ -165,118 +430,142 @@ def fetch_and_extract(url: str, threshold: int = 500, ocr_strategy: str = "ocr_o
     except Exception as e:  # pragma: no cover - rare: trafilatura unavailable
         raise ValueError(f"Crawl failed (missing trafilatura): {e}")
 
-    # Robots and delay
-    ua = choose_user_agent()
-    if not respect_robots(url, ua):
-        raise PermissionError("Blocked by robots.txt")
-    polite_delay(url)
+    deadline = deadline or UNBOUNDED
+    timings: Dict[str, float] = {}
+
+    def _record(stage: str, started: float) -> None:
+        timings[stage] = round(timings.get(stage, 0.0) + (time.monotonic() - started), 4)
 
     prefer_google_ocr = os.getenv("CRAWL_PREFER_GOOGLE_OCR", "1") in ("1", "true", "True")
 
-    # Primary fetch with explicit UA
-    downloaded = None
-    binary = None
+    def _ocr_whole(buffer: bytes, mime_type: str) -> tuple[str, str | None]:
+        # A whole image/document is a single page: route it through the pool for the cache and deadline
+        started = time.monotonic()
+        results = ocr_pages(
+            [(1, buffer)],
+            lambda b: ocr_buffer(b, mime_type, ocr_strategy, prefer_google_ocr, deadline),
+            cache=get_ocr_cache(),
+            deadline=deadline,
+        )
+        _record("ocr", started)
+        return results.get(1, ("", None))
+
+    ua = choose_user_agent()
+    body: FetchedBody | None = None
     text = None
     ocr_engine = None
-    content_type = None
+    pdf_pages: list[PdfPage] | None = None
     try:
-        timeout = float(os.getenv("CRAWL_HTTP_TIMEOUT", "20"))
-        resp = httpx.get(url, headers={"User-Agent": ua}, timeout=timeout, follow_redirects=True)
-        if resp.status_code == 200:
-            downloaded = resp.text
-            binary = resp.content
-            content_type = resp.headers.get("content-type")
-            text = trafilatura.extract(downloaded, include_tables=True, include_links=True)
-        else:
-            logger.warning(f"http status={resp.status_code} url={url}")
-    except Exception as e:
-        text = None
-        downloaded = None
-
-    # If configured, prefer Google OCR for PDFs/images before other fallbacks
-    if prefer_google_ocr and binary and is_pdf_like and is_document_ai_configured():
-        try:
-            mime_type = content_type or "application/pdf"
-            ocr_text = extract_with_document_ai(binary, mime_type)
-            if ocr_text:
-                text = ocr_text
-                ocr_engine = "google_document_ai"
-        except Exception as e:
-            logger.warning(f"document ai failed url={url} err={e}")
-    if prefer_google_ocr and binary and url.lower().endswith((".jpg", ".jpeg", ".png")) and is_vision_configured():
+        # Robots and delay
+        started = time.monotonic()
+        if not respect_robots(url, ua, deadline):
+            raise PermissionError("Blocked by robots.txt")
+        polite_delay(url, deadline)
+        _record("robots", started)
+
+        # Primary fetch with explicit UA; content type is known before extraction starts
+        started = time.monotonic()
         try:
-            ocr_text = extract_with_vision(binary)
-            if ocr_text:
-                text = ocr_text
-                ocr_engine = "google_vision"
+            body = stream_fetch(url, ua, deadline=deadline)
+            if body.status_code != 200:
+                logger.warning(f"http status={body.status_code} url={url}")
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            logger.warning(f"vision ocr failed url={url} err={e}")
+            logger.warning(f"fetch failed url={url} err={e}")
+            body = None
+        _record("fetch", started)
+    except DeadlineExceeded as e:
+        logger.warning(f"deadline exceeded url={url} stage={e.stage}")
+
+    cache = get_default_extraction_cache()
+    cache_key = body.content_hash if body is not None and body.ok and not body.timed_out else ""
+    if cache is not None and cache_key:
+        cached = cache.get(canonical_url(url), cache_key)
+        if cached is not None:
+            body.close()  # type: ignore[union-attr]
+            meta = dict(cached.get("meta") or {})
+            meta["cache_hit"] = True
+            meta["timings"] = timings
+            return {"text": cached.get("text", ""), "meta": meta, "source": cached.get("source", url)}
 
-    # Fallbacks when content is too short or likely PDF/image
-    needs_fallback = not text or len(text or "") < threshold
-    is_pdf_like = url.lower().endswith((".pdf", ".jpg", ".jpeg", ".png"))
-    # Also detect by content-type when available in headers
     try:
-        if downloaded is None:
-            ct_resp = None
-        else:
-            ct_resp = None  # already have body; skip HEAD
-    except Exception:
-        ct_resp = None
+        content_type = body.content_type if body is not None and body.content_type else sniff_content_type(b"", None, url)
+        is_pdf = content_type == "application/pdf"
+        is_image = content_type.startswith("image/")
+        usable = body is not None and body.ok and not deadline.expired
+        # A binary with no bytes read (e.g. an empty 200 for a .pdf URL, typed by its suffix) has nothing to extract
+        spool = body.spool if body is not None and body.size > 0 else None
 
-    if needs_fallback:
-        if is_pdf_like:
-            if binary and is_document_ai_configured():
-                try:
-                    mime_type = content_type or "application/pdf"
-                    text = extract_with_document_ai(binary, mime_type)
-                    if text:
-                        ocr_engine = "google_document_ai"
-                except Exception as e:
-                    logger.warning(f"document ai failed url={url} err={e}")
-            if not text and binary and is_vision_configured() and url.lower().endswith((".jpg", ".jpeg", ".png")):
-                try:
-                    text = extract_with_vision(binary)
-                    if text:
-                        ocr_engine = "google_vision"
-                except Exception as e:
-                    logger.warning(f"vision ocr failed url={url} err={e}")
-            try:
-                # Lazy import unstructured only when needed
-                from unstructured.partition.auto import partition  # type: ignore
-
-                elements = partition(url=url, strategy=ocr_strategy)  # type: ignore[arg-type]
-                text = "\n".join(str(el) for el in elements)
-                if text and not ocr_engine:
-                    ocr_engine = f"unstructured:{ocr_strategy}"
-            except Exception:
-                # As a last resort, leave text as-is
-                pass
-        else:
-            # Try JS rendering with Playwright
-            try:
-                from playwright.sync_api import sync_playwright  # type: ignore
-
-                with sync_playwright() as p:
-                    browser = p.chromium.launch(headless=True)
-                    context = browser.new_context(user_agent=ua)
-                    page = context.new_page()
-                    page.goto(url, wait_until="networkidle")
-                    html = page.content()
-                    try:
-                        text = trafilatura.extract(html, include_tables=True, include_links=True)
-                    finally:
-                        browser.close()
-            except Exception:
-                # Keep best-effort text if any
-                pass
+        if is_pdf and usable and spool is not None:
+
+            def _ocr_page(page_bytes: bytes) -> tuple[str, str | None]:
+                return ocr_buffer(page_bytes, "application/pdf", ocr_strategy, prefer_google_ocr, deadline)
 
+            try:
+                text, pdf_pages = extract_pdf_text(spool, ocr_page=_ocr_page, timings=timings, deadline=deadline)
+                engines = sorted({p.source for p in pdf_pages if p.source not in ("text_layer", "none")})
+                if engines:
+                    ocr_engine = ",".join(engines)
+            except Exception as e:
+                # Unparseable or encrypted PDF: OCR the whole document from the downloaded bytes
+                logger.warning(f"pdf text layer unavailable url={url} err={e}")
+                text, ocr_engine = _ocr_whole(body.read_bytes(), content_type)  # type: ignore[union-attr]
+        elif is_image and usable and spool is not None:
+            text, ocr_engine = _ocr_whole(body.read_bytes(), content_type)  # type: ignore[union-attr]
+        elif not (is_pdf or is_image):
+            if body is not None and body.status_code == 200 and body.text is not None:
+                started = time.monotonic()
+                text = trafilatura.extract(body.text, include_tables=True, include_links=True)
+                _record("html_extract", started)
+            # Fallback to JS rendering when content is too short (never for oversized bodies or past the deadline)
+            needs_fallback = not text or len(text or "") < threshold
+            if needs_fallback and not (body is not None and body.truncated) and not deadline.expired:
+                started = time.monotonic()
+                try:
+                    from playwright.sync_api import sync_playwright  # type: ignore
+
+                    render_timeout = deadline.timeout(float(os.getenv("CRAWL_RENDER_TIMEOUT", "30")), "render")
+                    with sync_playwright() as p:
+                        browser = p.chromium.launch(headless=True, timeout=render_timeout * 1000)
+                        try:
+                            context = browser.new_context(user_agent=ua)
+                            page = context.new_page()
+                            page.goto(url, wait_until="networkidle", timeout=deadline.timeout(render_timeout, "render") * 1000)
+                            html = page.content()
+                            text = trafilatura.extract(html, include_tables=True, include_links=True)
+                        finally:
+                            browser.close()
+                except Exception:
+                    # Keep best-effort text if any
+                    pass
+                _record("render", started)
+    finally:
+        if body is not None:
+            body.close()
+
+    timed_out = deadline.expired or (body is not None and body.timed_out)
     try:
         meta = trafilatura.metadata_from_text(text or "")
     except Exception:
         meta = {}
+    meta = dict(meta or {})
     if ocr_engine:
-        meta = dict(meta or {})
         meta["ocr_engine"] = ocr_engine
-
-    return {"text": text or "", "meta": meta or {}, "source": url}
+    if body is not None:
+        meta["content_type"] = body.content_type
+        meta["bytes"] = body.size
+        if body.truncated:
+            meta["truncated"] = True
+    if pdf_pages is not None:
+        meta["pdf_pages"] = len(pdf_pages)
+        meta["ocr_pages"] = [p.number for p in pdf_pages if p.source not in ("text_layer", "none")]
+        meta["page_anchors"] = page_anchors(pdf_pages)
+    if timed_out:
+        meta["timed_out"] = True
+    meta["timings"] = timings
+
+    result = {"text": text or "", "meta": meta, "source": url}
+    if cache is not None and cache_key and text and not timed_out:
+        cache.put(canonical_url(url), cache_key, result)
+    return result
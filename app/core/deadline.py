@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a stage starts (or continues) after its time budget ran out."""
+
+    def __init__(self, stage: str = ""):
+        super().__init__(f"deadline exceeded{f' during {stage}' if stage else ''}")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    A monotonic-clock budget passed down through crawl stages.
+
+    A single instance can be shared by threads working on the same node; each
+    stage derives its I/O timeout from `timeout()` so no call outlives the budget.
+    `Deadline(None)` is unbounded and never expires.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, _expires_at: Optional[float] = None):
+        if _expires_at is not None:
+            self.expires_at: Optional[float] = _expires_at
+        elif seconds is None:
+            self.expires_at = None
+        else:
+            self.expires_at = time.monotonic() + max(0.0, float(seconds))
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self, stage: str = "") -> None:
+        if self.expired:
+            raise DeadlineExceeded(stage)
+
+    def timeout(self, default: float, stage: str = "") -> float:
+        """Timeout for the next blocking call: `default` capped by the remaining budget."""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if remaining <= 0:
+            raise DeadlineExceeded(stage)
+        return min(default, remaining)
+
+    def child(self, seconds: Optional[float]) -> "Deadline":
+        """A sub-budget that never outlives this one (e.g. per URL within a node budget)."""
+        if seconds is None:
+            return Deadline(_expires_at=self.expires_at) if self.expires_at is not None else Deadline(None)
+        candidate = time.monotonic() + max(0.0, float(seconds))
+        if self.expires_at is not None:
+            candidate = min(candidate, self.expires_at)
+        return Deadline(_expires_at=candidate)
+
+
+UNBOUNDED = Deadline(None)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from .logger import setup_logger
+from .paths import project_root
+
+logger = setup_logger("extract_cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extract_cache (
+    url TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (url, content_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_extract_cache_last_access ON extract_cache (last_access);
+"""
+
+
+class ExtractionCache:
+    """
+    Persistent `fetch_and_extract` results keyed by (url, sha256 of the body).
+
+    Backed by SQLite in WAL mode so several runner/Celery processes share it.
+    Entries older than `ttl_seconds` are ignored and purged; beyond `max_entries`
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 5000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, url: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Cached result, or None on a miss; a cache error (e.g. a locked DB) counts as a miss."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT result, created_at FROM extract_cache WHERE url = ? AND content_hash = ?",
+                    (url, content_hash),
+                ).fetchone()
+                if row is None:
+                    return None
+                if self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM extract_cache WHERE url = ? AND content_hash = ?", (url, content_hash))
+                    return None
+                conn.execute(
+                    "UPDATE extract_cache SET last_access = ? WHERE url = ? AND content_hash = ?",
+                    (now, url, content_hash),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"extract cache lookup failed url={url} err={e}")
+            return None
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return None
+
+    def put(self, url: str, content_hash: str, result: Dict[str, Any]) -> None:
+        """Best effort: a result that cannot be stored is logged and dropped."""
+        now = time.time()
+        try:
+            payload = json.dumps(result, ensure_ascii=False, default=str)
+        except Exception as e:
+            logger.warning(f"extract cache skip (unserializable) url={url} err={e}")
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO extract_cache (url, content_hash, result, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (url, content_hash, payload, now, now),
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"extract cache store failed url={url} err={e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM extract_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        if self.max_entries:
+            conn.execute(
+                "DELETE FROM extract_cache WHERE rowid IN ("
+                " SELECT rowid FROM extract_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM extract_cache").fetchone()[0])
+
+
+_DEFAULT_CACHE: Optional[ExtractionCache] = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def get_default_extraction_cache() -> Optional[ExtractionCache]:
+    """The process-wide cache (rebuilt only when its path or limits change), or None when disabled."""
+    if os.getenv("EXTRACT_CACHE_ENABLED", "1") in ("0", "false", "False"):
+        return None
+    override = os.getenv("EXTRACT_CACHE_PATH")
+    path = Path(override) if override else project_root() / ".cache" / "extract_cache.db"
+    try:
+        ttl = float(os.getenv("EXTRACT_CACHE_TTL_S", str(7 * 24 * 3600)))
+        max_entries = int(os.getenv("EXTRACT_CACHE_MAX_ENTRIES", "5000"))
+    except Exception:
+        ttl, max_entries = 7 * 24 * 3600, 5000
+    global _DEFAULT_CACHE
+    with _DEFAULT_CACHE_LOCK:
+        cache = _DEFAULT_CACHE
+        if cache is None or (cache.db_path, cache.ttl_seconds, cache.max_entries) != (path, ttl, max_entries):
+            try:
+                _DEFAULT_CACHE = ExtractionCache(path, ttl_seconds=ttl, max_entries=max_entries)
+            except Exception as e:
+                logger.warning(f"extract cache unavailable path={path} err={e}")
+                return None
+        return _DEFAULT_CACHE
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from .cross_validation import url_authority
+from .urlnorm import canonical_url
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"the", "and", "for", "of", "in", "on", "or", "to", "a", "an", "site", "state", "city", "county"}
+
+
+def _tokens(text: str) -> set[str]:
+    return {t for t in _TOKEN_RE.findall((text or "").lower()) if len(t) > 2 and t not in _STOPWORDS}
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+@dataclass
+class CrawlBudget:
+    """Per-jurisdiction fetch/byte budget with an early stop once enough authoritative sources are in."""
+
+    max_fetches: int = 12
+    max_bytes: int = 20 * 1024 * 1024
+    target_high_authority: int = 4
+    high_authority: float = 0.85
+    fetches: int = 0
+    bytes: int = 0
+    high_authority_docs: int = 0
+    skipped_low_value: int = 0
+    skipped_budget: int = 0
+    stop_reason: Optional[str] = None
+    # Fetches handed out but not yet recorded; they count against the budget until they finish
+    pending: int = 0
+    pending_high: int = 0
+
+    @classmethod
+    def from_env(cls) -> "CrawlBudget":
+        return cls(
+            max_fetches=int(_env_number("CRAWL_BUDGET_MAX_FETCHES", 12)),
+            max_bytes=int(_env_number("CRAWL_BUDGET_MAX_BYTES", 20 * 1024 * 1024)),
+            target_high_authority=int(_env_number("CRAWL_TARGET_HIGH_AUTHORITY", 4)),
+            high_authority=_env_number("CRAWL_HIGH_AUTHORITY", 0.85),
+        )
+
+    def _limit_reason(self, extra_fetches: int = 0, extra_high: int = 0) -> Optional[str]:
+        if self.target_high_authority and self.high_authority_docs + extra_high >= self.target_high_authority:
+            return "enough_high_authority"
+        if self.max_fetches and self.fetches + extra_fetches >= self.max_fetches:
+            return "max_fetches"
+        if self.max_bytes and self.bytes >= self.max_bytes:
+            return "max_bytes"
+        return None
+
+    def is_open(self) -> bool:
+        """False once a limit has been reached by completed fetches (permanent)."""
+        if self.stop_reason is None:
+            self.stop_reason = self._limit_reason()
+        return self.stop_reason is None
+
+    def has_room(self) -> bool:
+        """Open, and not already filled by fetches still in flight (which may yet fail and free room)."""
+        return self.is_open() and self._limit_reason(self.pending, self.pending_high) is None
+
+    def reserve(self, authority: float) -> None:
+        self.pending += 1
+        if authority >= self.high_authority:
+            self.pending_high += 1
+
+    def record(self, size: int, authority: float, useful: bool) -> None:
+        self.pending = max(0, self.pending - 1)
+        if authority >= self.high_authority:
+            self.pending_high = max(0, self.pending_high - 1)
+        self.fetches += 1
+        self.bytes += max(0, size)
+        if useful and authority >= self.high_authority:
+            self.high_authority_docs += 1
+
+    def summary(self) -> Dict:
+        self.is_open()  # settles stop_reason if a limit was reached by the last fetch
+        return {
+            "fetches": self.fetches,
+            "max_fetches": self.max_fetches,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "high_authority_docs": self.high_authority_docs,
+            "skipped_low_value": self.skipped_low_value,
+            "skipped_budget": self.skipped_budget,
+            "stop_reason": self.stop_reason,
+        }
+
+
+@dataclass
+class Candidate:
+    url: str
+    key: str
+    authority: float
+    relevance: float = 0.0
+    tags: List[str] = field(default_factory=list)
+    score: float = 0.0
+
+
+class CrawlFrontier:
+    """
+    Candidate URLs for one or more jurisdictions, handed out best first.
+
+    score = authority (cross_validation.url_authority) weighted with snippet/title
+    relevance to the query that found the URL and host novelty (hosts already
+    fetched rank lower). Candidates below `min_authority` are never handed out.
+    A candidate is fetched while at least one of its jurisdictions has budget
+    left; its cost is charged to every such jurisdiction.
+    """
+
+    WEIGHTS = (0.6, 0.25, 0.15)
+
+    def __init__(self, jurisdictions: Iterable[str], min_authority: Optional[float] = None):
+        self.budgets: Dict[str, CrawlBudget] = {j: CrawlBudget.from_env() for j in jurisdictions}
+        self.min_authority = _env_number("CRAWL_MIN_AUTHORITY", 0.4) if min_authority is None else min_authority
+        self._candidates: Dict[str, Candidate] = {}
+        self._host_fetches: Dict[str, int] = {}
+
+    def add(self, url: str, tags: Iterable[str], query: str = "", title: str = "", snippet: str = "") -> None:
+        key = canonical_url(url)
+        if not key:
+            return
+        wanted = _tokens(query)
+        relevance = len(wanted & _tokens(f"{title} {snippet} {url}")) / len(wanted) if wanted else 0.0
+        candidate = self._candidates.get(key)
+        if candidate is None:
+            candidate = Candidate(url=url, key=key, authority=url_authority(url))
+            self._candidates[key] = candidate
+        candidate.relevance = max(candidate.relevance, relevance)
+        for tag in tags:
+            if tag not in candidate.tags:
+                candidate.tags.append(tag)
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def _score(self, c: Candidate) -> float:
+        host = urlparse(c.key).netloc
+        novelty = 1.0 / (1 + self._host_fetches.get(host, 0))
+        wa, wr, wn = self.WEIGHTS
+        return wa * c.authority + wr * c.relevance + wn * novelty
+
+    def next(self) -> Optional[Candidate]:
+        """
+        Best remaining candidate some jurisdiction has room for, or None.
+
+        Candidates whose budgets are only full because of fetches still in flight
+        stay queued (those fetches may fail); callers retry after recording results.
+        """
+        for best in sorted(self._candidates.values(), key=self._score, reverse=True):
+            if best.authority < self.min_authority:
+                del self._candidates[best.key]
+                for tag in best.tags:
+                    if tag in self.budgets:
+                        self.budgets[tag].skipped_low_value += 1
+                continue
+            if not any(t not in self.budgets or self.budgets[t].is_open() for t in best.tags):
+                del self._candidates[best.key]
+                for tag in best.tags:
+                    self.budgets[tag].skipped_budget += 1
+                continue
+            room = [t for t in best.tags if t not in self.budgets or self.budgets[t].has_room()]
+            if not room:
+                continue
+            del self._candidates[best.key]
+            best.tags = room
+            best.score = round(self._score(best), 4)
+            for tag in room:
+                if tag in self.budgets:
+                    self.budgets[tag].reserve(best.authority)
+            return best
+        return None
+
+    def record(self, candidate: Candidate, size: int, useful: bool = True) -> None:
+        host = urlparse(candidate.key).netloc
+        self._host_fetches[host] = self._host_fetches.get(host, 0) + 1
+        for tag in candidate.tags:
+            if tag in self.budgets:
+                self.budgets[tag].record(size, candidate.authority, useful)
+
+    def summary(self) -> Dict[str, Dict]:
+        # Whatever is still queued was never needed (or never reachable within budget)
+        for c in self._candidates.values():
+            for tag in c.tags:
+                if tag in self.budgets:
+                    if c.authority < self.min_authority:
+                        self.budgets[tag].skipped_low_value += 1
+                    else:
+                        self.budgets[tag].skipped_budget += 1
+        self._candidates.clear()
+        return {j: b.summary() for j, b in self.budgets.items()}
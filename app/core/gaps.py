@@ -1,8 +1,18 @@
 from __future__ import annotations
 
 import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .logger import setup_logger
+from .paths import project_root
+
+logger = setup_logger("gaps")
 
 # Minimal required fields placeholder to estimate gaps without the full schema
 REQUIRED_FIELDS: List[str] = [
@@ -29,3 +39,169 @@ def estimate_gaps(base_dir: Path, jurisdiction_path: str) -> int:
         if field not in data or data[field] in (None, ""):
             missing += 1
     return missing
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gap_scores (
+    file_path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    gaps INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gap_invalidations (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_path TEXT NOT NULL,
+    invalidated_at REAL NOT NULL
+);
+"""
+
+
+def _file_key(file_path: Path) -> str:
+    return str(Path(file_path).resolve())
+
+
+class GapCache:
+    """
+    Gap scores per jurisdiction file, reused while the file's mtime and size are
+    unchanged, so a score costs a stat instead of a read and parse.
+
+    Writers of jurisdiction files call `invalidate`; each call is also logged
+    with a sequence number so queues can rescore just the affected tasks
+    (`invalidations_since`) instead of re-checking every queued task.
+    """
+
+    def __init__(self, db_path: Path, keep_invalidations_s: float = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.keep_invalidations_s = keep_invalidations_s
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def score_many(self, base_dir: Path, jurisdiction_paths: Iterable[str]) -> Dict[str, int]:
+        """Gap scores for a batch of files over one connection: a stat per file, a read and parse only for changed ones."""
+        scores: Dict[str, int] = {}
+        stats: Dict[str, Tuple[str, os.stat_result]] = {}
+        for path in dict.fromkeys(jurisdiction_paths):
+            file_path = Path(base_dir) / path
+            try:
+                stats[path] = (_file_key(file_path), file_path.stat())
+            except OSError:
+                scores[path] = estimate_gaps(Path(base_dir), path)
+        if not stats:
+            return scores
+        keys = [key for key, _ in stats.values()]
+        with self._connect() as conn:
+            cached = {}
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                marks = ", ".join("?" for _ in chunk)
+                for key, mtime_ns, size, gaps in conn.execute(
+                    f"SELECT file_path, mtime_ns, size, gaps FROM gap_scores WHERE file_path IN ({marks})", chunk
+                ):
+                    cached[key] = (mtime_ns, size, gaps)
+            writes = []
+            for path, (key, st) in stats.items():
+                row = cached.get(key)
+                if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+                    scores[path] = int(row[2])
+                    continue
+                scores[path] = estimate_gaps(Path(base_dir), path)
+                writes.append((key, st.st_mtime_ns, st.st_size, scores[path]))
+            conn.executemany(
+                "INSERT OR REPLACE INTO gap_scores (file_path, mtime_ns, size, gaps) VALUES (?, ?, ?, ?)", writes
+            )
+        return scores
+
+    def invalidate(self, file_path: Path) -> None:
+        key = _file_key(file_path)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM gap_scores WHERE file_path = ?", (key,))
+            conn.execute("INSERT INTO gap_invalidations (file_path, invalidated_at) VALUES (?, ?)", (key, now))
+            conn.execute("DELETE FROM gap_invalidations WHERE invalidated_at < ?", (now - self.keep_invalidations_s,))
+
+    def invalidations_since(self, seq: int) -> Tuple[List[str], int]:
+        """Files invalidated after `seq`, and the latest sequence number to pass next time."""
+        with self._connect() as conn:
+            last = int(conn.execute("SELECT COALESCE(MAX(seq), 0) FROM gap_invalidations").fetchone()[0])
+            if last < seq:
+                # The cache file was recreated and its sequence restarted: everything logged is new
+                seq = 0
+            rows = conn.execute(
+                "SELECT file_path FROM gap_invalidations WHERE seq > ? AND seq <= ? ORDER BY seq", (int(seq), last)
+            ).fetchall()
+        return list(dict.fromkeys(r[0] for r in rows)), last
+
+
+_DEFAULT_CACHE: Optional[GapCache] = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def get_gap_cache() -> Optional[GapCache]:
+    if os.getenv("GAP_CACHE_ENABLED", "1") in ("0", "false", "False"):
+        return None
+    override = os.getenv("GAP_CACHE_PATH")
+    path = Path(override) if override else project_root() / ".cache" / "gaps.db"
+    global _DEFAULT_CACHE
+    with _DEFAULT_CACHE_LOCK:
+        if _DEFAULT_CACHE is None or _DEFAULT_CACHE.db_path != path:
+            try:
+                _DEFAULT_CACHE = GapCache(path)
+            except Exception as e:
+                logger.warning(f"gap cache disabled path={path} err={e}")
+                return None
+        return _DEFAULT_CACHE
+
+
+def gap_scores(base_dir: Path, jurisdiction_paths: Iterable[str]) -> Dict[str, int]:
+    """`estimate_gaps` for many paths, served from the gap cache (one connection per batch) when files are unchanged."""
+    paths = list(dict.fromkeys(jurisdiction_paths))
+    cache = get_gap_cache()
+    if cache is not None:
+        try:
+            return cache.score_many(base_dir, paths)
+        except Exception as e:
+            logger.warning(f"gap cache batch lookup failed paths={len(paths)} err={e}")
+    return {p: estimate_gaps(base_dir, p) for p in paths}
+
+
+def invalidate_gaps(jurisdiction_file: Path) -> None:
+    """Hook for writers of jurisdiction files (merge, patch application): drop the cached score."""
+    cache = get_gap_cache()
+    if cache is None:
+        return
+    try:
+        cache.invalidate(jurisdiction_file)
+    except Exception as e:
+        logger.warning(f"gap cache invalidation failed path={jurisdiction_file} err={e}")
+
+
+def changed_since(seq: int, base_dir: Path) -> Tuple[List[str], int]:
+    """Jurisdiction paths (relative to `base_dir`) invalidated after `seq`, plus the new sequence."""
+    cache = get_gap_cache()
+    if cache is None:
+        return [], seq
+    try:
+        files, last = cache.invalidations_since(seq)
+    except Exception as e:
+        logger.warning(f"gap invalidation scan failed err={e}")
+        return [], seq
+    base = Path(base_dir).resolve()
+    paths: List[str] = []
+    for f in files:
+        try:
+            paths.append(Path(f).relative_to(base).as_posix())
+        except ValueError:
+            continue
+    return paths, last
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+from lxml import etree
+
+# Subtrees never worth indexing: code, styling, navigation and page chrome
+SKIP_TAGS = {
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "iframe",
+    "nav",
+    "footer",
+    "aside",
+    "form",
+    "button",
+    "select",
+}
+# Containers of the document itself: never dropped on class/role/id heuristics (a "has-sidebar" body
+# class would otherwise drop the page), and a <header> inside the last three is content, e.g. a title
+_CONTENT_ROOTS = {"html", "body", "main", "article"}
+_CONTENT_SECTIONS = {"main", "article", "section"}
+_SKIP_ROLES = {"navigation", "banner", "contentinfo", "search", "menu", "menubar"}
+_SKIP_CLASS_RE = re.compile(r"(^|[\s_-])(nav|navbar|menu|breadcrumbs?|sidebar|skip-link|cookie)($|[\s_-])", re.I)
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+_BLOCKS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd", "tr", "table",
+    "blockquote", "pre", "br", "hr", "title", "body", "figcaption", "address",
+}
+_CELLS = {"td", "th"}
+_WS_RE = re.compile(r"\s+")
+
+
+class _TextTarget:
+    """lxml parser target: receives start/data/end events in document order, no tree is built."""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self._parts: List[str] = []
+        self._prefix = ""
+        self._stack: List[Tuple[bool, bool]] = []  # per open element: (inside a skipped subtree, opens content)
+        self._skip_depth = 0
+        self._content_depth = 0
+        self._in_head = False
+        self._in_title = False
+
+    def _flush(self) -> None:
+        text = _WS_RE.sub(" ", "".join(self._parts)).strip()
+        self._parts.clear()
+        if text:
+            self.lines.append(self._prefix + text)
+        self._prefix = ""
+
+    def _skips(self, tag: str, attrib: Dict[str, str]) -> bool:
+        if tag in SKIP_TAGS:
+            return True
+        if tag == "header":
+            # Page chrome only; a header within article/section content carries its title
+            return self._content_depth == 0
+        if tag in _CONTENT_ROOTS:
+            return False
+        if (attrib.get("role") or "").lower() in _SKIP_ROLES:
+            return True
+        if "hidden" in attrib or attrib.get("aria-hidden") == "true":
+            return True
+        return bool(_SKIP_CLASS_RE.search(f"{attrib.get('class', '')} {attrib.get('id', '')}"))
+
+    def start(self, tag, attrib) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ""
+        skip = self._skip_depth > 0 or self._skips(tag, attrib)
+        content = not skip and tag in _CONTENT_SECTIONS
+        self._stack.append((skip, content))
+        if skip:
+            self._skip_depth += 1
+            return
+        if content:
+            self._content_depth += 1
+        if tag == "head":
+            self._in_head = True
+        elif tag == "title":
+            self._in_title = True
+        if tag in _HEADINGS:
+            self._flush()
+            # Blank line before each heading keeps section boundaries visible to the chunker
+            if self.lines and self.lines[-1]:
+                self.lines.append("")
+            self._prefix = "#" * _HEADINGS[tag] + " "
+        elif tag in _BLOCKS:
+            self._flush()
+            if tag == "li":
+                self._prefix = "- "
+        elif tag in _CELLS:
+            self._parts.append(" ")
+
+    def end(self, tag) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ""
+        skip, content = self._stack.pop() if self._stack else (False, False)
+        if skip:
+            self._skip_depth -= 1
+            return
+        if content:
+            self._content_depth -= 1
+        if tag == "head":
+            self._in_head = False
+        elif tag == "title":
+            self._in_title = False
+        if tag in _HEADINGS or tag in _BLOCKS:
+            self._flush()
+
+    def data(self, text: str) -> None:
+        # Only <title> contributes text from <head>
+        if self._skip_depth or (self._in_head and not self._in_title):
+            return
+        self._parts.append(text)
+
+    def comment(self, text: str) -> None:
+        return None
+
+    def close(self) -> str:
+        self._flush()
+        out: List[str] = []
+        for line in self.lines:
+            if line or (out and out[-1]):
+                out.append(line)
+        return "\n".join(out).strip()
+
+
+def html_to_text(html: Union[str, bytes], chunk_size: int = 64 * 1024, encoding: Optional[str] = None) -> str:
+    """
+    Streaming HTML -> text for indexing.
+
+    lxml's HTML parser feeds parse events straight into a target, so no element
+    tree or soup is built. Script/style/nav/footer subtrees, page-level headers
+    (and elements marked as navigation or hidden, below the body/main/article
+    containers) are dropped; headings become markdown-style
+    `#` lines preceded by a blank line so section structure survives; list items
+    get a `- ` prefix and other block elements end a line.
+    """
+    if isinstance(html, str):
+        html, encoding = html.encode("utf-8", errors="replace"), "utf-8"
+    parser = etree.HTMLParser(target=_TextTarget(), encoding=encoding, remove_comments=True)
+    try:
+        for i in range(0, len(html), chunk_size):
+            parser.feed(html[i : i + chunk_size])
+        return parser.close()
+    except etree.LxmlError:
+        return ""
+
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """
+    Split extracted text into chunks of at most ~`max_chars`, preferring section
+    boundaries (`#` heading lines from `html_to_text`), then line boundaries.
+    `max_chars` <= 0 keeps the whole text as one chunk.
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text] if text else []
+    sections: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if line.startswith("#") and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    def emit() -> None:
+        nonlocal size
+        body = "\n".join(current).strip()
+        if body:
+            chunks.append(body)
+        current.clear()
+        size = 0
+
+    for section in sections:
+        section_size = sum(len(line) + 1 for line in section)
+        if current and size + section_size > max_chars:
+            emit()
+        for line in section:
+            # Oversized sections fall back to line boundaries; a single huge line is cut hard
+            while len(line) > max_chars:
+                if current:
+                    emit()
+                chunks.append(line[:max_chars])
+                line = line[max_chars:]
+            if current and size + len(line) + 1 > max_chars:
+                emit()
+            current.append(line)
+            size += len(line) + 1
+        if section_size > max_chars:
+            # The tail of a split section is not packed together with the next heading
+            emit()
+    emit()
+    return chunks
@@ -27,11 +27,10 @@ def ingest_json_feed(feed_path: Path | None = None) -> List[Dict]:
 def enqueue_from_feed(feed_items: List[Dict]) -> int:
     qpath = project_root() / "tools" / "research_queue.json"
     tm = TaskManagerAgent(qpath)
-    added = 0
-    for item in feed_items:
-        jp = item.get("jurisdiction_path")
-        priority = int(item.get("priority") or 0)
-        if jp:
-            tm.insert_task(jp, priority)
-            added += 1
+    items = [
+        (item["jurisdiction_path"], int(item.get("priority") or 0)) for item in feed_items if item.get("jurisdiction_path")
+    ]
+    # One queue write for the whole feed; jurisdictions already pending are merged, not duplicated
+    added = tm.insert_tasks(items)
+    logger.info(f"feed enqueue items={len(items)} new={added} merged={len(items) - added}")
     return added
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .deadline import Deadline
+from .logger import setup_logger
+from .paths import project_root
+
+logger = setup_logger("ocr")
+
+# Backend: (buffer, mime_type) -> text
+OcrBackend = Callable[[bytes, str], str]
+# Page OCR: single-page buffer -> (text, engine)
+PageOcr = Callable[[bytes], Tuple[str, Optional[str]]]
+
+_BACKENDS: Dict[str, OcrBackend] = {}
+
+
+def register_backend(name: str, backend: OcrBackend) -> None:
+    """Register an OCR backend selectable via CRAWL_OCR_BACKEND (tests register offline fakes here)."""
+    _BACKENDS[name] = backend
+
+
+def get_backend(name: str) -> Optional[OcrBackend]:
+    return _BACKENDS.get(name)
+
+
+def extract_with_tesseract(buffer: bytes, mime_type: str) -> str:
+    """Local OCR with Tesseract; PDF pages are rasterized with pypdfium2 first."""
+    import pytesseract  # type: ignore
+    from PIL import Image  # type: ignore
+
+    if mime_type == "application/pdf":
+        import pypdfium2 as pdfium  # type: ignore
+
+        pdf = pdfium.PdfDocument(buffer)
+        texts = []
+        for i in range(len(pdf)):
+            image = pdf[i].render(scale=300 / 72).to_pil()
+            texts.append(pytesseract.image_to_string(image))
+        return "\n".join(t.strip() for t in texts if t.strip())
+    return pytesseract.image_to_string(Image.open(io.BytesIO(buffer))).strip()
+
+
+register_backend("tesseract", extract_with_tesseract)
+
+
+def page_hash(buffer: bytes) -> str:
+    return hashlib.sha256(buffer).hexdigest()
+
+
+class OcrCache:
+    """On-disk OCR results keyed by page content hash; one JSON file per page."""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[str]]]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return data.get("text", ""), data.get("engine")
+        except Exception:
+            return None
+
+    def put(self, key: str, text: str, engine: Optional[str]) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"text": text, "engine": engine}, ensure_ascii=False), encoding="utf-8")
+            # Atomic rename so concurrent workers never read a half-written entry
+            tmp.replace(path)
+        except Exception as e:
+            logger.warning(f"ocr cache write failed key={key} err={e}")
+
+
+def get_default_cache() -> Optional[OcrCache]:
+    if os.getenv("OCR_CACHE_ENABLED", "1") in ("0", "false", "False"):
+        return None
+    override = os.getenv("OCR_CACHE_DIR")
+    return OcrCache(Path(override) if override else project_root() / ".cache" / "ocr")
+
+
+def get_max_workers() -> int:
+    try:
+        return max(1, int(os.getenv("CRAWL_OCR_WORKERS", "4")))
+    except Exception:
+        return 4
+
+
+def ocr_pages(
+    pages: List[Tuple[int, bytes]],
+    ocr_page: PageOcr,
+    max_workers: Optional[int] = None,
+    cache: Optional[OcrCache] = None,
+    deadline: Optional[Deadline] = None,
+) -> Dict[int, Tuple[str, Optional[str]]]:
+    """
+    OCR (page_number, page_bytes) pairs concurrently through a bounded pool.
+
+    Cached pages are answered without calling `ocr_page`; only non-empty results
+    are cached so transient engine failures are retried on the next crawl.
+    Results are keyed by page number, so callers keep document order. When
+    `deadline` runs out, queued pages are cancelled and the pages finished so
+    far are returned; engine calls already running are abandoned, not awaited.
+    """
+    results: Dict[int, Tuple[str, Optional[str]]] = {}
+    pending: List[Tuple[int, bytes, str]] = []
+    for number, buffer in pages:
+        key = page_hash(buffer)
+        hit = cache.get(key) if cache is not None else None
+        if hit is not None:
+            results[number] = hit
+        else:
+            pending.append((number, buffer, key))
+    if not pending:
+        return results
+
+    def _run(item: Tuple[int, bytes, str]) -> Tuple[int, str, Tuple[str, Optional[str]]]:
+        number, buffer, key = item
+        try:
+            return number, key, ocr_page(buffer)
+        except Exception as e:
+            logger.warning(f"page ocr failed page={number} err={e}")
+            return number, key, ("", None)
+
+    workers = min(max_workers or get_max_workers(), len(pending))
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(_run, item) for item in pending]
+        done, not_done = wait(futures, timeout=deadline.remaining() if deadline is not None else None)
+        if not_done:
+            logger.warning(f"ocr deadline reached pages_done={len(done)} pages_abandoned={len(not_done)}")
+        for fut in done:
+            number, key, (text, engine) = fut.result()
+            results[number] = (text, engine)
+            if cache is not None and text:
+                cache.put(key, text, engine)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import io
+import os
+import time
+from dataclasses import dataclass
+from typing import IO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .deadline import Deadline
+from .logger import setup_logger
+from .ocr import OcrCache, get_default_cache, ocr_pages
+
+logger = setup_logger("pdf_extract")
+
+
+@dataclass
+class PdfPage:
+    number: int  # 1-based page number, used for citation anchors
+    text: str
+    has_text_layer: bool
+    source: str = "text_layer"  # text_layer | <ocr engine> | none
+
+
+def _min_page_chars() -> int:
+    try:
+        return int(os.getenv("PDF_MIN_PAGE_CHARS", "20"))
+    except Exception:
+        return 20
+
+
+def _open_reader(source: IO[bytes] | bytes):
+    # Lazy import keeps pypdf off the import path for HTML-only crawls
+    from pypdf import PdfReader  # type: ignore
+
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    stream.seek(0)
+    return PdfReader(stream)
+
+
+def iter_pdf_pages(source: IO[bytes] | bytes, min_chars: Optional[int] = None) -> Iterator[PdfPage]:
+    """
+    Yield the text layer of each page in order.
+
+    Pages are parsed one at a time from the (spooled) file object, so memory use
+    does not grow with page count. A page whose text layer is shorter than
+    `min_chars` is reported with has_text_layer=False and is a candidate for OCR.
+    """
+    threshold = _min_page_chars() if min_chars is None else min_chars
+    reader = _open_reader(source)
+    for idx, page in enumerate(reader.pages):
+        try:
+            text = page.extract_text() or ""
+        except Exception as e:
+            logger.warning(f"pdf text extraction failed page={idx + 1} err={e}")
+            text = ""
+        text = text.strip()
+        yield PdfPage(number=idx + 1, text=text, has_text_layer=len(text) >= threshold)
+
+
+def _single_page_bytes(reader, number: int) -> bytes:
+    from pypdf import PdfWriter  # type: ignore
+
+    writer = PdfWriter()
+    writer.add_page(reader.pages[number - 1])
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def page_pdf_bytes(source: IO[bytes] | bytes, number: int) -> bytes:
+    """Return a standalone single-page PDF for page `number` (1-based), for page-level OCR."""
+    return _single_page_bytes(_open_reader(source), number)
+
+
+def extract_pdf_text(
+    source: IO[bytes] | bytes,
+    ocr_page: Callable[[bytes], Tuple[str, Optional[str]]] | None = None,
+    min_chars: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    cache: Optional[OcrCache] | bool = True,
+    timings: Optional[Dict[str, float]] = None,
+    deadline: Optional[Deadline] = None,
+) -> Tuple[str, List[PdfPage]]:
+    """
+    Extract text from a PDF, using the local text layer first.
+
+    `ocr_page` receives a single-page PDF and returns (text, engine); it is called
+    only for pages without a usable text layer, concurrently through a bounded
+    pool and behind the per-page OCR cache (`cache=True` uses the default one).
+    Returns the text, pages separated by form feeds in document order, and the
+    per-page results. Wall-clock seconds for `pdf_text` and `ocr` are added to
+    `timings` when given. Past `deadline`, remaining pages are left out and
+    pending OCR is abandoned; callers check `deadline.expired` to flag the result.
+    """
+    started = time.monotonic()
+    pages: List[PdfPage] = []
+    for page in iter_pdf_pages(source, min_chars=min_chars):
+        pages.append(page)
+        if deadline is not None and deadline.expired:
+            break
+    missing = [p for p in pages if not p.has_text_layer]
+    if ocr_page is not None and missing and not (deadline is not None and deadline.expired):
+        reader = _open_reader(source)
+        buffers = [(p.number, _single_page_bytes(reader, p.number)) for p in missing]
+        if timings is not None:
+            timings["pdf_text"] = round(time.monotonic() - started, 4)
+        started = time.monotonic()
+        ocr_cache = get_default_cache() if cache is True else (cache or None)
+        results = ocr_pages(buffers, ocr_page, max_workers=max_workers, cache=ocr_cache, deadline=deadline)
+        if timings is not None:
+            timings["ocr"] = round(time.monotonic() - started, 4)
+        for page in missing:
+            ocr_text, engine = results.get(page.number, ("", None))
+            if ocr_text:
+                page.text = ocr_text.strip()
+                page.source = engine or "ocr"
+    for page in pages:
+        if not page.text:
+            page.source = "none"
+    if timings is not None and "pdf_text" not in timings:
+        timings["pdf_text"] = round(time.monotonic() - started, 4)
+    text = "\f".join(p.text for p in pages)
+    return text, pages
+
+
+def page_anchors(pages: List[PdfPage]) -> List[dict]:
+    """Character spans of each page within the text returned by `extract_pdf_text`."""
+    anchors: List[dict] = []
+    offset = 0
+    for page in pages:
+        end = offset + len(page.text)
+        anchors.append({"page": page.number, "start": offset, "end": end, "source": page.source})
+        offset = end + 1  # form feed separator
+    return anchors
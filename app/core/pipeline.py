@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger("pipeline")
+
+_DONE = object()
+_POLL_S = 0.1
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    errors: int = 0
+    batches: int = 0
+    busy_s: float = 0.0
+    # Time spent waiting for room in the next stage's queue (backpressure from downstream)
+    blocked_s: float = 0.0
+
+    def summary(self, wall_s: float) -> Dict:
+        capacity = self.items_in / (self.busy_s / self.workers) if self.busy_s else 0.0
+        return {
+            "workers": self.workers,
+            "in": self.items_in,
+            "out": self.items_out,
+            "errors": self.errors,
+            "batches": self.batches,
+            "busy_s": round(self.busy_s, 4),
+            "blocked_s": round(self.blocked_s, 4),
+            # Rate the stage sustains while busy, and the share of wall time its workers were busy
+            "items_per_s": round(capacity, 2),
+            "utilization": round(self.busy_s / (self.workers * wall_s), 3) if wall_s else 0.0,
+        }
+
+
+class Stage:
+    """
+    One pipeline step. `fn` maps an item (or, when `batch_size` is set, a list of
+    up to `batch_size` items) to an iterable of outputs for the next stage;
+    return an empty iterable to drop the item. A batch is whatever is queued when a
+    worker frees up, topped up for at most `linger_s`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any], Optional[Iterable[Any]]],
+        workers: int = 1,
+        batch_size: Optional[int] = None,
+        linger_s: float = 0.0,
+    ):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.batched = batch_size is not None
+        self.batch_size = max(1, batch_size or 1)
+        self.linger_s = max(0.0, linger_s)
+
+
+class Pipeline:
+    """
+    Bounded queues between stages, each stage with its own worker threads.
+
+    A full queue blocks the stage feeding it, so a slow stage throttles
+    everything upstream instead of buffering without limit. Work overlaps
+    across stages and the wall time tends to the slowest stage rather than the
+    sum. An exception in a stage drops that item (counted in `errors`); an
+    exception from the source stops the pipeline and is re-raised.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 16, source_name: str = "source"):
+        if not stages:
+            raise ValueError("pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.source_name = source_name
+        self.stats: Dict[str, StageStats] = {}
+        self.wall_s = 0.0
+        self._stop = threading.Event()
+
+    def _put(self, q: "queue.Queue", item: Any, stats: StageStats, lock: threading.Lock) -> bool:
+        started = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_S)
+                break
+            except queue.Full:
+                continue
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            with lock:
+                stats.blocked_s += waited
+        return not self._stop.is_set()
+
+    def _take(self, q: "queue.Queue", stage: Stage) -> Optional[List[Any]]:
+        """Next batch, or None once upstream is done (the sentinel is put back for sibling workers)."""
+        while True:
+            if self._stop.is_set():
+                return None
+            try:
+                first = q.get(timeout=_POLL_S)
+                break
+            except queue.Empty:
+                continue
+        if first is _DONE:
+            q.put(_DONE)
+            return None
+        batch = [first]
+        deadline = time.monotonic() + stage.linger_s
+        while len(batch) < stage.batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                item = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE:
+                q.put(_DONE)
+                break
+            batch.append(item)
+        return batch
+
+    def run(self, source: Iterable[Any]) -> List[Any]:
+        """Push every item of `source` through the stages; returns the last stage's outputs."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results: List[Any] = []
+        source_stats = StageStats(self.source_name, 1)
+        self.stats = {self.source_name: source_stats}
+        self.stats.update({s.name: StageStats(s.name, s.workers) for s in self.stages})
+        self._stop.clear()
+        lock = threading.Lock()
+        remaining = {s.name: s.workers for s in self.stages}
+
+        def worker(index: int) -> None:
+            stage, stats = self.stages[index], self.stats[self.stages[index].name]
+            inbox = queues[index]
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            while (batch := self._take(inbox, stage)) is not None:
+                started = time.monotonic()
+                try:
+                    outputs = list(stage.fn(batch if stage.batched else batch[0]) or [])
+                except Exception as e:
+                    outputs = []
+                    logger.error(f"stage {stage.name} failed items={len(batch)} err={e}")
+                    with lock:
+                        stats.errors += len(batch)
+                with lock:
+                    stats.busy_s += time.monotonic() - started
+                    stats.items_in += len(batch)
+                    stats.items_out += len(outputs)
+                    stats.batches += 1
+                for out in outputs:
+                    if outbox is None:
+                        with lock:
+                            results.append(out)
+                    elif not self._put(outbox, out, stats, lock):
+                        return
+            with lock:
+                remaining[stage.name] -= 1
+                last = remaining[stage.name] == 0
+            if last and outbox is not None:
+                # Stop-aware like any other put: after a source error nothing may drain a full outbox
+                self._put(outbox, _DONE, stats, lock)
+
+        threads = [
+            threading.Thread(target=worker, args=(i,), name=f"{stage.name}-{n}", daemon=True)
+            for i, stage in enumerate(self.stages)
+            for n in range(stage.workers)
+        ]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        try:
+            iterator = iter(source)
+            while True:
+                item_started = time.monotonic()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    source_stats.busy_s += time.monotonic() - item_started
+                    break
+                source_stats.busy_s += time.monotonic() - item_started
+                source_stats.items_in += 1
+                source_stats.items_out += 1
+                if not self._put(queues[0], item, source_stats, lock):
+                    break
+            queues[0].put(_DONE)
+            for t in threads:
+                t.join()
+        except BaseException:
+            self._stop.set()
+            for t in threads:
+                t.join()
+            raise
+        finally:
+            self.wall_s = time.monotonic() - started
+        return results
+
+    def summary(self) -> Dict:
+        return {
+            "wall_s": round(self.wall_s, 4),
+            "stages": {name: s.summary(self.wall_s) for name, s in self.stats.items()},
+        }
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .logger import setup_logger
+from .queue import ResearchQueue
+from .search_cache import normalize_query
+from .sourcing_templates import build_sourcing_queries
+
+logger = setup_logger("query_planner")
+
+
+@dataclass
+class QueryPlan:
+    """
+    Search queries for a batch of jurisdictions, collapsed across jurisdictions.
+
+    `queries` maps each unique search query to the jurisdictions that asked for it
+    (so e.g. "{state} state ban the box preemption" is searched once per state, not
+    once per city); `urls` does the same for direct URL probes.
+    """
+
+    jurisdictions: List[str] = field(default_factory=list)
+    queries: Dict[str, List[str]] = field(default_factory=dict)
+    urls: Dict[str, List[str]] = field(default_factory=dict)
+    requested: int = 0
+
+    @property
+    def unique(self) -> int:
+        return len(self.queries)
+
+    @property
+    def saved(self) -> int:
+        return self.requested - self.unique
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "jurisdictions": len(self.jurisdictions),
+            "queries_requested": self.requested,
+            "queries_executed": self.unique,
+            "queries_saved": self.saved,
+        }
+
+
+def plan_queries(
+    jurisdictions: Iterable[str],
+    query_fn: Callable[[str], List[str]] = build_sourcing_queries,
+) -> QueryPlan:
+    plan = QueryPlan()
+    by_key: Dict[str, str] = {}
+    for jurisdiction in jurisdictions:
+        if jurisdiction in plan.jurisdictions:
+            continue
+        plan.jurisdictions.append(jurisdiction)
+        for q in query_fn(jurisdiction):
+            if q.startswith("http"):
+                tags = plan.urls.setdefault(q, [])
+                if jurisdiction not in tags:
+                    tags.append(jurisdiction)
+                continue
+            plan.requested += 1
+            # Keep the first spelling seen; equivalent spellings share one search
+            query = by_key.setdefault(normalize_query(q), q)
+            tags = plan.queries.setdefault(query, [])
+            if jurisdiction not in tags:
+                tags.append(jurisdiction)
+    return plan
+
+
+def get_batch_size() -> int:
+    try:
+        return max(1, int(os.getenv("QUERY_PLAN_BATCH_SIZE", "20")))
+    except Exception:
+        return 20
+
+
+def plan_pending(
+    queue: ResearchQueue,
+    first: Optional[str] = None,
+    limit: Optional[int] = None,
+    query_fn: Callable[[str], List[str]] = build_sourcing_queries,
+) -> QueryPlan:
+    """Plan `first` (the task being started) together with the next pending tasks in queue order."""
+    limit = limit or get_batch_size()
+    batch: List[str] = [first] if first else []
+    for task in queue.pending(limit=limit):
+        if len(batch) >= limit:
+            break
+        if task.jurisdiction_path not in batch:
+            batch.append(task.jurisdiction_path)
+    plan = plan_queries(batch, query_fn=query_fn)
+    logger.info(
+        f"query plan jurisdictions={len(plan.jurisdictions)} requested={plan.requested} "
+        f"executed={plan.unique} saved={plan.saved}"
+    )
+    return plan
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
 import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from dataclasses import asdict
 from datetime import datetime, UTC
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Sequence
 from filelock import FileLock
 
 from .types import ResearchTask
-from .gaps import estimate_gaps
+from .gaps import changed_since, gap_scores
+from .queue_events import notify_queue
+from .scheduler import SchedulerConfig, get_scheduler_config, host_group_of, order_key, pick_state, sched_key, state_of
+from .logger import setup_logger
+
+logger = setup_logger("queue")
 
 
 def _normalize_dt(dt: datetime) -> datetime:
@@ -16,91 +28,946 @@ def _normalize_dt(dt: datetime) -> datetime:
     return dt if dt.tzinfo is not None else dt.replace(tzinfo=UTC)
 
 
+def get_queue_backend() -> str:
+    backend = os.getenv("QUEUE_BACKEND", "sqlite").strip().lower()
+    return backend if backend in ("sqlite", "json") else "sqlite"
+
+
+def get_lease_s() -> float:
+    """Seconds a claim stays valid without a heartbeat (QUEUE_LEASE_S)."""
+    try:
+        return max(1.0, float(os.getenv("QUEUE_LEASE_S", "900")))
+    except Exception:
+        return 900.0
+
+
+def get_max_attempts() -> int:
+    """Claims allowed before a task whose lease keeps expiring is parked as an error."""
+    try:
+        return max(1, int(os.getenv("QUEUE_MAX_ATTEMPTS", "3")))
+    except Exception:
+        return 3
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _parse_dt(value: Optional[str]) -> Optional[datetime]:
+    return _normalize_dt(datetime.fromisoformat(value)) if value else None
+
+
+def _read_json_tasks(path: Path) -> List[ResearchTask]:
+    raw = path.read_text()
+    # Strip potential leftover conflict markers to avoid JSON decode errors
+    cleaned = []
+    for line in raw.splitlines():
+        if line.strip().startswith(("<<<<<<<", "=======", ">>>>>>>")):
+            continue
+        cleaned.append(line)
+    data = json.loads("\n".join(cleaned))
+    tasks: List[ResearchTask] = []
+    for item in data:
+        inserted_str = item.get("inserted_at")
+        if inserted_str:
+            dt = datetime.fromisoformat(inserted_str)
+        else:
+            dt = datetime.now(UTC)
+        tasks.append(
+            ResearchTask(
+                jurisdiction_path=item["jurisdiction_path"],
+                priority=item.get("priority", 0),
+                inserted_at=_normalize_dt(dt),
+                status=item.get("status", "pending"),
+                error=item.get("error"),
+                worker_id=item.get("worker_id"),
+                lease_expires_at=_parse_dt(item.get("lease_expires_at")),
+                attempts=int(item.get("attempts", 0)),
+            )
+        )
+    return tasks
+
+
 class ResearchQueue:
+    """
+    Research task queue. `ResearchQueue(path)` opens the backend selected by
+    QUEUE_BACKEND: `sqlite` (default, `SqliteResearchQueue`) or `json`
+    (`JsonResearchQueue`, the original single-file queue).
+
+    Claims are leases: `next_task` records the worker id and an expiry
+    (QUEUE_LEASE_S), the worker extends it with `heartbeat` (see `LeaseKeeper`),
+    and expired claims go back to pending on the next dequeue so a crashed
+    runner cannot strand its task. Enqueueing a jurisdiction that is already
+    pending merges into that task instead of adding a duplicate; enqueueing new
+    work wakes idle workers (`queue_events.notify_queue`).
+    """
+
+    def __new__(cls, queue_file: Path, *args, **kwargs):
+        if cls is ResearchQueue:
+            cls = SqliteResearchQueue if get_queue_backend() == "sqlite" else JsonResearchQueue
+        return super().__new__(cls)
+
+    def pending(self, limit: Optional[int] = None) -> List[ResearchTask]:
+        """Pending tasks in dequeue order."""
+        raise NotImplementedError
+
+    def count(self, status: Optional[str] = None) -> int:
+        raise NotImplementedError
+
+    def add_task(self, task: ResearchTask) -> bool:
+        """Queue `task`; returns False when it was merged into the pending task for the same jurisdiction."""
+        return self.add_tasks([task]) > 0
+
+    def add_tasks(self, tasks: Iterable[ResearchTask]) -> int:
+        """Queue many tasks in one write, deduped against pending tasks and each other; returns how many are new."""
+        raise NotImplementedError
+
+    def mark_many(
+        self, jurisdiction_paths: Iterable[str], status: str, error: Optional[str] = None, worker_id: Optional[str] = None
+    ) -> int:
+        """Finish the in-progress claims on many jurisdictions in one write; returns how many were updated."""
+        raise NotImplementedError
+
+    def requeue_errors(self, jurisdiction_paths: Optional[Iterable[str]] = None) -> int:
+        """Return errored jurisdictions (all, or those given) to pending in one write; returns how many."""
+        raise NotImplementedError
+
+
+_FINAL_STATUSES = ("completed", "error")
+
+
+class JsonResearchQueue(ResearchQueue):
     def __init__(self, queue_file: Path):
         self.queue_file = queue_file
         self._lock = FileLock(str(queue_file) + ".lock")
         self.tasks: List[ResearchTask] = []
+        self.worker_id = default_worker_id()
+        self.scheduler: SchedulerConfig = get_scheduler_config()
+        # Round-robin clocks per state; in memory, since this backend runs a single worker
+        self._vtimes: dict[str, float] = {}
+        self._system_vtime = 0.0
 
     def load(self) -> None:
         if not self.queue_file.exists():
             self.tasks = []
             return
         with self._lock:
-            raw = self.queue_file.read_text()
-            # Strip potential leftover conflict markers to avoid JSON decode errors
-            cleaned = []
-            for line in raw.splitlines():
-                if line.strip().startswith(("<<<<<<<", "=======", ">>>>>>>")):
-                    continue
-                cleaned.append(line)
             try:
-                data = json.loads("\n".join(cleaned))
+                tasks = _read_json_tasks(self.queue_file)
             except Exception:
-                data = []
+                tasks = []
                 self.queue_file.write_text("[]")
-        tasks: List[ResearchTask] = []
-        for item in data:
-            inserted_str = item.get("inserted_at")
-            if inserted_str:
-                dt = datetime.fromisoformat(inserted_str)
-            else:
-                dt = datetime.now(UTC)
-            tasks.append(
-                ResearchTask(
-                    jurisdiction_path=item["jurisdiction_path"],
-                    priority=item.get("priority", 0),
-                    inserted_at=_normalize_dt(dt),
-                    status=item.get("status", "pending"),
-                    error=item.get("error"),
-                )
-            )
         self.tasks = tasks
 
     def save(self) -> None:
         serialized = [
-            {**asdict(t), "inserted_at": t.inserted_at.isoformat()} for t in self.tasks
+            {
+                **asdict(t),
+                "inserted_at": t.inserted_at.isoformat(),
+                "lease_expires_at": t.lease_expires_at.isoformat() if t.lease_expires_at else None,
+            }
+            for t in self.tasks
         ]
         with self._lock:
             self.queue_file.write_text(json.dumps(serialized, indent=2))
 
-    def add_task(self, task: ResearchTask) -> None:
-        # Normalize inserted_at to be timezone-aware UTC to avoid naive/aware comparison issues
-        task.inserted_at = _normalize_dt(task.inserted_at)
-        self.tasks.append(task)
+    def add_tasks(self, tasks: Iterable[ResearchTask]) -> int:
+        pending = {t.jurisdiction_path: t for t in self.tasks if t.status == "pending"}
+        added = 0
+        for task in tasks:
+            # Normalize inserted_at to be timezone-aware UTC to avoid naive/aware comparison issues
+            task.inserted_at = _normalize_dt(task.inserted_at)
+            existing = pending.get(task.jurisdiction_path) if task.status == "pending" else None
+            if existing is not None:
+                existing.priority = max(existing.priority, task.priority)
+                continue
+            self.tasks.append(task)
+            if task.status == "pending":
+                pending[task.jurisdiction_path] = task
+            added += 1
         self.save()
+        if added:
+            notify_queue(self.queue_file)
+        return added
 
     def sort_by_priority(self, base_dir: Path | None = None) -> None:
         # Sort by dynamic score using gaps without mutating stored priority
+        scores: dict[str, int] = gap_scores(base_dir, (t.jurisdiction_path for t in self.tasks)) if base_dir else {}
+
         def gaps_for(t: ResearchTask) -> int:
-            if not base_dir:
-                return 0
-            try:
-                return estimate_gaps(base_dir, t.jurisdiction_path)
-            except Exception:
-                return 0
-        # Key order: higher of (explicit priority vs gaps), then gaps, then earlier insert
-        self.tasks.sort(key=lambda t: (-(max(t.priority, gaps_for(t))), -gaps_for(t), t.inserted_at))
+            return scores.get(t.jurisdiction_path, 0)
+
+        rate = self.scheduler.aging_rate
+        # Key order: higher of (explicit priority vs gaps) aged by wait time, then gaps, then earlier insert
+        self.tasks.sort(
+            key=lambda t: order_key(
+                sched_key(max(t.priority, gaps_for(t)), t.inserted_at.timestamp(), rate), gaps_for(t), t.inserted_at.timestamp()
+            )
+        )
         self.save()
 
-    def next_task(self, base_dir: Path | None = None) -> Optional[ResearchTask]:
-        self.sort_by_priority(base_dir=base_dir)
+    def reclaim_expired(self) -> int:
+        """Return in-progress tasks whose lease expired to pending; returns how many were reclaimed."""
+        now = datetime.now(UTC)
+        max_attempts = get_max_attempts()
+        reclaimed = 0
         for task in self.tasks:
-            if task.status == "pending":
-                task.status = "in_progress"
-                self.save()
-                return task
-        return None
+            if task.status != "in_progress" or task.lease_expires_at is None or task.lease_expires_at >= now:
+                continue
+            logger.warning(f"lease expired path={task.jurisdiction_path} worker={task.worker_id} attempts={task.attempts}")
+            pending = any(
+                t.status == "pending" and t.jurisdiction_path == task.jurisdiction_path for t in self.tasks
+            )
+            if task.attempts >= max_attempts or pending:
+                task.status = "error"
+                task.error = "lease expired; superseded by pending task" if pending else f"lease expired after {task.attempts} attempts"
+            else:
+                task.status = "pending"
+                reclaimed += 1
+            task.worker_id = None
+            task.lease_expires_at = None
+        return reclaimed
 
-    def mark_completed(self, jurisdiction_path: str) -> None:
-        for task in self.tasks:
-            if task.jurisdiction_path == jurisdiction_path:
-                task.status = "completed"
+    def next_task(
+        self,
+        base_dir: Path | None = None,
+        worker_id: Optional[str] = None,
+        lease_s: Optional[float] = None,
+    ) -> Optional[ResearchTask]:
+        self.reclaim_expired()
+        self.sort_by_priority(base_dir=base_dir)
+        # Same decision as the SQLite backend: round-robin across states, skipping capped host groups
+        running: dict[str, int] = {}
+        for t in self.tasks:
+            group = host_group_of(t.jurisdiction_path)
+            if t.status == "in_progress" and t.lease_expires_at is not None and group is not None:
+                running[group] = running.get(group, 0) + 1
+        capped = self.scheduler.capped_groups(running)
+        # The list is sorted, so each state's first claimable task is its head and its position ranks it
+        heads: dict[str, tuple] = {}
+        firsts: dict[str, ResearchTask] = {}
+        for i, t in enumerate(self.tasks):
+            state = state_of(t.jurisdiction_path)
+            if t.status != "pending" or state in firsts or host_group_of(t.jurisdiction_path) in capped:
+                continue
+            firsts[state] = t
+            heads[state] = (i,)
+        state, vtime, self._system_vtime = pick_state(heads, self._vtimes, self._system_vtime, self.scheduler)
+        if state is None:
+            return None
+        self._vtimes[state] = vtime
+        task = firsts[state]
+        task.status = "in_progress"
+        task.worker_id = worker_id or self.worker_id
+        task.lease_expires_at = datetime.fromtimestamp(time.time() + (lease_s or get_lease_s()), UTC)
+        task.attempts += 1
         self.save()
+        return task
 
-    def mark_error(self, jurisdiction_path: str, error: str) -> None:
-        for task in self.tasks:
-            if task.jurisdiction_path == jurisdiction_path:
-                task.status = "error"
+    def _claimed(self, jurisdiction_path: str, worker_id: Optional[str]) -> List[ResearchTask]:
+        return [
+            t
+            for t in self.tasks
+            if t.jurisdiction_path == jurisdiction_path
+            and t.status == "in_progress"
+            and (worker_id is None or t.worker_id == worker_id)
+        ]
+
+    def heartbeat(self, jurisdiction_path: str, worker_id: str, lease_s: Optional[float] = None) -> bool:
+        tasks = self._claimed(jurisdiction_path, worker_id)
+        for task in tasks:
+            task.lease_expires_at = datetime.fromtimestamp(time.time() + (lease_s or get_lease_s()), UTC)
+        if tasks:
+            self.save()
+        return bool(tasks)
+
+    def hand_off(self, jurisdiction_path: str, worker_id: str, owner: str) -> bool:
+        tasks = self._claimed(jurisdiction_path, worker_id)
+        for task in tasks:
+            task.worker_id = owner
+            task.lease_expires_at = None
+        if tasks:
+            self.save()
+        return bool(tasks)
+
+    def mark_many(
+        self, jurisdiction_paths: Iterable[str], status: str, error: Optional[str] = None, worker_id: Optional[str] = None
+    ) -> int:
+        if status not in _FINAL_STATUSES:
+            raise ValueError(f"status must be one of {_FINAL_STATUSES}, got {status!r}")
+        updated = 0
+        for path in dict.fromkeys(jurisdiction_paths):
+            for task in self._claimed(path, worker_id):
+                task.status = status
                 task.error = error
+                task.lease_expires_at = None
+                updated += 1
         self.save()
+        return updated
+
+    def mark_completed(self, jurisdiction_path: str, worker_id: Optional[str] = None) -> bool:
+        return self.mark_many([jurisdiction_path], "completed", worker_id=worker_id) > 0
+
+    def mark_error(self, jurisdiction_path: str, error: str, worker_id: Optional[str] = None) -> bool:
+        return self.mark_many([jurisdiction_path], "error", error=error, worker_id=worker_id) > 0
+
+    def requeue_errors(self, jurisdiction_paths: Optional[Iterable[str]] = None) -> int:
+        wanted = set(jurisdiction_paths) if jurisdiction_paths is not None else None
+        pending = {t.jurisdiction_path for t in self.tasks if t.status == "pending"}
+        requeued = 0
+        # Latest error per jurisdiction; older ones stay as history
+        for task in reversed(self.tasks):
+            path = task.jurisdiction_path
+            if task.status != "error" or path in pending or (wanted is not None and path not in wanted):
+                continue
+            task.status = "pending"
+            task.error = None
+            task.worker_id = None
+            task.lease_expires_at = None
+            task.attempts = 0
+            pending.add(path)
+            requeued += 1
+        self.save()
+        if requeued:
+            notify_queue(self.queue_file)
+        return requeued
+
+    def pending(self, limit: Optional[int] = None) -> List[ResearchTask]:
+        tasks = [t for t in self.tasks if t.status == "pending"]
+        return tasks[:limit] if limit else tasks
+
+    def count(self, status: Optional[str] = None) -> int:
+        return sum(1 for t in self.tasks if status is None or t.status == status)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    jurisdiction_path TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    gaps INTEGER NOT NULL DEFAULT 0,
+    gaps_base TEXT,
+    effective_priority INTEGER NOT NULL DEFAULT 0,
+    inserted_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    error TEXT,
+    started_at REAL,
+    finished_at REAL,
+    worker_id TEXT,
+    lease_expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    state_key TEXT,
+    host_group TEXT,
+    sched_key INTEGER
+);
+CREATE TABLE IF NOT EXISTS queue_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sched_states (
+    state_key TEXT PRIMARY KEY,
+    vtime REAL NOT NULL DEFAULT 0
+);
+"""
+
+# Created after `_migrate`, since databases from before leases and scheduling lack their columns
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_tasks_order ON tasks (status, sched_key DESC, gaps DESC, inserted_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (status, state_key, sched_key DESC, gaps DESC, inserted_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_path ON tasks (jurisdiction_path, status);
+CREATE INDEX IF NOT EXISTS idx_tasks_lease ON tasks (status, lease_expires_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_pending_path ON tasks (jurisdiction_path) WHERE status = 'pending';
+"""
+
+_LEASE_COLUMNS = [
+    ("worker_id", "TEXT"),
+    ("lease_expires_at", "REAL"),
+    ("attempts", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+_SCHED_COLUMNS = [
+    ("state_key", "TEXT"),
+    ("host_group", "TEXT"),
+    ("sched_key", "INTEGER"),
+]
+
+_COLUMNS = "id, jurisdiction_path, priority, inserted_at, status, error, worker_id, lease_expires_at, attempts"
+_ORDER = "sched_key DESC, gaps DESC, inserted_at, id"
+# One pending row per jurisdiction: a repeat enqueue keeps the earlier slot and the higher priority.
+# `effective_priority - sched_key` is the row's aging term, so the key follows the new priority.
+_INSERT_PENDING = (
+    "INSERT INTO tasks (jurisdiction_path, priority, effective_priority, inserted_at, status, state_key, host_group, sched_key)"
+    " VALUES (?, ?, ?, ?, 'pending', ?, ?, ?)"
+    " ON CONFLICT (jurisdiction_path) WHERE status = 'pending' DO UPDATE SET"
+    " priority = MAX(priority, excluded.priority),"
+    " effective_priority = MAX(effective_priority, excluded.priority),"
+    " sched_key = MAX(effective_priority, excluded.priority) - (effective_priority - sched_key)"
+)
+
+
+def _chunks(items: List[str], size: int = 500) -> Iterator[List[str]]:
+    # Stays under SQLite's bound-parameter limit on older builds (999)
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _row_to_task(row) -> ResearchTask:
+    return ResearchTask(
+        jurisdiction_path=row[1],
+        priority=row[2],
+        inserted_at=datetime.fromtimestamp(row[3], UTC),
+        status=row[4],
+        error=row[5],
+        worker_id=row[6],
+        lease_expires_at=datetime.fromtimestamp(row[7], UTC) if row[7] is not None else None,
+        attempts=row[8],
+    )
+
+
+class SqliteResearchQueue(ResearchQueue):
+    """
+    Queue in SQLite (WAL), shared by runner processes and the API.
+
+    Within a state, tasks are ordered by `sched_key` (max(priority, gaps) plus
+    one point per QUEUE_AGING_S waited; see `scheduler.sched_key`), then gaps,
+    then inserted_at, served from an index. Across states, claims go by
+    weighted round-robin, skipping host groups at their cap of live leases
+    (`scheduler.pick_state`); a decision probes the head of each state's index
+    range, and the pick and the claim share one write transaction, so
+    concurrent workers never get the same row. The claim stores the worker id
+    and lease expiry; expired leases are reclaimed (or parked as errors after
+    QUEUE_MAX_ATTEMPTS claims) before each dequeue. A partial unique index
+    allows one pending row per jurisdiction. Gap scores are stored per task
+    and only recomputed when the jurisdiction file is invalidated (see
+    `gaps.invalidate_gaps`) or on the periodic GAP_REVALIDATE_S sweep.
+
+    Given the legacy `research_queue.json` path, the database lives beside it
+    (`research_queue.db`) and the JSON file is imported whenever it changes;
+    rows already present (same jurisdiction and inserted_at) are skipped.
+    """
+
+    def __init__(self, queue_file: Path):
+        queue_file = Path(queue_file)
+        self.queue_file = queue_file
+        self.json_file: Optional[Path] = queue_file if queue_file.suffix == ".json" else None
+        self.db_path = queue_file.with_suffix(".db") if self.json_file else queue_file
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.worker_id = default_worker_id()
+        self.scheduler: SchedulerConfig = get_scheduler_config()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            self._migrate(conn)
+            conn.executescript(_INDEXES)
+            self._sync_aging(conn)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    # --- Migration ---
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        columns = {r[1] for r in conn.execute("PRAGMA table_info(tasks)")}
+        missing = [(name, decl) for name, decl in _LEASE_COLUMNS if name not in columns]
+        for name, decl in missing:
+            conn.execute(f"ALTER TABLE tasks ADD COLUMN {name} {decl}")
+        if missing:
+            # Claims made before leases have no owner to heartbeat them; give them one lease to finish
+            conn.execute(
+                "UPDATE tasks SET lease_expires_at = ? WHERE status = 'in_progress' AND lease_expires_at IS NULL",
+                (time.time() + get_lease_s(),),
+            )
+        has_unique = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_tasks_pending_path'"
+        ).fetchone()
+        missing = [(name, decl) for name, decl in _SCHED_COLUMNS if name not in columns]
+        for name, decl in missing:
+            conn.execute(f"ALTER TABLE tasks ADD COLUMN {name} {decl}")
+        if missing:
+            # Replaced by the partial indexes on sched_key
+            conn.execute("DROP INDEX IF EXISTS idx_tasks_dequeue")
+        paths = [r[0] for r in conn.execute("SELECT DISTINCT jurisdiction_path FROM tasks WHERE state_key IS NULL")]
+        if paths:
+            conn.executemany(
+                "UPDATE tasks SET state_key = ?, host_group = ? WHERE jurisdiction_path = ? AND state_key IS NULL",
+                [(state_of(p), host_group_of(p), p) for p in paths],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO sched_states (state_key) VALUES (?)", [(state_of(p),) for p in paths]
+            )
+        if not has_unique:
+            # Collapse duplicate pending rows into the earliest one before the unique index can exist
+            conn.execute(
+                "UPDATE tasks SET"
+                " priority = (SELECT MAX(d.priority) FROM tasks d"
+                "   WHERE d.jurisdiction_path = tasks.jurisdiction_path AND d.status = 'pending'),"
+                " effective_priority = (SELECT MAX(d.effective_priority) FROM tasks d"
+                "   WHERE d.jurisdiction_path = tasks.jurisdiction_path AND d.status = 'pending')"
+                " WHERE status = 'pending'"
+            )
+            conn.execute(
+                "DELETE FROM tasks WHERE status = 'pending' AND id NOT IN"
+                " (SELECT MIN(id) FROM tasks WHERE status = 'pending' GROUP BY jurisdiction_path)"
+            )
+
+    def _sync_aging(self, conn: sqlite3.Connection) -> None:
+        """Recompute stored dequeue keys when QUEUE_AGING_S changed (or rows predate them)."""
+        rate = repr(self.scheduler.aging_rate)
+        row = conn.execute("SELECT value FROM queue_meta WHERE key = 'aging_rate'").fetchone()
+        if row and row[0] == rate:
+            where = " WHERE sched_key IS NULL"
+        else:
+            where = ""
+        conn.execute(
+            f"UPDATE tasks SET sched_key = effective_priority - CAST(inserted_at * ? AS INTEGER){where}",
+            (self.scheduler.aging_rate,),
+        )
+        conn.execute("INSERT OR REPLACE INTO queue_meta (key, value) VALUES ('aging_rate', ?)", (rate,))
+
+    def _row_values(self, jurisdiction_path: str, priority: int, inserted_at: float) -> tuple:
+        """(state_key, host_group, sched_key) of a new row."""
+        return (
+            state_of(jurisdiction_path),
+            host_group_of(jurisdiction_path),
+            sched_key(priority, inserted_at, self.scheduler.aging_rate),
+        )
+
+    @staticmethod
+    def _register_states(conn: sqlite3.Connection, paths: Iterable[str]) -> None:
+        states = {state_of(p) for p in paths}
+        conn.executemany("INSERT OR IGNORE INTO sched_states (state_key) VALUES (?)", [(st,) for st in states])
+
+    def import_json(self, json_path: Path, stamp: Optional[str] = None) -> int:
+        """
+        Import tasks from a JSON queue file; returns the number of rows added.
+        With `stamp`, the import is skipped when that file version was already
+        imported. The check and the import share one write transaction, so
+        workers opening the queue at the same time import the file only once.
+        """
+        tasks = _read_json_tasks(json_path)
+        lease_until = time.time() + get_lease_s()
+        added = 0
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if stamp is not None:
+                row = conn.execute("SELECT value FROM queue_meta WHERE key = 'json_import'").fetchone()
+                if row and row[0] == stamp:
+                    return 0
+            for t in tasks:
+                ts = _normalize_dt(t.inserted_at).timestamp()
+                exists = conn.execute(
+                    "SELECT 1 FROM tasks WHERE jurisdiction_path = ? AND inserted_at = ?",
+                    (t.jurisdiction_path, ts),
+                ).fetchone()
+                if exists:
+                    continue
+                if t.status == "pending":
+                    if self._pending_id(conn, t.jurisdiction_path) is None:
+                        added += 1
+                    conn.execute(
+                        _INSERT_PENDING,
+                        (t.jurisdiction_path, int(t.priority), int(t.priority), ts,
+                         *self._row_values(t.jurisdiction_path, int(t.priority), ts)),
+                    )
+                    continue
+                lease = lease_until if t.status == "in_progress" else None
+                conn.execute(
+                    "INSERT INTO tasks (jurisdiction_path, priority, effective_priority, inserted_at, status, error,"
+                    " worker_id, lease_expires_at, attempts, state_key, host_group, sched_key)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (t.jurisdiction_path, int(t.priority), int(t.priority), ts, t.status, t.error,
+                     t.worker_id, lease, int(t.attempts), *self._row_values(t.jurisdiction_path, int(t.priority), ts)),
+                )
+                added += 1
+            self._register_states(conn, (t.jurisdiction_path for t in tasks))
+            if stamp is not None:
+                conn.execute("INSERT OR REPLACE INTO queue_meta (key, value) VALUES ('json_import', ?)", (stamp,))
+        return added
+
+    @staticmethod
+    def _pending_id(conn: sqlite3.Connection, jurisdiction_path: str) -> Optional[int]:
+        row = conn.execute(
+            "SELECT id FROM tasks WHERE jurisdiction_path = ? AND status = 'pending'", (jurisdiction_path,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _import_json_if_changed(self) -> None:
+        if self.json_file is None:
+            return
+        try:
+            st = self.json_file.stat()
+        except FileNotFoundError:
+            return
+        stamp = f"{st.st_mtime_ns}:{st.st_size}"
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM queue_meta WHERE key = 'json_import'").fetchone()
+        if row and row[0] == stamp:
+            return
+        try:
+            added = self.import_json(self.json_file, stamp=stamp)
+        except Exception as e:
+            logger.warning(f"queue json import skipped path={self.json_file} err={e}")
+            added = 0
+            # Do not retry an unreadable file until it changes
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO queue_meta (key, value) VALUES ('json_import', ?)", (stamp,))
+        if added:
+            logger.info(f"imported {added} tasks from {self.json_file} into {self.db_path}")
+
+    # --- ResearchQueue API ---
+    def load(self) -> None:
+        self._import_json_if_changed()
+
+    def save(self) -> None:
+        # Every operation commits on its own
+        return None
+
+    @property
+    def tasks(self) -> List[ResearchTask]:
+        """Snapshot of every task in dequeue order (O(N); prefer `pending`/`count`)."""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {_COLUMNS} FROM tasks ORDER BY {_ORDER}").fetchall()
+        return [_row_to_task(r) for r in rows]
+
+    def add_tasks(self, tasks: Iterable[ResearchTask]) -> int:
+        tasks = list(tasks)
+        if not tasks:
+            return 0
+        for task in tasks:
+            task.inserted_at = _normalize_dt(task.inserted_at)
+        pending = [t for t in tasks if t.status == "pending"]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Jurisdictions already pending are merged by the upsert; count only new ones
+            paths = list(dict.fromkeys(t.jurisdiction_path for t in pending))
+            queued = {p for chunk in _chunks(paths) for p in self._pending_paths(conn, chunk)}
+            added = len(set(paths) - queued)
+            conn.executemany(
+                _INSERT_PENDING,
+                [
+                    (t.jurisdiction_path, int(t.priority), int(t.priority), t.inserted_at.timestamp(),
+                     *self._row_values(t.jurisdiction_path, int(t.priority), t.inserted_at.timestamp()))
+                    for t in pending
+                ],
+            )
+            others = [t for t in tasks if t.status != "pending"]
+            conn.executemany(
+                "INSERT INTO tasks (jurisdiction_path, priority, effective_priority, inserted_at, status, error,"
+                " state_key, host_group, sched_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (t.jurisdiction_path, int(t.priority), int(t.priority), t.inserted_at.timestamp(), t.status, t.error,
+                     *self._row_values(t.jurisdiction_path, int(t.priority), t.inserted_at.timestamp()))
+                    for t in others
+                ],
+            )
+            added += len(others)
+            self._register_states(conn, paths)
+        if added:
+            # After commit, so a woken worker finds the rows
+            notify_queue(self.queue_file)
+        return added
+
+    @staticmethod
+    def _pending_paths(conn: sqlite3.Connection, paths: Sequence[str]) -> List[str]:
+        marks = ", ".join("?" for _ in paths)
+        rows = conn.execute(
+            f"SELECT jurisdiction_path FROM tasks WHERE status = 'pending' AND jurisdiction_path IN ({marks})",
+            tuple(paths),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def _invalidate_scores(self, base_dir: Path) -> None:
+        """
+        Queue pending tasks for rescoring when their jurisdiction file was
+        invalidated (merge/patch hooks) since the last check, and all pending
+        tasks every GAP_REVALIDATE_S to catch edits made outside those hooks.
+        """
+        now = time.time()
+        try:
+            sweep_every = float(os.getenv("GAP_REVALIDATE_S", "600"))
+        except Exception:
+            sweep_every = 600.0
+        with self._connect() as conn:
+            meta = dict(conn.execute("SELECT key, value FROM queue_meta WHERE key IN ('gap_seq', 'gap_sweep')").fetchall())
+        paths, seq = changed_since(int(meta.get("gap_seq", 0)), base_dir)
+        sweep = sweep_every > 0 and now - float(meta.get("gap_sweep", 0)) >= sweep_every
+        with self._connect() as conn:
+            if sweep:
+                # Rescoring goes through the gap cache, so only files whose mtime/size changed are parsed
+                conn.execute("UPDATE tasks SET gaps_base = NULL WHERE status = 'pending'")
+                conn.execute("INSERT OR REPLACE INTO queue_meta (key, value) VALUES ('gap_sweep', ?)", (str(now),))
+            elif paths:
+                conn.executemany(
+                    "UPDATE tasks SET gaps_base = NULL WHERE jurisdiction_path = ? AND status = 'pending'",
+                    [(p,) for p in paths],
+                )
+            if str(seq) != meta.get("gap_seq"):
+                conn.execute("INSERT OR REPLACE INTO queue_meta (key, value) VALUES ('gap_seq', ?)", (str(seq),))
+
+    def sort_by_priority(self, base_dir: Path | None = None) -> None:
+        """Score pending tasks not yet scored against `base_dir`; the index keeps them ordered."""
+        if not base_dir:
+            return
+        base = str(base_dir)
+        self._invalidate_scores(Path(base_dir))
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, jurisdiction_path, priority FROM tasks"
+                " WHERE status = 'pending' AND (gaps_base IS NULL OR gaps_base != ?)",
+                (base,),
+            ).fetchall()
+        if not rows:
+            return
+        # One gap-cache connection for the batch, however many tasks a sweep rescores
+        scores = gap_scores(Path(base_dir), [path for _, path, _ in rows])
+        updates = []
+        for task_id, path, priority in rows:
+            gaps = scores.get(path, 0)
+            effective = max(int(priority), gaps)
+            updates.append((gaps, base, effective, effective, task_id))
+        with self._connect() as conn:
+            # Only rescored rows move in the order; the aging term (effective_priority - sched_key) is kept
+            conn.executemany(
+                "UPDATE tasks SET gaps = ?, gaps_base = ?, effective_priority = ?,"
+                " sched_key = ? - (effective_priority - sched_key) WHERE id = ?",
+                updates,
+            )
+
+    def reclaim_expired(self) -> int:
+        """Return in-progress tasks whose lease expired to pending; returns how many were reclaimed."""
+        now = time.time()
+        with self._connect() as conn:
+            # Cheap indexed probe first, so a healthy queue takes no write lock here
+            rows = conn.execute(
+                "SELECT id, jurisdiction_path, worker_id, attempts FROM tasks"
+                " WHERE status = 'in_progress' AND lease_expires_at < ?",
+                (now,),
+            ).fetchall()
+            if not rows:
+                return 0
+            max_attempts = get_max_attempts()
+            reclaimed = 0
+            for task_id, path, worker, attempts in rows:
+                logger.warning(f"lease expired path={path} worker={worker} attempts={attempts}")
+                # Guarded on the expiry so a heartbeat or another reclaimer that got there first wins
+                guard = " WHERE id = ? AND status = 'in_progress' AND lease_expires_at < ?"
+                if attempts < max_attempts:
+                    try:
+                        cur = conn.execute(
+                            "UPDATE tasks SET status = 'pending', worker_id = NULL, lease_expires_at = NULL,"
+                            " started_at = NULL" + guard,
+                            (task_id, now),
+                        )
+                        reclaimed += cur.rowcount
+                        continue
+                    except sqlite3.IntegrityError:
+                        # Re-enqueued meanwhile; the pending row carries the work on
+                        error = "lease expired; superseded by pending task"
+                else:
+                    error = f"lease expired after {attempts} attempts"
+                conn.execute(
+                    "UPDATE tasks SET status = 'error', error = ?, finished_at = ?, lease_expires_at = NULL" + guard,
+                    (error, now, task_id, now),
+                )
+        return reclaimed
+
+    def next_task(
+        self,
+        base_dir: Path | None = None,
+        worker_id: Optional[str] = None,
+        lease_s: Optional[float] = None,
+    ) -> Optional[ResearchTask]:
+        self.reclaim_expired()
+        self.sort_by_priority(base_dir=base_dir)
+        now = datetime.now(UTC).timestamp()
+        claim = (now, worker_id or self.worker_id, now + (lease_s or get_lease_s()))
+        set_claim = "status = 'in_progress', started_at = ?, worker_id = ?, lease_expires_at = ?, attempts = attempts + 1"
+        with self._connect() as conn:
+            # The decision reads shared scheduler state; the write lock keeps it and the claim atomic
+            conn.execute("BEGIN IMMEDIATE")
+            task_id = self._schedule(conn)
+            if task_id is None:
+                return None
+            conn.execute(f"UPDATE tasks SET {set_claim} WHERE id = ?", (*claim, task_id))
+            row = conn.execute(f"SELECT {_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return _row_to_task(row)
+
+    def _schedule(self, conn: sqlite3.Connection) -> Optional[int]:
+        """
+        Id of the next task to claim, advancing its state's round-robin clock. Probes the best
+        claimable task of each state through `idx_tasks_state` (O(states * log n)) instead of
+        ordering the whole queue.
+        """
+        running = dict(conn.execute(
+            "SELECT host_group, COUNT(*) FROM tasks WHERE status = 'in_progress'"
+            " AND lease_expires_at IS NOT NULL AND host_group IS NOT NULL GROUP BY host_group"
+        ).fetchall())
+        capped = sorted(self.scheduler.capped_groups(running))
+        skip = ""
+        if capped:
+            skip = f" AND (host_group IS NULL OR host_group NOT IN ({', '.join('?' for _ in capped)}))"
+        vtimes = dict(conn.execute("SELECT state_key, vtime FROM sched_states").fetchall())
+        heads = {}
+        ids = {}
+        for state in vtimes:
+            row = conn.execute(
+                "SELECT id, sched_key, gaps, inserted_at FROM tasks"
+                f" WHERE status = 'pending' AND state_key = ?{skip} ORDER BY {_ORDER} LIMIT 1",
+                (state, *capped),
+            ).fetchone()
+            if row is not None:
+                ids[state] = row[0]
+                heads[state] = order_key(row[1], row[2], row[3], row[0])
+        meta = conn.execute("SELECT value FROM queue_meta WHERE key = 'sched_vtime'").fetchone()
+        state, vtime, system_vtime = pick_state(heads, vtimes, float(meta[0]) if meta else 0.0, self.scheduler)
+        if state is None:
+            return None
+        conn.execute("UPDATE sched_states SET vtime = ? WHERE state_key = ?", (vtime, state))
+        conn.execute("INSERT OR REPLACE INTO queue_meta (key, value) VALUES ('sched_vtime', ?)", (repr(system_vtime),))
+        return ids[state]
+
+    def _update_claim(self, jurisdiction_path: str, worker_id: Optional[str], assignments: str, params: tuple) -> bool:
+        """Apply `assignments` to the in-progress claim on `jurisdiction_path` (owned by `worker_id`, if given)."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                f"UPDATE tasks SET {assignments}"
+                " WHERE jurisdiction_path = ? AND status = 'in_progress' AND (? IS NULL OR worker_id = ?)",
+                (*params, jurisdiction_path, worker_id, worker_id),
+            )
+            return cur.rowcount > 0
+
+    def heartbeat(self, jurisdiction_path: str, worker_id: str, lease_s: Optional[float] = None) -> bool:
+        """Extend the caller's lease; False means it expired and the task was reclaimed."""
+        until = time.time() + (lease_s or get_lease_s())
+        return self._update_claim(jurisdiction_path, worker_id, "lease_expires_at = ?", (until,))
+
+    def hand_off(self, jurisdiction_path: str, worker_id: str, owner: str) -> bool:
+        """Pass the claim to an owner that cannot heartbeat (e.g. a Celery task); it no longer expires."""
+        return self._update_claim(jurisdiction_path, worker_id, "worker_id = ?, lease_expires_at = NULL", (owner,))
+
+    def mark_many(
+        self, jurisdiction_paths: Iterable[str], status: str, error: Optional[str] = None, worker_id: Optional[str] = None
+    ) -> int:
+        # Only claims are closed: history rows stay as they were, and a pending row
+        # enqueued while the task ran is fresh work that stays queued
+        if status not in _FINAL_STATUSES:
+            raise ValueError(f"status must be one of {_FINAL_STATUSES}, got {status!r}")
+        now = datetime.now(UTC).timestamp()
+        with self._connect() as conn:
+            cur = conn.executemany(
+                "UPDATE tasks SET status = ?, error = ?, finished_at = ?, lease_expires_at = NULL"
+                " WHERE jurisdiction_path = ? AND status = 'in_progress' AND (? IS NULL OR worker_id = ?)",
+                [(status, error, now, path, worker_id, worker_id) for path in dict.fromkeys(jurisdiction_paths)],
+            )
+            return max(cur.rowcount, 0)
+
+    def mark_completed(self, jurisdiction_path: str, worker_id: Optional[str] = None) -> bool:
+        return self.mark_many([jurisdiction_path], "completed", worker_id=worker_id) > 0
+
+    def mark_error(self, jurisdiction_path: str, error: str, worker_id: Optional[str] = None) -> bool:
+        return self.mark_many([jurisdiction_path], "error", error=error, worker_id=worker_id) > 0
+
+    def requeue_errors(self, jurisdiction_paths: Optional[Iterable[str]] = None) -> int:
+        # Latest error row per jurisdiction goes back to pending (older ones stay as history),
+        # skipping jurisdictions that are already pending
+        sql = (
+            "UPDATE tasks SET status = 'pending', error = NULL, worker_id = NULL, lease_expires_at = NULL,"
+            " attempts = 0, started_at = NULL, finished_at = NULL, gaps_base = NULL"
+            " WHERE id IN (SELECT MAX(id) FROM tasks WHERE status = 'error'{where} GROUP BY jurisdiction_path)"
+            " AND NOT EXISTS (SELECT 1 FROM tasks p WHERE p.jurisdiction_path = tasks.jurisdiction_path"
+            " AND p.status = 'pending')"
+        )
+        requeued = 0
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if jurisdiction_paths is None:
+                requeued = conn.execute(sql.format(where="")).rowcount
+            else:
+                for chunk in _chunks(list(dict.fromkeys(jurisdiction_paths))):
+                    marks = ", ".join("?" for _ in chunk)
+                    requeued += conn.execute(
+                        sql.format(where=f" AND jurisdiction_path IN ({marks})"), tuple(chunk)
+                    ).rowcount
+        if requeued:
+            notify_queue(self.queue_file)
+        return requeued
+
+    def pending(self, limit: Optional[int] = None) -> List[ResearchTask]:
+        sql = f"SELECT {_COLUMNS} FROM tasks WHERE status = 'pending' ORDER BY {_ORDER}"
+        params: tuple = ()
+        if limit:
+            sql += " LIMIT ?"
+            params = (int(limit),)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [_row_to_task(r) for r in rows]
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._connect() as conn:
+            if status is None:
+                return int(conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0])
+            return int(conn.execute("SELECT COUNT(*) FROM tasks WHERE status = ?", (status,)).fetchone()[0])
+
+
+class LeaseKeeper:
+    """
+    Heartbeats a claimed task from a daemon thread while the worker runs it.
+    Heartbeats go out every QUEUE_HEARTBEAT_S (default a third of the lease);
+    `lost` turns True once the queue reports the lease was reclaimed.
+    """
+
+    def __init__(
+        self,
+        queue: ResearchQueue,
+        jurisdiction_path: str,
+        worker_id: str,
+        lease_s: Optional[float] = None,
+        interval_s: Optional[float] = None,
+    ):
+        self.queue = queue
+        self.jurisdiction_path = jurisdiction_path
+        self.worker_id = worker_id
+        self.lease_s = lease_s or get_lease_s()
+        if interval_s is None:
+            try:
+                interval_s = float(os.getenv("QUEUE_HEARTBEAT_S", "0")) or self.lease_s / 3
+            except Exception:
+                interval_s = self.lease_s / 3
+        self.interval_s = max(0.01, interval_s)
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LeaseKeeper":
+        self._thread = threading.Thread(target=self._run, name=f"lease-{self.jurisdiction_path}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                ok = self.queue.heartbeat(self.jurisdiction_path, self.worker_id, self.lease_s)
+            except Exception as e:
+                logger.warning(f"heartbeat failed path={self.jurisdiction_path} err={e}")
+                continue
+            if not ok:
+                self.lost = True
+                logger.warning(f"lease lost path={self.jurisdiction_path} worker={self.worker_id}")
+                return
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "LeaseKeeper":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import select
+import socket
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from .logger import setup_logger
+
+logger = setup_logger("queue_events")
+
+
+def wakeups_enabled() -> bool:
+    if os.getenv("QUEUE_WAKEUPS", "1") in ("0", "false", "False"):
+        return False
+    return hasattr(socket, "AF_UNIX")
+
+
+def wake_dir(queue_file: Path) -> Path:
+    """
+    Rendezvous directory for a queue's listeners. Keyed by the queue path without
+    its suffix, so the JSON path and its SQLite database share listeners; kept
+    under the temp dir because socket paths are limited to ~100 bytes.
+    """
+    key = str(Path(queue_file).resolve().with_suffix(""))
+    return Path(tempfile.gettempdir()) / f"rq-wake-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+
+
+def notify_queue(queue_file: Path) -> int:
+    """Wake every idle listener of `queue_file`; returns how many were reached. Never raises."""
+    if not wakeups_enabled():
+        return 0
+    directory = wake_dir(queue_file)
+    try:
+        paths = list(directory.glob("*.sock"))
+    except OSError:
+        return 0
+    if not paths:
+        return 0
+    woken = 0
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    except OSError as e:
+        logger.warning(f"queue wakeup skipped err={e}")
+        return 0
+    with sock:
+        sock.setblocking(False)
+        for path in paths:
+            try:
+                sock.sendto(b"1", str(path))
+                woken += 1
+            except BlockingIOError:
+                # Receive buffer full: a wakeup is already pending there
+                woken += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Listener died without cleaning up
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            except OSError as e:
+                logger.warning(f"queue wakeup failed path={path} err={e}")
+    return woken
+
+
+class QueueWaiter:
+    """
+    Lets an idle worker sleep until work is enqueued instead of re-polling.
+
+    `wait(timeout)` returns early when `notify_queue` (called after every
+    enqueue) or `wake` fires, and otherwise after `timeout`, so polling remains
+    the fallback for dropped wakeups, platforms without AF_UNIX and writers that
+    bypass the queue API. The socket stays bound for the waiter's lifetime, so a
+    wakeup sent between a failed dequeue and `wait` is not lost.
+    """
+
+    def __init__(self, queue_file: Path):
+        self._event = threading.Event()
+        self._sock: Optional[socket.socket] = None
+        self.path: Optional[Path] = None
+        if not wakeups_enabled():
+            return
+        directory = wake_dir(queue_file)
+        path = directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        try:
+            directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(str(path))
+            sock.setblocking(False)
+        except OSError as e:
+            logger.warning(f"queue wakeups unavailable, polling only dir={directory} err={e}")
+            return
+        self._sock = sock
+        self.path = path
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to `timeout` seconds; True when woken by a notification."""
+        if self._sock is None:
+            woken = self._event.wait(timeout)
+            self._event.clear()
+            return woken
+        ready, _, _ = select.select([self._sock], [], [], max(0.0, timeout))
+        if not ready:
+            return False
+        # Coalesce a burst of enqueues into one wakeup
+        while True:
+            try:
+                self._sock.recv(64)
+            except (BlockingIOError, OSError):
+                break
+        return True
+
+    def wake(self) -> None:
+        """Interrupt `wait` from another thread (e.g. on shutdown)."""
+        self._event.set()
+        if self._sock is None or self.path is None:
+            return
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+                sock.setblocking(False)
+                sock.sendto(b"1", str(self.path))
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if self.path is not None:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> "QueueWaiter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
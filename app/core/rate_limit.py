@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger("rate_limit")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket whose refill rate adapts to throttling.
+
+    `throttle()` (a 429) halves the rate and blocks all callers until any
+    Retry-After has passed; each `succeed()` recovers the rate additively
+    toward the configured ceiling (AIMD).
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0, min_rate: Optional[float] = None):
+        self.max_rate = max(0.001, rate)
+        self.rate = self.max_rate
+        self.min_rate = min_rate if min_rate is not None else self.max_rate / 16
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available (returns 0.0); otherwise the seconds to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self.blocked_until and self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return max(self.blocked_until - now, (1 - self.tokens) / self.rate, 1e-3)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting at most `timeout` seconds; False if none became available."""
+        give_up_at = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            wait_s = self.try_acquire()
+            if not wait_s:
+                return True
+            if give_up_at is not None and time.monotonic() + wait_s > give_up_at:
+                return False
+            time.sleep(wait_s)
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> bool:
+        """`acquire` for event-loop code: waits with asyncio.sleep instead of blocking the loop."""
+        give_up_at = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            wait_s = self.try_acquire()
+            if not wait_s:
+                return True
+            if give_up_at is not None and time.monotonic() + wait_s > give_up_at:
+                return False
+            await asyncio.sleep(wait_s)
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def succeed(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; open fails fast
+    for `reset_timeout_s`, then half-open lets one probe through to decide.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 60.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_s = reset_timeout_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if now - self.opened_at >= self.reset_timeout_s:
+            return "half_open"
+        return "open"
+
+    def admit(self) -> Optional[str]:
+        """"closed" or "probe" when a call may proceed, None when it must fail fast."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return "closed"
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return "probe"
+            return None
+
+    def allow(self) -> bool:
+        return self.admit() is not None
+
+    def release_probe(self) -> None:
+        """End a half-open probe that settled nothing (throttled, client error, cancelled): the next call probes."""
+        with self._lock:
+            self._probing = False
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout_s - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probing:
+                    logger.warning(f"circuit open after failures={self.failures}")
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class ProviderGuard:
+    def __init__(self, name: str, bucket: TokenBucket, breaker: CircuitBreaker, max_wait_s: float):
+        self.name = name
+        self.bucket = bucket
+        self.breaker = breaker
+        self.max_wait_s = max_wait_s
+
+
+def _env_float(name: str, provider: str, default: float) -> float:
+    # Per-provider override, e.g. SEARCH_RATE_LIMIT_RPS_GOOGLE_CSE, then the global knob
+    raw = os.getenv(f"{name}_{provider.upper()}") or os.getenv(name)
+    try:
+        return float(raw) if raw else default
+    except Exception:
+        return default
+
+
+_GUARDS: Dict[str, ProviderGuard] = {}
+_GUARDS_LOCK = threading.Lock()
+
+
+def get_guard(provider: str) -> ProviderGuard:
+    """Process-wide limiter + breaker for `provider`, shared by every thread and provider instance."""
+    with _GUARDS_LOCK:
+        guard = _GUARDS.get(provider)
+        if guard is None:
+            guard = ProviderGuard(
+                provider,
+                TokenBucket(
+                    rate=_env_float("SEARCH_RATE_LIMIT_RPS", provider, 2.0),
+                    burst=_env_float("SEARCH_RATE_LIMIT_BURST", provider, 2.0),
+                ),
+                CircuitBreaker(
+                    failure_threshold=int(_env_float("SEARCH_BREAKER_FAILURES", provider, 5)),
+                    reset_timeout_s=_env_float("SEARCH_BREAKER_RESET_S", provider, 60.0),
+                ),
+                max_wait_s=_env_float("SEARCH_RATE_LIMIT_MAX_WAIT_S", provider, 10.0),
+            )
+            _GUARDS[provider] = guard
+        return guard
+
+
+def reset_guards() -> None:
+    """Drop all limiter/breaker state (tests, or after changing env knobs)."""
+    with _GUARDS_LOCK:
+        _GUARDS.clear()
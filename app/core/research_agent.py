@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from typing import TypedDict, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, TypedDict
 import os
 import time
 
+from .deadline import Deadline
+
 
 class ResearchState(TypedDict, total=False):
     query: str
@@ -35,6 +38,44 @@ def _try_import_llms():
         return None
 
 
+def crawl_urls(
+    urls: List[str],
+    fetch: Callable[..., Dict[str, Any]],
+    timeout_s: float,
+    per_url_s: Optional[float],
+    concurrency: int,
+) -> List[Dict[str, Any]]:
+    """
+    Run `fetch(url, deadline=...)` for each URL, `concurrency` at a time, under one shared
+    budget of `timeout_s`. Each URL also gets `per_url_s` (capped by the shared budget),
+    counted from when its fetch starts. URLs unfinished at the budget come back as
+    `timed_out` placeholders; URLs whose fetch raised are left out.
+    """
+    budget = Deadline(timeout_s)
+
+    def fetch_one(url: str) -> Dict[str, Any]:
+        # The per-URL budget starts when the fetch does, not while the URL waits for a pool slot
+        return fetch(url, deadline=budget.child(per_url_s))
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(urls))))
+    try:
+        futures = [pool.submit(fetch_one, url) for url in urls]
+        # Short grace lets workers that noticed the deadline hand back partial results
+        wait(futures, timeout=(budget.remaining() or 0.0) + 0.5)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    extracted: List[Dict[str, Any]] = []
+    for url, fut in zip(urls, futures):
+        if not fut.done() or fut.cancelled():
+            extracted.append({"text": "", "meta": {"timed_out": True}, "source": url})
+            continue
+        try:
+            extracted.append(fut.result())
+        except Exception:
+            continue
+    return extracted
+
+
 def build_agent():
     StateGraph, END = _try_import_langgraph()
     if StateGraph is None:
@@ -42,7 +83,8 @@ def build_agent():
 
     OllamaLLM = _try_import_llms()
 
-    from .search import get_default_search_provider
+    from .search import get_default_search_provider, search_many
+    from .urlnorm import dedupe_urls
     from .crawl import fetch_and_extract
     from .retrieval import upsert_docs
 
@@ -71,46 +113,43 @@ def build_agent():
     def search_node(state: ResearchState) -> ResearchState:
         provider = get_default_search_provider()
         docs: List[Dict[str, Any]] = []
-        start = time.monotonic()
         try:
             timeout_s = float(os.getenv("DEEP_SEARCH_TIMEOUT_S", os.getenv("DEEP_NODE_TIMEOUT_S", "20")))
         except Exception:
             timeout_s = 20.0
-        for q in (state.get("sub_queries", []) or []):
-            if time.monotonic() - start > timeout_s:
-                break
-            try:
-                for r in provider.search(q, num_results=5):
-                    if time.monotonic() - start > timeout_s:
-                        break
-                    docs.append({"url": r.url, "title": r.title, "snippet": r.snippet})
-            except Exception:
-                # Best-effort: continue to next query on provider errors
-                continue
+        sub_queries = state.get("sub_queries", []) or []
+        # Sub-queries are awaited together; any still running at the node budget are cancelled.
+        # Provider errors are best-effort: a failed query simply contributes no docs.
+        try:
+            hits_by_query = search_many(provider, sub_queries, num_results=5, timeout=timeout_s)
+        except Exception:
+            hits_by_query = {}
+        for q in sub_queries:
+            for r in hits_by_query.get(q, []):
+                docs.append({"url": r.url, "title": r.title, "snippet": r.snippet})
         return {"docs": docs}
 
-    _crawl_cache: Dict[str, Dict[str, Any]] = {}
-
     def crawl_node(state: ResearchState) -> ResearchState:
-        extracted: List[Dict[str, Any]] = []
-        for d in state.get("docs", []) or []:
-            url = d.get("url") or ""
-            try:
-                if url in _crawl_cache:
-                    extracted.append(_crawl_cache[url])
-                else:
-                    start = time.monotonic()
-                    timeout_s = float(os.getenv("DEEP_NODE_TIMEOUT_S", "20"))
-                    res = fetch_and_extract(url)
-                    if time.monotonic() - start <= timeout_s:
-                        _crawl_cache[url] = res
-                        extracted.append(res)
-                    else:
-                        # Timeout guard: skip
-                        continue
-            except Exception:
-                continue
-        return {"docs": extracted}
+        # Repeat crawls are served by fetch_and_extract's persistent (url, content hash) cache.
+        # URLs run concurrently under one node budget; the deadline is propagated into
+        # robots, fetch, render and OCR so work stops when the budget runs out.
+        urls = dedupe_urls(d.get("url") for d in (state.get("docs", []) or []) if d.get("url"))
+        if not urls:
+            return {"docs": []}
+        try:
+            timeout_s = float(os.getenv("DEEP_CRAWL_TIMEOUT_S", os.getenv("DEEP_NODE_TIMEOUT_S", "20")))
+        except Exception:
+            timeout_s = 20.0
+        try:
+            per_url_env = os.getenv("DEEP_CRAWL_URL_TIMEOUT_S")
+            per_url_s = float(per_url_env) if per_url_env else None
+        except Exception:
+            per_url_s = None
+        try:
+            concurrency = max(1, int(os.getenv("DEEP_CRAWL_CONCURRENCY", "4")))
+        except Exception:
+            concurrency = 4
+        return {"docs": crawl_urls(urls, fetch_and_extract, timeout_s, per_url_s, concurrency)}
 
     def extract_node(state: ResearchState) -> ResearchState:
         # Placeholder extraction; integrate schema-driven prompts later
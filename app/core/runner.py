@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import json
 import os
+import signal
+import threading
 import time
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import typer
 
@@ -13,11 +16,14 @@ from ..config.settings import settings
 from ..core.db import init_db, record_run
 from ..core.paths import project_root
 from ..core.vector_store import VectorStore
-from ..core.queue import ResearchQueue
+from ..core.queue import ResearchQueue, default_worker_id, get_lease_s, get_queue_backend
+from ..core.queue_events import QueueWaiter
+from ..core.checkpoints import StageRun, file_digest, get_checkpoint_store
 from ..core.logger import setup_logger, set_trace_id
 from ..agents.task_manager import TaskManagerAgent
 from ..agents.sourcing_agent import SourcingAgent
-from ..core.sourcing_templates import generate_queries
+from ..core.query_planner import get_batch_size, plan_pending
+from ..core.search import SEARCH_STATS
 from ..agents.extraction_agent import ExtractionAgent
 from ..agents.validation_agent import ValidationAgent
 from ..agents.merge_agent import MergeAgent
@@ -26,6 +32,32 @@ from ..agents.merge_agent import MergeAgent
 app = typer.Typer(add_completion=False)
 
 
+@dataclass
+class WorkerAgents:
+    """Per-worker agents; they keep per-run state (e.g. `SourcingAgent.last_stats`), the vector store is shared."""
+
+    sourcing: SourcingAgent
+    extraction: ExtractionAgent
+    validation: ValidationAgent
+    merge: MergeAgent
+
+
+class CycleBudget:
+    """`--max-cycles` shared by all workers: each claim attempt takes one cycle (0 = unbounded)."""
+
+    def __init__(self, max_cycles: int):
+        self.max_cycles = max_cycles
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self.max_cycles and self.used >= self.max_cycles:
+                return False
+            self.used += 1
+            return True
+
+
 @app.command()
 def workers(
     workers: int = 2,
@@ -45,18 +77,20 @@ def workers(
     queue_file.parent.mkdir(parents=True, exist_ok=True)
     if not queue_file.exists():
         queue_file.write_text("[]")
-    task_manager = TaskManagerAgent(queue_file)
     base_dir = project_root()
+    workers = max(1, workers)
+    if workers > 1 and get_queue_backend() == "json":
+        # Each JSON queue instance holds its own in-memory copy; concurrent writers would overwrite each other
+        logger.warning("QUEUE_BACKEND=json supports a single worker; running with --workers 1")
+        workers = 1
 
+    vector = None
+    research_agent = None
     if use_celery:
-        from ..agents.tasks import process_jurisdiction  # Lazy import to avoid Celery overhead when not used
+        from ..agents.tasks import dispatch_pipeline  # Lazy import to avoid Celery overhead when not used
     else:
+        # One store per process: its writes are serialized internally, so workers share the loaded index
         vector = VectorStore(index_path=settings.vector_db_path, api_key=settings.openai_api_key, base_url=settings.openai_base_url)
-        sourcing = SourcingAgent(vector)
-        extraction = ExtractionAgent(vector)
-        validation = ValidationAgent()
-        merge = MergeAgent()
-        research_agent = None
         if deep_research:
             try:
                 from ..core.research_agent import build_agent  # Lazy import to avoid optional deps when unused
@@ -65,104 +99,250 @@ def workers(
             except Exception:
                 research_agent = None
 
-    cycles = 0
-    while True:
-        if max_cycles and cycles >= max_cycles:
-            logger.info("Reached max cycles. Exiting.")
-            break
-        cycles += 1
-        task = task_manager.next(base_dir=base_dir)
-        if task is None:
-            logger.info("No pending tasks. Sleeping...")
-            time.sleep(idle_sleep)
-            continue
+    # Jurisdictions sourced by an earlier task's query batch -> (the pending task's inserted_at, docs collected,
+    # crawl budget used, monotonic time sourced). Only that same queued task reuses an entry: one re-enqueued after
+    # another process ran it is sourced afresh. Entries nobody here claims within a lease are dropped.
+    batch_sourced: dict[str, tuple] = {}
+    batch_lock = threading.Lock()
+    budget = CycleBudget(max_cycles)
+    stop = threading.Event()
+    totals = {"completed": 0, "error": 0, "queued": 0}
+    totals_lock = threading.Lock()
+    waiters: List[QueueWaiter] = []
 
+    def run_task(task_manager: TaskManagerAgent, agents: Optional[WorkerAgents], task) -> str:
+        """Run one claimed task end to end; returns its outcome (completed | error | queued)."""
         jurisdiction = task.jurisdiction_path
-        # Generate a trace ID for this run
-        trace_id = f"run-{int(time.time()*1000)}-{jurisdiction.replace('/', '_')}"
+        # Trace ID per queued task (not per attempt), so a re-claimed or requeued task resumes its checkpoints
+        trace_id = f"run-{int(task.inserted_at.timestamp()*1000)}-{jurisdiction.replace('/', '_')}"
         set_trace_id(trace_id)
-        logger.info(f"Starting task: {jurisdiction} | trace_id={trace_id}")
+        logger.info(f"Starting task: {jurisdiction} | trace_id={trace_id} attempt={task.attempts}")
         started_monotonic = time.monotonic()
+        run_metrics: dict = {}
         record_run(settings.database_url, jurisdiction, status="in_progress", trace_id=trace_id)
+        # Heartbeat the claim while this worker holds it; a crashed worker's lease expires and is reclaimed
+        lease = task_manager.keep_alive(task)
 
         try:
             if use_celery:
-                res = process_jurisdiction.delay(jurisdiction, skip_validation=skip_validation, skip_merge=skip_merge, trace_id=trace_id)
+                # Celery retries and dead-letters on its own; stop the lease so the task is not re-dispatched.
+                # Handed off before dispatch: the chain's last task closes the claim as this owner, maybe before dispatch returns
+                owner = f"celery:{trace_id}"
+                task_manager.hand_off(jurisdiction, owner=owner)
+                try:
+                    # One task per stage, each on its own queue; the result id is the final (merge) task's
+                    res = dispatch_pipeline(
+                        jurisdiction,
+                        skip_validation=skip_validation,
+                        skip_merge=skip_merge,
+                        trace_id=trace_id,
+                        queue_path=str(queue_file),
+                        queue_owner=owner,
+                    )
+                except Exception as e:
+                    logger.exception(f"Celery dispatch failed: {jurisdiction}: {e}")
+                    task_manager.queue.mark_error(jurisdiction, f"dispatch failed: {e}", worker_id=owner)
+                    record_run(settings.database_url, jurisdiction, status="error", metrics={"error": str(e)}, trace_id=trace_id)
+                    return "error"
                 logger.info(f"Queued Celery task id={res.id} for {jurisdiction} | trace_id={trace_id}")
                 from ..core.notifications import notify_slack
                 notify_slack(f"Queued task: {jurisdiction} (id={res.id})")
-            else:
-                # 1) Sourcing
+                return "queued"
+
+            assert agents is not None
+            sourcing = agents.sourcing
+            stages = StageRun(trace_id, get_checkpoint_store())
+
+            # 1) Sourcing
+            def source() -> dict:
                 if deep_research and research_agent is not None:
                     try:
                         _ = research_agent.invoke({"query": f"FCRA compliance {jurisdiction}"})  # type: ignore[operator]
                         logger.info(f"Deep research pre-run completed for {jurisdiction}")
                     except Exception:
                         logger.info("Deep research not available or failed; continuing with standard pipeline")
-                queries = generate_queries(
-                    jurisdiction,
-                    topics=[
-                        "fair chance ordinance",
-                        "ban the box employment",
-                        "criminal history in employment",
-                    ],
+                with batch_lock:
+                    batched = batch_sourced.pop(jurisdiction, None)
+                if batched is not None and batched[0] == task.inserted_at:
+                    # Already sourced as part of an earlier batch (possibly by another worker); its documents carry this tag
+                    logger.info(f"Sources collected in earlier batch for {jurisdiction}: {batched[1]} docs")
+                    return {"num_docs": batched[1], "crawl_budget": batched[2]}
+                plan = plan_pending(task_manager.queue, first=jurisdiction)
+                # The queued tasks the plan covers, read before the crawl so a re-enqueue meanwhile does not match
+                queued = {t.jurisdiction_path: t.inserted_at for t in task_manager.queue.pending(limit=get_batch_size())}
+                per_jurisdiction = sourcing.collect_plan(plan)
+                now = time.monotonic()
+                with batch_lock:
+                    for other in [j for j, entry in batch_sourced.items() if now - entry[3] > get_lease_s()]:
+                        del batch_sourced[other]
+                    for other, docs in per_jurisdiction.items():
+                        if other != jurisdiction and other in queued:
+                            batch_sourced[other] = (queued[other], len(docs), sourcing.last_crawl_budget.get(other), now)
+                return {
+                    "num_docs": len(per_jurisdiction.get(jurisdiction, [])),
+                    "crawl_budget": sourcing.last_crawl_budget.get(jurisdiction),
+                    "query_plan": plan.summary(),
+                    "sourcing": sourcing.last_stats.summary(),
+                }
+
+            sourced, resumed = stages.stage("sourcing", {"jurisdiction": jurisdiction}, source)
+            num_docs = sourced["num_docs"]
+            if not resumed:
+                for key in ("query_plan", "sourcing", "crawl_budget"):
+                    if sourced.get(key):
+                        run_metrics[key] = sourced[key]
+            try:
+                if num_docs == 0 and not resumed:
+                    from ..core.notifications import notify_slack  # type: ignore
+                    notify_slack(f"No sources found for {jurisdiction}")
+            except Exception:
+                pass
+
+            # 2) Extraction
+            schema_skeleton = {"jurisdiction": jurisdiction}
+            extracted, _ = stages.stage(
+                "extraction",
+                {"schema": schema_skeleton, "sourcing": sourced},
+                lambda: {"patch": agents.extraction.run(jurisdiction, schema_skeleton)},
+            )
+            patch = extracted["patch"]
+
+            # 3) Write patch temp file
+            patch_path = project_root() / "research_inputs" / f"{Path(jurisdiction).stem}.json"
+            patch_path.write_text(json.dumps(patch, indent=2))
+
+            # 4) Validation (only passing outcomes are checkpointed; the target file's hash is an input)
+            jurisdiction_file = project_root() / jurisdiction
+            if not skip_validation:
+
+                def validate() -> dict:
+                    ok, details = agents.validation.run(jurisdiction_file, patch_path)
+                    return {"ok": ok, "details": details}
+
+                validated, _ = stages.stage(
+                    "validation",
+                    {"patch": patch, "target": file_digest(jurisdiction_file)},
+                    validate,
+                    keep=lambda out: bool(out["ok"]),
                 )
-                # Fallback canonical URL probe
-                queries.append(f"https://law.justia.com/codes/{jurisdiction}")
-                src_res = sourcing.run(jurisdiction, queries)
-                try:
-                    if src_res.get("num_docs", 0) == 0:
+                if not validated["ok"]:
+                    details = validated["details"]
+                    logger.error(f"Validation failed for {jurisdiction}: {details}")
+                    task_manager.mark_error(jurisdiction, "validation_failed")
+                    record_run(settings.database_url, jurisdiction, status="error", metrics=details, trace_id=trace_id)
+                    return "error"
+            if stages.resumed:
+                run_metrics["resumed_stages"] = list(stages.resumed)
+
+            # 5) Merge
+            if not skip_merge:
+                ok, details = agents.merge.run(jurisdiction_file, patch_path)
+                if not ok:
+                    logger.error(f"Merge failed for {jurisdiction}: {details}")
+                    task_manager.mark_error(jurisdiction, "merge_failed")
+                    record_run(settings.database_url, jurisdiction, status="error", metrics=details, trace_id=trace_id)
+                    return "error"
+
+            task_manager.mark_completed(jurisdiction)
+            stages.complete()
+            # Cumulative per-provider latency/contribution for this worker process
+            search_stats = SEARCH_STATS.snapshot()
+            if search_stats:
+                run_metrics["search_providers"] = search_stats
+            record_run(
+                settings.database_url,
+                jurisdiction,
+                status="completed",
+                metrics=run_metrics or None,
+                trace_id=trace_id,
+            )
+            logger.info(f"Completed task: {jurisdiction} | trace_id={trace_id}")
+            # Long-running alert
+            try:
+                threshold = getattr(settings, "long_running_seconds", None)
+                if threshold is not None:
+                    elapsed = time.monotonic() - started_monotonic
+                    if elapsed >= float(threshold):
                         from ..core.notifications import notify_slack  # type: ignore
-                        notify_slack(f"No sources found for {jurisdiction}")
-                except Exception:
-                    pass
-
-                # 2) Extraction
-                schema_skeleton = {"jurisdiction": jurisdiction}
-                patch = extraction.run(jurisdiction, schema_skeleton)
-
-                # 3) Write patch temp file
-                patch_path = project_root() / "research_inputs" / f"{Path(jurisdiction).stem}.json"
-                patch_path.write_text(json.dumps(patch, indent=2))
-
-                # 4) Validation
-                jurisdiction_file = project_root() / jurisdiction
-                if not skip_validation:
-                    ok, details = validation.run(jurisdiction_file, patch_path)
-                    if not ok:
-                        logger.error(f"Validation failed for {jurisdiction}: {details}")
-                        task_manager.mark_error(jurisdiction, "validation_failed")
-                        record_run(settings.database_url, jurisdiction, status="error", metrics=details, trace_id=trace_id)
-                        continue
-
-                # 5) Merge
-                if not skip_merge:
-                    ok, details = merge.run(jurisdiction_file, patch_path)
-                    if not ok:
-                        logger.error(f"Merge failed for {jurisdiction}: {details}")
-                        task_manager.mark_error(jurisdiction, "merge_failed")
-                        record_run(settings.database_url, jurisdiction, status="error", metrics=details, trace_id=trace_id)
-                        continue
-
-                task_manager.mark_completed(jurisdiction)
-                record_run(settings.database_url, jurisdiction, status="completed", trace_id=trace_id)
-                logger.info(f"Completed task: {jurisdiction} | trace_id={trace_id}")
-                # Long-running alert
-                try:
-                    threshold = getattr(settings, "long_running_seconds", None)
-                    if threshold is not None:
-                        elapsed = time.monotonic() - started_monotonic
-                        if elapsed >= float(threshold):
-                            from ..core.notifications import notify_slack  # type: ignore
-                            notify_slack(
-                                f"Long-running task completed: {jurisdiction} in {elapsed:.1f}s (threshold {threshold}s)"
-                            )
-                except Exception:
-                    pass
+                        notify_slack(
+                            f"Long-running task completed: {jurisdiction} in {elapsed:.1f}s (threshold {threshold}s)"
+                        )
+            except Exception:
+                pass
+            return "completed"
         except Exception as e:
             logger.exception(f"Task failed: {jurisdiction}: {e}")
             task_manager.mark_error(jurisdiction, str(e))
             record_run(settings.database_url, jurisdiction, status="error", metrics={"error": str(e)}, trace_id=trace_id)
+            return "error"
+        finally:
+            lease.stop()
+
+    def worker_loop(index: int) -> None:
+        task_manager = TaskManagerAgent(queue_file, worker_id=f"{default_worker_id()}:w{index}")
+        agents = None
+        if vector is not None:
+            agents = WorkerAgents(SourcingAgent(vector), ExtractionAgent(vector), ValidationAgent(), MergeAgent())
+        # Enqueues wake idle workers right away; idle_sleep is only the fallback poll interval
+        waiter = QueueWaiter(queue_file)
+        waiters.append(waiter)
+        try:
+            while not stop.is_set():
+                if not budget.take():
+                    logger.info("Reached max cycles. Exiting.")
+                    break
+                try:
+                    task = task_manager.next(base_dir=base_dir)
+                except Exception as e:
+                    logger.exception(f"worker={index} dequeue failed: {e}")
+                    stop.wait(idle_sleep)
+                    continue
+                if task is None:
+                    logger.info("No pending tasks. Sleeping...")
+                    waiter.wait(idle_sleep)
+                    continue
+                outcome = run_task(task_manager, agents, task)
+                with totals_lock:
+                    totals[outcome] += 1
+        finally:
+            waiter.close()
+
+    def request_stop(signum, frame) -> None:
+        # Stop claiming; tasks in flight run to completion and are marked as usual
+        logger.info(f"Received signal {signum}; finishing in-flight tasks before exit")
+        stop.set()
+        for waiter in list(waiters):
+            waiter.wake()
+
+    previous_handlers = {}
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            previous_handlers[sig] = signal.signal(sig, request_stop)
+
+    started = time.monotonic()
+    threads: List[threading.Thread] = [
+        threading.Thread(target=worker_loop, args=(i,), name=f"runner-worker-{i}") for i in range(workers)
+    ]
+    logger.info(f"Starting {workers} worker(s) queue={queue_file}")
+    try:
+        for t in threads:
+            t.start()
+        # Join with a timeout so signal handlers keep running on the main thread
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=0.5)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+        for sig, handler in previous_handlers.items():
+            signal.signal(sig, handler)
+    elapsed = time.monotonic() - started
+    done = totals["completed"] + totals["error"] + totals["queued"]
+    logger.info(
+        f"Runner stopped workers={workers} completed={totals['completed']} errors={totals['error']}"
+        f" queued={totals['queued']} elapsed_s={elapsed:.1f} tasks_per_hour={done * 3600 / elapsed if elapsed else 0:.1f}"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+from .sourcing_templates import infer_type_and_tokens
+
+
+def state_of(jurisdiction_path: str) -> str:
+    """Fairness bucket of a jurisdiction: its state ("" when the path does not name one)."""
+    _, tokens = infer_type_and_tokens(jurisdiction_path)
+    return (tokens.get("state") or "").strip().lower().replace(" ", "_")
+
+
+def host_group_of(jurisdiction_path: str) -> Optional[str]:
+    """
+    Concurrency group: jurisdictions of one state source largely from the same
+    legislature and code-publisher sites. None (uncapped) without a known state.
+    """
+    return state_of(jurisdiction_path) or None
+
+
+def _parse_map(raw: str, cast) -> dict:
+    """'ca=3,ny=2' -> {"ca": 3, "ny": 2}; malformed entries are ignored."""
+    out: dict = {}
+    for item in raw.split(","):
+        key, sep, value = item.partition("=")
+        if not sep or not key.strip():
+            continue
+        try:
+            out[key.strip().lower()] = cast(value.strip())
+        except Exception:
+            continue
+    return out
+
+
+@dataclass
+class SchedulerConfig:
+    """
+    QUEUE_AGING_S: a pending task gains one priority point per period it has waited (0 disables aging).
+    QUEUE_STATE_WEIGHTS: weighted round-robin shares per state, e.g. "ca=3,ny=2" (others weigh 1).
+    QUEUE_HOST_GROUP_CAP: claims with a live lease per host group (default 0 = unlimited, so
+    --workers and Celery concurrency still scale a single-state backlog); QUEUE_HOST_GROUP_CAPS
+    overrides it per group, e.g. "ca=4".
+    """
+
+    aging_s: float = 3600.0
+    weights: Dict[str, float] = field(default_factory=dict)
+    host_group_cap: int = 0
+    host_group_caps: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def aging_rate(self) -> float:
+        return 1.0 / self.aging_s if self.aging_s > 0 else 0.0
+
+    def weight(self, state: str) -> float:
+        return max(self.weights.get(state, 1.0), 1e-6)
+
+    def cap(self, group: Optional[str]) -> int:
+        if group is None:
+            return 0
+        return self.host_group_caps.get(group, self.host_group_cap)
+
+    def capped_groups(self, running: Mapping[str, int]) -> set:
+        """Host groups whose live claims are at their cap."""
+        return {g for g, n in running.items() if self.cap(g) and n >= self.cap(g)}
+
+
+def get_scheduler_config() -> SchedulerConfig:
+    try:
+        aging_s = float(os.getenv("QUEUE_AGING_S", "3600"))
+    except Exception:
+        aging_s = 3600.0
+    try:
+        cap = max(0, int(os.getenv("QUEUE_HOST_GROUP_CAP", "0")))
+    except Exception:
+        cap = 0
+    return SchedulerConfig(
+        aging_s=aging_s,
+        weights=_parse_map(os.getenv("QUEUE_STATE_WEIGHTS", ""), float),
+        host_group_cap=cap,
+        host_group_caps=_parse_map(os.getenv("QUEUE_HOST_GROUP_CAPS", ""), int),
+    )
+
+
+def sched_key(effective_priority: int, inserted_at: float, aging_rate: float) -> int:
+    """
+    Dequeue rank (higher first): the effective priority plus one point per aging period waited.
+    Written as priority minus the insert period, which orders tasks exactly as "priority + age"
+    does at any moment (now is common to all tasks), so the stored key never goes stale with time.
+    """
+    return int(effective_priority) - int(inserted_at * aging_rate)
+
+
+def pick_state(
+    heads: Mapping[str, Sequence],
+    vtimes: Mapping[str, float],
+    system_vtime: float,
+    config: SchedulerConfig,
+) -> Tuple[Optional[str], float, float]:
+    """
+    Weighted round-robin over states with a claimable task, by virtual time (start-time fair
+    queueing). A state's next claim starts at its own clock, but never before the system clock,
+    so a state returning from idle (or new) cannot bank credit. The earliest start goes next and
+    advances its state's clock by 1/weight: while both have work, a weight-3 state gets three
+    claims per claim of a weight-1 state. `heads` maps state -> `order_key` of its best task,
+    which breaks ties between equal starts.
+
+    Returns (state, the state's new clock, the new system clock); state is None without heads.
+    """
+    if not heads:
+        return None, 0.0, system_vtime
+    starts = {s: max(vtimes.get(s, 0.0), system_vtime) for s in heads}
+    state = min(heads, key=lambda s: (starts[s], heads[s]))
+    return state, starts[state] + 1.0 / config.weight(state), starts[state]
+
+
+def order_key(key: int, gaps: int, inserted_at: float, tie: int = 0) -> Sequence:
+    """Sort key of a pending task within and across states (lower first)."""
+    return (-key, -gaps, inserted_at, tie)
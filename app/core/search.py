@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import os
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from time import sleep
-from typing import List, Optional
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
 
 import httpx
 
 from .logger import setup_logger
+from .rate_limit import get_guard, parse_retry_after
+from .urlnorm import canonical_url
 
 logger = setup_logger("search")
 
@@ -21,148 +27,583 @@ class SearchResult:
 
 
 class SearchProvider:
+    name = "provider"
+
     def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
         raise NotImplementedError
 
+    async def asearch(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        """Async search; providers without a native implementation run `search` in a worker thread."""
+        return await asyncio.to_thread(self.search, query, num_results)
+
+
+class SearchProviderError(RuntimeError):
+    """
+    Structured provider failure, raised instead of returning an empty list.
+
+    `kind` is one of: rate_limited, circuit_open, timeout, http_error, transport, error.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        kind: str,
+        message: str = "",
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(f"{provider} {kind}{f': {message}' if message else ''}")
+        self.provider = provider
+        self.kind = kind
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def transient(self) -> bool:
+        return self.kind in ("rate_limited", "timeout", "transport") or (self.status_code or 0) >= 500
+
+
+def _admit(provider: str):
+    guard = get_guard(provider)
+    admitted = guard.breaker.admit()
+    if admitted is None:
+        raise SearchProviderError(provider, "circuit_open", retry_after=guard.breaker.retry_in())
+    return guard, admitted == "probe"
+
+
+def _check_response(provider: str, guard, resp: httpx.Response) -> httpx.Response:
+    if resp.status_code == 429:
+        retry_after = parse_retry_after(resp.headers.get("retry-after"))
+        guard.bucket.throttle(retry_after)
+        raise SearchProviderError(provider, "rate_limited", status_code=429, retry_after=retry_after)
+    if resp.status_code >= 500:
+        guard.breaker.record_failure()
+        raise SearchProviderError(provider, "http_error", f"HTTP {resp.status_code}", status_code=resp.status_code)
+    if resp.status_code >= 400:
+        # Client errors (bad key, quota config) are not outages; report without tripping the breaker
+        raise SearchProviderError(provider, "http_error", f"HTTP {resp.status_code}", status_code=resp.status_code)
+    guard.breaker.record_success()
+    guard.bucket.succeed()
+    return resp
+
+
+def _transport_error(provider: str, guard, e: httpx.HTTPError) -> SearchProviderError:
+    guard.breaker.record_failure()
+    kind = "timeout" if isinstance(e, httpx.TimeoutException) else "transport"
+    return SearchProviderError(provider, kind, str(e))
+
+
+def guarded_request(provider: str, send: Callable[[], httpx.Response]) -> httpx.Response:
+    """
+    Send one provider request through its shared rate limiter and circuit breaker.
+
+    429s throttle the provider's token bucket (honouring Retry-After); timeouts,
+    transport errors and 5xx count toward opening the breaker, after which calls
+    fail fast with `circuit_open` until the reset timeout allows a probe. A probe
+    that ends any other way (429, 4xx, limiter wait, cancellation) is released so
+    the next call probes again.
+    """
+    guard, probe = _admit(provider)
+    try:
+        if not guard.bucket.acquire(timeout=guard.max_wait_s):
+            raise SearchProviderError(provider, "rate_limited", "local limiter wait exceeded")
+        try:
+            resp = send()
+        except httpx.HTTPError as e:
+            raise _transport_error(provider, guard, e) from e
+        return _check_response(provider, guard, resp)
+    finally:
+        if probe:
+            # Outcomes that neither close nor reopen the breaker must not leave it half-open for good
+            guard.breaker.release_probe()
+
+
+async def aguarded_request(provider: str, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+    """`guarded_request` for coroutines; limiter waits do not block the event loop."""
+    guard, probe = _admit(provider)
+    try:
+        if not await guard.bucket.acquire_async(timeout=guard.max_wait_s):
+            raise SearchProviderError(provider, "rate_limited", "local limiter wait exceeded")
+        try:
+            resp = await send()
+        except httpx.HTTPError as e:
+            raise _transport_error(provider, guard, e) from e
+        return _check_response(provider, guard, resp)
+    finally:
+        if probe:
+            guard.breaker.release_probe()
+
+
+def _new_async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(timeout=20)
+
+
+# One AsyncClient per event loop: connections are bound to the loop that opened them
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def async_client() -> httpx.AsyncClient:
+    """Shared AsyncClient for the running loop, so concurrent provider calls reuse connections."""
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        client = _new_async_client()
+        _ASYNC_CLIENTS[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    client = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS: tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, float("inf"))
+
+
+class ProviderStats:
+    """Thread-safe per-provider latency histograms and contribution counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict] = {}
+
+    def _entry(self, name: str) -> Dict:
+        entry = self._data.get(name)
+        if entry is None:
+            entry = {
+                "calls": 0,
+                "dropped": 0,
+                "failures": {},
+                "results": 0,
+                "contributed": 0,
+                "latency_sum": 0.0,
+                "histogram": [0] * len(LATENCY_BUCKETS),
+            }
+            self._data[name] = entry
+        return entry
+
+    def record(self, name: str, latency_s: float, returned: int) -> None:
+        with self._lock:
+            entry = self._entry(name)
+            entry["calls"] += 1
+            entry["results"] += returned
+            entry["latency_sum"] += latency_s
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency_s <= bound:
+                    entry["histogram"][i] += 1
+                    break
+
+    def record_failure(self, name: str, kind: str) -> None:
+        with self._lock:
+            failures = self._entry(name)["failures"]
+            failures[kind] = failures.get(kind, 0) + 1
+
+    def record_dropped(self, name: str) -> None:
+        with self._lock:
+            self._entry(name)["dropped"] += 1
+
+    def record_contribution(self, name: str, contributed: int) -> None:
+        with self._lock:
+            self._entry(name)["contributed"] += contributed
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per provider: calls, drops, failures by kind, mean latency, histogram, and share of merged results contributed."""
+        with self._lock:
+            out: Dict[str, Dict] = {}
+            for name, e in self._data.items():
+                out[name] = {
+                    "calls": e["calls"],
+                    "dropped": e["dropped"],
+                    "failures": dict(e["failures"]),
+                    "avg_latency_s": round(e["latency_sum"] / e["calls"], 4) if e["calls"] else 0.0,
+                    "latency_histogram": {
+                        ("inf" if b == float("inf") else str(b)): n for b, n in zip(LATENCY_BUCKETS, e["histogram"])
+                    },
+                    "results": e["results"],
+                    "contributed": e["contributed"],
+                    "contribution_rate": round(e["contributed"] / e["results"], 4) if e["results"] else 0.0,
+                }
+            return out
+
+
+# Process-wide stats shared by every CombinedSearchProvider unless one is injected
+SEARCH_STATS = ProviderStats()
+
+_SEARCH_POOL: Optional[ThreadPoolExecutor] = None
+_SEARCH_POOL_LOCK = threading.Lock()
+
+
+def _search_pool() -> ThreadPoolExecutor:
+    # Long-lived shared pool: calls abandoned past their budget must not block callers on shutdown
+    global _SEARCH_POOL
+    with _SEARCH_POOL_LOCK:
+        if _SEARCH_POOL is None:
+            _SEARCH_POOL = ThreadPoolExecutor(
+                max_workers=int(os.getenv("SEARCH_FANOUT_WORKERS", "16")), thread_name_prefix="search"
+            )
+        return _SEARCH_POOL
+
 
 class GoogleCSEProvider(SearchProvider):
+    name = "google_cse"
+    endpoint = "https://www.googleapis.com/customsearch/v1"
+
     def __init__(self, api_key: Optional[str], cse_id: Optional[str]):
         self.api_key = api_key
         self.cse_id = cse_id
 
+    def _params(self, query: str, num_results: int) -> Dict:
+        return {"key": self.api_key, "cx": self.cse_id, "q": query, "num": min(num_results, 10)}
+
+    def _parse(self, resp: httpx.Response) -> List[SearchResult]:
+        try:
+            items = resp.json().get("items") or []
+        except Exception as e:
+            raise SearchProviderError(self.name, "error", f"bad response: {e}") from e
+        return [
+            SearchResult(url=it.get("link"), title=it.get("title", ""), snippet=it.get("snippet", ""))
+            for it in items
+        ]
+
     def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
         if not self.api_key or not self.cse_id:
             return []
-        try:
-            resp = httpx.get(
-                "https://www.googleapis.com/customsearch/v1",
-                params={"key": self.api_key, "cx": self.cse_id, "q": query, "num": min(num_results, 10)},
-                timeout=20,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            items = data.get("items") or []
-            results: List[SearchResult] = []
-            for it in items:
-                results.append(
-                    SearchResult(
-                        url=it.get("link"),
-                        title=it.get("title", ""),
-                        snippet=it.get("snippet", ""),
-                    )
-                )
-            return results
-        except Exception as e:
-            logger.error(f"Google CSE error: {e}")
+        params = self._params(query, num_results)
+        return self._parse(guarded_request(self.name, lambda: httpx.get(self.endpoint, params=params, timeout=20)))
+
+    async def asearch(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        if not self.api_key or not self.cse_id:
             return []
+        params = self._params(query, num_results)
+        return self._parse(await aguarded_request(self.name, lambda: async_client().get(self.endpoint, params=params)))
 
 
 class PerplexityProvider(SearchProvider):
+    name = "perplexity"
+    # Perplexity API: simple search-like endpoint (mocked usage)
+    # Using hypothetical endpoint for offline-friendly tests
+    endpoint = "https://api.perplexity.ai/search"
+
     def __init__(self, api_key: Optional[str]):
         self.api_key = api_key
 
+    def _parse(self, resp: httpx.Response) -> List[SearchResult]:
+        try:
+            items = resp.json().get("results") or []
+        except Exception as e:
+            raise SearchProviderError(self.name, "error", f"bad response: {e}") from e
+        return [
+            SearchResult(url=it.get("url"), title=it.get("title", ""), snippet=it.get("snippet", ""))
+            for it in items
+        ]
+
     def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
         if not self.api_key:
             return []
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        body = {"q": query, "k": num_results}
+        return self._parse(
+            guarded_request(self.name, lambda: httpx.post(self.endpoint, headers=headers, json=body, timeout=20))
+        )
+
+    async def asearch(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        if not self.api_key:
+            return []
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        body = {"q": query, "k": num_results}
+        return self._parse(
+            await aguarded_request(self.name, lambda: async_client().post(self.endpoint, headers=headers, json=body))
+        )
+
+
+class SearxngProvider(SearchProvider):
+    name = "searxng"
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        # Retry controls via env; pacing comes from the shared limiter in guarded_request
+        self.max_attempts = int(os.getenv("SEARXNG_MAX_ATTEMPTS", "3"))
+        self.min_backoff = float(os.getenv("SEARXNG_MIN_BACKOFF", "0.5"))
+        self.max_backoff = float(os.getenv("SEARXNG_MAX_BACKOFF", "4.0"))
+
+    def _params(self, query: str) -> Dict:
+        full_query = f"{query} site:gov OR site:us OR site:*.state.* filetype:pdf OR filetype:html"
+        return {"q": full_query, "format": "json"}
+
+    def _parse(self, resp: httpx.Response, num_results: int) -> List[SearchResult]:
         try:
-            # Perplexity API: simple search-like endpoint (mocked usage)
-            # Using hypothetical endpoint for offline-friendly tests
-            resp = httpx.post(
-                "https://api.perplexity.ai/search",
-                headers={"Authorization": f"Bearer {self.api_key}"},
-                json={"q": query, "k": num_results},
-                timeout=20,
-            )
-            resp.raise_for_status()
             data = resp.json()
-            items = data.get("results") or []
-            results: List[SearchResult] = []
-            for it in items:
-                results.append(
-                    SearchResult(
-                        url=it.get("url"),
-                        title=it.get("title", ""),
-                        snippet=it.get("snippet", ""),
-                    )
+        except ValueError as e:
+            raise SearchProviderError(self.name, "error", f"bad response: {e}") from e
+        return [
+            SearchResult(url=it.get("url"), title=it.get("title", ""), snippet=it.get("content", ""))
+            for it in (data.get("results") or [])[:num_results]
+        ]
+
+    def _next_backoff(self, e: SearchProviderError, attempt: int, backoff: float) -> Optional[float]:
+        """Seconds to sleep before retrying, or None to give up and re-raise."""
+        if not e.transient or attempt >= self.max_attempts:
+            return None
+        # 429 waits are handled by the limiter's Retry-After block on the next acquire
+        return 0.0 if e.kind == "rate_limited" else backoff
+
+    def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        params = self._params(query)
+        backoff = self.min_backoff
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                resp = guarded_request(
+                    self.name, lambda: httpx.get(f"{self.base_url}/search", params=params, timeout=20)
                 )
-            return results
-        except Exception as e:
-            logger.error(f"Perplexity error: {e}")
-            return []
+                return self._parse(resp, num_results)
+            except SearchProviderError as e:
+                delay = self._next_backoff(e, attempt, backoff)
+                if delay is None:
+                    raise
+                if delay:
+                    time.sleep(delay)
+                    backoff = min(self.max_backoff, backoff * 2)
+        return []
+
+    async def asearch(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        params = self._params(query)
+        backoff = self.min_backoff
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                resp = await aguarded_request(
+                    self.name, lambda: async_client().get(f"{self.base_url}/search", params=params)
+                )
+                return self._parse(resp, num_results)
+            except SearchProviderError as e:
+                delay = self._next_backoff(e, attempt, backoff)
+                if delay is None:
+                    raise
+                if delay:
+                    await asyncio.sleep(delay)
+                    backoff = min(self.max_backoff, backoff * 2)
+        return []
 
 
 class CombinedSearchProvider(SearchProvider):
-    def __init__(self, providers: List[SearchProvider]):
+    """
+    Fan a query out to all providers concurrently and merge in provider order.
+
+    - `hedged`: return as soon as `num_results` unique URLs have arrived, without
+      waiting for slower providers.
+    - `provider_budget_s`: providers that have not answered within the budget are
+      dropped from this query (their call finishes in the background).
+    Per-provider latency and contribution are recorded in `stats`.
+    """
+
+    name = "combined"
+
+    def __init__(
+        self,
+        providers: List[SearchProvider],
+        hedged: bool = False,
+        provider_budget_s: Optional[float] = None,
+        stats: Optional[ProviderStats] = None,
+    ):
         self.providers = providers
+        self.hedged = hedged
+        self.provider_budget_s = provider_budget_s
+        self.stats = stats or SEARCH_STATS
+
+    def _record_error(self, provider: SearchProvider, e: Exception) -> None:
+        if isinstance(e, SearchProviderError):
+            logger.warning(f"{provider.name} search failed kind={e.kind} err={e}")
+            self.stats.record_failure(provider.name, e.kind)
+        else:
+            logger.error(f"{provider.name} search error: {e}")
+            self.stats.record_failure(provider.name, "error")
+
+    def _timed_search(self, provider: SearchProvider, query: str, num_results: int) -> List[SearchResult]:
+        started = time.monotonic()
+        try:
+            results = provider.search(query, num_results)
+        except Exception as e:
+            self._record_error(provider, e)
+            results = []
+        self.stats.record(provider.name, time.monotonic() - started, len(results))
+        return results
+
+    async def _atimed_search(self, provider: SearchProvider, query: str, num_results: int) -> List[SearchResult]:
+        started = time.monotonic()
+        try:
+            results = await provider.asearch(query, num_results)
+        except Exception as e:
+            self._record_error(provider, e)
+            results = []
+        self.stats.record(provider.name, time.monotonic() - started, len(results))
+        return results
 
     def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        futures: Dict[Future, int] = {
+            _search_pool().submit(self._timed_search, p, query, num_results): i for i, p in enumerate(self.providers)
+        }
+        arrived: Dict[int, List[SearchResult]] = {}
+        unique_urls: set[str] = set()
+        pending = set(futures)
+        budget_at = time.monotonic() + self.provider_budget_s if self.provider_budget_s else None
+        while pending:
+            timeout = max(0.0, budget_at - time.monotonic()) if budget_at is not None else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break  # budget exhausted
+            for fut in done:
+                results = fut.result()
+                arrived[futures[fut]] = results
+                unique_urls.update(canonical_url(r.url) for r in results if r.url)
+            if self.hedged and len(unique_urls) >= num_results:
+                break
+        for fut in pending:
+            self.stats.record_dropped(self.providers[futures[fut]].name)
+        return self._merge(arrived, num_results)
+
+    async def asearch(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        tasks: Dict[asyncio.Task, int] = {
+            asyncio.ensure_future(self._atimed_search(p, query, num_results)): i for i, p in enumerate(self.providers)
+        }
+        arrived: Dict[int, List[SearchResult]] = {}
+        unique_urls: set[str] = set()
+        pending = set(tasks)
+        budget_at = time.monotonic() + self.provider_budget_s if self.provider_budget_s else None
+        while pending:
+            timeout = max(0.0, budget_at - time.monotonic()) if budget_at is not None else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break  # budget exhausted
+            for task in done:
+                results = task.result()
+                arrived[tasks[task]] = results
+                unique_urls.update(canonical_url(r.url) for r in results if r.url)
+            if self.hedged and len(unique_urls) >= num_results:
+                break
+        for task in pending:
+            # Unlike pool threads, coroutines past the budget can actually be cancelled
+            task.cancel()
+            self.stats.record_dropped(self.providers[tasks[task]].name)
+        return self._merge(arrived, num_results)
+
+    def _merge(self, arrived: Dict[int, List[SearchResult]], num_results: int) -> List[SearchResult]:
+        # Merge in provider order so dedupe keeps the historical precedence; URLs compare canonically
         merged: List[SearchResult] = []
         seen = set()
-        for p in self.providers:
-            for r in p.search(query, num_results):
-                if not r.url or r.url in seen:
+        for i, p in enumerate(self.providers):
+            contributed = 0
+            for r in arrived.get(i, []):
+                if len(merged) >= num_results:
+                    break
+                key = canonical_url(r.url) if r.url else ""
+                if not key or key in seen:
                     continue
-                seen.add(r.url)
+                seen.add(key)
                 merged.append(r)
-                if len(merged) >= num_results:
-                    return merged
+                contributed += 1
+            if i in arrived:
+                self.stats.record_contribution(p.name, contributed)
         return merged
 
+
 class NullSearchProvider(SearchProvider):
+    name = "null"
+
     def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
         return []
 
+    async def asearch(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        return []
+
+
+async def asearch_many(
+    provider: SearchProvider,
+    queries: Iterable[str],
+    num_results: int = 5,
+    timeout: Optional[float] = None,
+) -> Dict[str, List[SearchResult]]:
+    """
+    Await many queries at once, at most SEARCH_ASYNC_CONCURRENCY in flight.
+
+    Failed queries map to [] (failures are logged and counted in SEARCH_STATS);
+    queries still running at `timeout` are cancelled and left out of the result.
+    """
+    unique = list(dict.fromkeys(q for q in queries if q))
+    if not unique:
+        return {}
+    semaphore = asyncio.Semaphore(max(1, int(os.getenv("SEARCH_ASYNC_CONCURRENCY", "8"))))
+
+    async def one(query: str) -> List[SearchResult]:
+        async with semaphore:
+            try:
+                return await provider.asearch(query, num_results)
+            except SearchProviderError as e:
+                logger.warning(f"search failed provider={e.provider} kind={e.kind} query={query!r}: {e}")
+                SEARCH_STATS.record_failure(e.provider, e.kind)
+            except Exception as e:
+                logger.error(f"search error provider={provider.name} query={query!r}: {e}")
+                SEARCH_STATS.record_failure(provider.name, "error")
+            return []
+
+    tasks = {asyncio.ensure_future(one(q)): q for q in unique}
+    done, pending = await asyncio.wait(set(tasks), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    return {q: t.result() for t, q in tasks.items() if t in done}
+
+
+T = TypeVar("T")
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Sync shim for the async search API.
+
+    Runs `coro` on a fresh event loop (in a helper thread when the caller is
+    already inside a running loop) and closes that loop's shared AsyncClient.
+    """
+
+    async def _main() -> T:
+        try:
+            return await coro
+        finally:
+            await aclose_async_client()
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_main())
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, _main()).result()
+
+
+def search_many(
+    provider: SearchProvider,
+    queries: Iterable[str],
+    num_results: int = 5,
+    timeout: Optional[float] = None,
+) -> Dict[str, List[SearchResult]]:
+    """Blocking wrapper around `asearch_many` for sync callers (agents, runner)."""
+    return run_sync(asearch_many(provider, queries, num_results=num_results, timeout=timeout))
+
 
 def get_default_search_provider() -> SearchProvider:
+    provider = _build_search_provider()
+    if isinstance(provider, NullSearchProvider):
+        return provider
+    # Templated queries repeat across jurisdictions and retries; serve them from the shared cache
+    from .search_cache import CachedSearchProvider, get_default_search_cache
+
+    cache = get_default_search_cache()
+    return CachedSearchProvider(provider, cache) if cache is not None else provider
+
+
+def _build_search_provider() -> SearchProvider:
     # Optional SearXNG provider
     searxng_url = os.getenv("SEARXNG_URL")
     if searxng_url:
-        try:
-            import httpx  # already imported above
-
-            class SearxngProvider(SearchProvider):
-                def __init__(self, base_url: str):
-                    self.base_url = base_url.rstrip("/")
-                    # Basic rate limiting & retry controls via env
-                    self.max_attempts = int(os.getenv("SEARXNG_MAX_ATTEMPTS", "3"))
-                    self.min_backoff = float(os.getenv("SEARXNG_MIN_BACKOFF", "0.5"))
-                    self.max_backoff = float(os.getenv("SEARXNG_MAX_BACKOFF", "4.0"))
-
-                def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
-                    full_query = f"{query} site:gov OR site:us OR site:*.state.* filetype:pdf OR filetype:html"
-                    attempt = 0
-                    backoff = self.min_backoff
-                    while attempt < self.max_attempts:
-                        attempt += 1
-                        try:
-                            resp = httpx.get(
-                                f"{self.base_url}/search",
-                                params={"q": full_query, "format": "json"},
-                                timeout=20,
-                            )
-                            if resp.status_code != 200:
-                                raise RuntimeError(f"HTTP {resp.status_code}")
-                            data = resp.json()
-                            results = []
-                            for it in (data.get("results") or [])[: num_results]:
-                                results.append(
-                                    SearchResult(
-                                        url=it.get("url"),
-                                        title=it.get("title", ""),
-                                        snippet=it.get("content", ""),
-                                    )
-                                )
-                            return results
-                        except Exception as e:
-                            if attempt >= self.max_attempts:
-                                logger.error(f"SearXNG error after {attempt} attempts: {e}")
-                                return []
-                            sleep(backoff)
-                            backoff = min(self.max_backoff, backoff * 2)
-
-            return SearxngProvider(searxng_url)
-        except Exception:
-            pass
+        return SearxngProvider(searxng_url)
 
     google_key = os.getenv("GOOGLE_API_KEY")
     google_cse = os.getenv("GOOGLE_CSE_ID")
@@ -177,4 +618,10 @@ def get_default_search_provider() -> SearchProvider:
         return NullSearchProvider()
     if len(providers) == 1:
         return providers[0]
-    return CombinedSearchProvider(providers)
+    try:
+        budget_env = os.getenv("SEARCH_PROVIDER_BUDGET_S")
+        provider_budget_s = float(budget_env) if budget_env else None
+    except Exception:
+        provider_budget_s = None
+    hedged = os.getenv("SEARCH_HEDGED", "0") in ("1", "true", "True")
+    return CombinedSearchProvider(providers, hedged=hedged, provider_budget_s=provider_budget_s)
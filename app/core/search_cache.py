@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+from .logger import setup_logger
+from .paths import project_root
+from .search import SearchProvider, SearchResult
+
+logger = setup_logger("search_cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    provider TEXT NOT NULL,
+    query TEXT NOT NULL,
+    num_results INTEGER NOT NULL,
+    results TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    refresh_started_at REAL,
+    PRIMARY KEY (provider, query, num_results)
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_created_at ON search_cache (created_at);
+"""
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive cache key for a query string."""
+    return _WS_RE.sub(" ", (query or "").strip().lower())
+
+
+class SearchCache:
+    """
+    Persistent search results keyed by (provider, normalized query, num_results).
+
+    Entries younger than `ttl_seconds` are fresh. Up to `stale_seconds` past that
+    they are still served, but flagged stale so the caller can revalidate; older
+    entries are purged. SQLite in WAL mode lets runner and Celery workers share it.
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: float = 24 * 3600, stale_seconds: float = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, provider: str, query: str, num_results: int) -> Optional[Tuple[List[SearchResult], bool]]:
+        """Return (results, is_stale), or None when missing or past the stale window."""
+        now = time.time()
+        key = (provider, normalize_query(query), int(num_results))
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT results, created_at FROM search_cache WHERE provider = ? AND query = ? AND num_results = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            age = now - row[1]
+            if age > self.ttl_seconds + self.stale_seconds:
+                conn.execute("DELETE FROM search_cache WHERE provider = ? AND query = ? AND num_results = ?", key)
+                return None
+        try:
+            results = [SearchResult(**item) for item in json.loads(row[0])]
+        except Exception:
+            return None
+        return results, age > self.ttl_seconds
+
+    def put(self, provider: str, query: str, num_results: int, results: List[SearchResult]) -> None:
+        now = time.time()
+        payload = json.dumps([asdict(r) for r in results], ensure_ascii=False)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (provider, query, num_results, results, created_at, refresh_started_at)"
+                " VALUES (?, ?, ?, ?, ?, NULL)",
+                (provider, normalize_query(query), int(num_results), payload, now),
+            )
+            conn.execute("DELETE FROM search_cache WHERE created_at < ?", (now - self.ttl_seconds - self.stale_seconds,))
+
+    def claim_refresh(self, provider: str, query: str, num_results: int, lease_seconds: float = 60.0) -> bool:
+        """Atomically mark a stale entry as being refreshed so only one worker revalidates it."""
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE search_cache SET refresh_started_at = ?"
+                " WHERE provider = ? AND query = ? AND num_results = ?"
+                " AND (refresh_started_at IS NULL OR refresh_started_at < ?)",
+                (now, provider, normalize_query(query), int(num_results), now - lease_seconds),
+            )
+            return cur.rowcount == 1
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0])
+
+
+class CachedSearchProvider(SearchProvider):
+    """
+    Serve repeated queries from `SearchCache`; stale hits are returned at once
+    and refreshed in a background thread (stale-while-revalidate).
+
+    Empty result lists are not cached: a provider that briefly answered with
+    nothing would otherwise stay empty until the TTL ran out.
+    """
+
+    def __init__(self, provider: SearchProvider, cache: SearchCache):
+        self.provider = provider
+        self.cache = cache
+        self.name = getattr(provider, "name", "provider")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._refreshing: Set[Tuple[str, int]] = set()
+
+    def _store(self, query: str, num_results: int, results: List[SearchResult]) -> None:
+        if results:
+            try:
+                self.cache.put(self.name, query, num_results, results)
+            except Exception as e:
+                logger.warning(f"search cache write failed query={query!r} err={e}")
+
+    def _fetch(self, query: str, num_results: int) -> List[SearchResult]:
+        results = self.provider.search(query, num_results=num_results)
+        self._store(query, num_results, results)
+        return results
+
+    def _refresh(self, query: str, num_results: int, key: Tuple[str, int]) -> None:
+        try:
+            self._fetch(query, num_results)
+        except Exception as e:
+            logger.warning(f"search cache refresh failed query={query!r} err={e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _revalidate(self, query: str, num_results: int) -> None:
+        key = (normalize_query(query), int(num_results))
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        try:
+            claimed = self.cache.claim_refresh(self.name, query, num_results)
+        except Exception:
+            claimed = False
+        if not claimed:
+            with self._lock:
+                self._refreshing.discard(key)
+            return
+        threading.Thread(target=self._refresh, args=(query, num_results, key), daemon=True).start()
+
+    def _lookup(self, query: str, num_results: int) -> Optional[List[SearchResult]]:
+        """Cached results (kicking off revalidation when stale), or None on a miss."""
+        try:
+            cached = self.cache.get(self.name, query, num_results)
+        except Exception as e:
+            logger.warning(f"search cache read failed query={query!r} err={e}")
+            cached = None
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+                return None
+            if cached[1]:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+        if cached[1]:
+            self._revalidate(query, num_results)
+        return cached[0]
+
+    def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        results = self._lookup(query, num_results)
+        if results is None:
+            results = self._fetch(query, num_results)
+        return results
+
+    async def asearch(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        # SQLite calls are short but blocking; keep them off the event loop
+        results = await asyncio.to_thread(self._lookup, query, num_results)
+        if results is None:
+            results = await self.provider.asearch(query, num_results)
+            await asyncio.to_thread(self._store, query, num_results, results)
+        return results
+
+
+def get_default_search_cache() -> Optional[SearchCache]:
+    if os.getenv("SEARCH_CACHE_ENABLED", "1") in ("0", "false", "False"):
+        return None
+    override = os.getenv("SEARCH_CACHE_PATH")
+    path = Path(override) if override else project_root() / ".cache" / "search_cache.db"
+    try:
+        ttl = float(os.getenv("SEARCH_CACHE_TTL_S", str(24 * 3600)))
+        stale = float(os.getenv("SEARCH_CACHE_STALE_S", str(7 * 24 * 3600)))
+    except Exception:
+        ttl, stale = 24 * 3600, 7 * 24 * 3600
+    try:
+        return SearchCache(path, ttl_seconds=ttl, stale_seconds=stale)
+    except Exception as e:
+        logger.warning(f"search cache unavailable path={path} err={e}")
+        return None
@@ -12,22 +12,31 @@ class SimpleVectorStore:
         self._metas: List[dict] = []
         self._vectors: List[List[float]] = []
 
-    def add_texts(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> None:
+    def _dedupe(self, texts: List[str], metadatas: Optional[List[dict]]) -> List[int]:
         metadatas = metadatas or [{} for _ in texts]
-        # Dedupe by URL if provided, else by content hash surrogate
+        # Dedupe by explicit key or URL if provided, else by content hash surrogate
         seen_keys = set()
-        new_texts: List[str] = []
-        new_metas: List[dict] = []
-        for text, meta in zip(texts, metadatas):
-            key = meta.get("url") or f"content::{hash(text)}"
+        keep: List[int] = []
+        for i, (text, meta) in enumerate(zip(texts, metadatas)):
+            key = meta.get("dedupe_key") or meta.get("url") or f"content::{hash(text)}"
             if key in seen_keys:
                 continue
             seen_keys.add(key)
-            new_texts.append(text)
-            new_metas.append(meta)
-        self._texts.extend(new_texts)
-        self._metas.extend(new_metas)
-        self._vectors.extend(self.embeddings.embed_documents(new_texts))
+            keep.append(i)
+        return keep
+
+    def add_texts(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> None:
+        metadatas = metadatas or [{} for _ in texts]
+        keep = self._dedupe(texts, metadatas)
+        new_texts = [texts[i] for i in keep]
+        self.add_embeddings(new_texts, self.embeddings.embed_documents(new_texts), [metadatas[i] for i in keep])
+
+    def add_embeddings(self, texts: List[str], vectors: List[List[float]], metadatas: Optional[List[dict]] = None) -> None:
+        metadatas = metadatas or [{} for _ in texts]
+        keep = self._dedupe(texts, metadatas)
+        self._texts.extend(texts[i] for i in keep)
+        self._metas.extend(metadatas[i] for i in keep)
+        self._vectors.extend(vectors[i] for i in keep)
 
     def list_documents(self) -> Iterator[Tuple[int, str, dict]]:
         for i, (text, meta) in enumerate(zip(self._texts, self._metas)):
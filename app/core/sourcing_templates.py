@@ -94,3 +94,17 @@ def generate_queries(jurisdiction_path: str, topics: List[str] | None = None) ->
     return out
 
 
+# Topics the runner appends to every jurisdiction's templated queries
+DEFAULT_TOPICS: List[str] = [
+    "fair chance ordinance",
+    "ban the box employment",
+    "criminal history in employment",
+]
+
+
+def build_sourcing_queries(jurisdiction_path: str, topics: List[str] | None = None) -> List[str]:
+    """Queries the runner sources for one jurisdiction: templates, topics and a canonical URL probe."""
+    queries = generate_queries(jurisdiction_path, topics=DEFAULT_TOPICS if topics is None else topics)
+    # Fallback canonical URL probe
+    queries.append(f"https://law.justia.com/codes/{jurisdiction_path}")
+    return queries
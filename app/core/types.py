@@ -12,6 +12,9 @@ class ResearchTask:
     inserted_at: datetime
     status: str = "pending"  # pending | in_progress | completed | error
     error: Optional[str] = None
+    worker_id: Optional[str] = None  # lease owner while in_progress
+    lease_expires_at: Optional[datetime] = None
+    attempts: int = 0  # claims so far; expired leases count towards QUEUE_MAX_ATTEMPTS
 
 
 class AgentResult(dict):
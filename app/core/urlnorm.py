@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from filelock import FileLock
+
+from .logger import setup_logger
+from .paths import project_root
+
+logger = setup_logger("urlnorm")
+
+# Query parameters that never change the document: analytics, click ids, sessions, print views
+_DROP_PARAMS = {
+    "gclid",
+    "dclid",
+    "fbclid",
+    "msclkid",
+    "mc_cid",
+    "mc_eid",
+    "_ga",
+    "_gl",
+    "igshid",
+    "ref",
+    "ref_src",
+    "sessionid",
+    "jsessionid",
+    "phpsessid",
+    "sid",
+    "print",
+    "printable",
+    "printer_friendly",
+}
+_DROP_PREFIXES = ("utm_",)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_PATH_SESSION_RE = re.compile(r";(jsessionid|phpsessid|sid)=[^/?#]*", re.IGNORECASE)
+_SLASHES_RE = re.compile(r"/{2,}")
+
+
+def _keep_param(name: str) -> bool:
+    lowered = name.lower()
+    return lowered not in _DROP_PARAMS and not lowered.startswith(_DROP_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Dedupe key for a URL: https, lower-case host without `www.`, no default port,
+    fragment, session or tracking/print parameters, sorted query, no trailing slash.
+
+    The key identifies a page; it is not always fetchable (the `www.` host may be
+    the only one that answers), so fetch the original or redirect-resolved URL.
+    """
+    raw = (url or "").strip()
+    if not raw:
+        return raw
+    try:
+        parts = urlsplit(raw)
+    except ValueError:
+        return raw
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return raw
+    host = (parts.hostname or "").lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, _DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+    path = _SLASHES_RE.sub("/", _PATH_SESSION_RE.sub("", parts.path or ""))
+    path = path.rstrip("/")
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if _keep_param(k)))
+    return urlunsplit(("https", netloc, path, query, ""))
+
+
+class RedirectMap:
+    """
+    Persisted alias -> final URL map learned from redirected fetches.
+
+    Keys are canonical URLs, values the URL the server finally answered with,
+    so a known alias is fetched at its target without another redirect hop.
+    The JSON file is shared by processes (file lock + reload on change).
+    """
+
+    def __init__(self, path: Path, max_entries: int = 50000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(str(path) + ".lock")
+        self._data: Dict[str, str] = {}
+        self._mtime: Optional[float] = None
+
+    def _reload(self) -> None:
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            self._data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._mtime = mtime
+        except Exception as e:
+            logger.warning(f"redirect map unreadable path={self.path} err={e}")
+
+    def resolve(self, url: str, max_hops: int = 5) -> str:
+        """Final URL for `url` if a redirect is known, else `url` unchanged."""
+        with self._lock:
+            self._reload()
+            current = url
+            for _ in range(max_hops):
+                target = self._data.get(canonicalize_url(current))
+                if not target or target == current:
+                    break
+                current = target
+            return current
+
+    def canonical(self, url: str) -> str:
+        return canonicalize_url(self.resolve(url))
+
+    def learn(self, source: str, final: str) -> None:
+        self.learn_many([(source, final)])
+
+    def learn_many(self, pairs: Iterable[tuple]) -> None:
+        new = {
+            canonicalize_url(src): final
+            for src, final in pairs
+            if src and final and canonicalize_url(src) != canonicalize_url(final)
+        }
+        if not new:
+            return
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self._file_lock:
+                    self._mtime = None
+                    self._reload()
+                    if all(self._data.get(k) == v for k, v in new.items()):
+                        return
+                    self._data.update(new)
+                    if len(self._data) > self.max_entries:
+                        # Oldest entries first (insertion order)
+                        for key in list(self._data)[: len(self._data) - self.max_entries]:
+                            del self._data[key]
+                    tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+                    tmp.write_text(json.dumps(self._data), encoding="utf-8")
+                    tmp.replace(self.path)
+                    self._mtime = self.path.stat().st_mtime
+            except Exception as e:
+                logger.warning(f"redirect map write failed path={self.path} err={e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._reload()
+            return len(self._data)
+
+
+_DEFAULT_MAP: Optional[RedirectMap] = None
+_DEFAULT_MAP_LOCK = threading.Lock()
+
+
+def get_redirect_map() -> Optional[RedirectMap]:
+    if os.getenv("URL_REDIRECT_MAP_ENABLED", "1") in ("0", "false", "False"):
+        return None
+    override = os.getenv("URL_REDIRECT_MAP_PATH")
+    path = Path(override) if override else project_root() / ".cache" / "redirects.json"
+    global _DEFAULT_MAP
+    with _DEFAULT_MAP_LOCK:
+        if _DEFAULT_MAP is None or _DEFAULT_MAP.path != path:
+            _DEFAULT_MAP = RedirectMap(path)
+        return _DEFAULT_MAP
+
+
+def resolve_url(url: str) -> str:
+    """Known redirect target for `url` (or `url` itself); use before fetching."""
+    redirects = get_redirect_map()
+    return redirects.resolve(url) if redirects is not None else url
+
+
+def canonical_url(url: str) -> str:
+    """Dedupe key for `url` after applying known redirects; use at every dedupe point."""
+    redirects = get_redirect_map()
+    return redirects.canonical(url) if redirects is not None else canonicalize_url(url)
+
+
+def learn_redirect(source: str, final: str) -> None:
+    redirects = get_redirect_map()
+    if redirects is not None:
+        redirects.learn(source, final)
+
+
+def learn_redirects(requested: str, response) -> None:
+    """Record the redirect chain of a `follow_redirects` response (httpx or compatible)."""
+    history: List = list(getattr(response, "history", None) or [])
+    redirects = get_redirect_map()
+    if not history or redirects is None:
+        return
+    final = str(response.url)
+    pairs = [(requested, final)] + [(str(hop.url), final) for hop in history]
+    redirects.learn_many(pairs)
+
+
+def dedupe_urls(urls: Iterable[str]) -> List[str]:
+    """First occurrence of each canonical URL, in order."""
+    seen = set()
+    out: List[str] = []
+    for url in urls:
+        key = canonical_url(url)
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(url)
+    return out
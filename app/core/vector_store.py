@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 import hashlib
+import threading
 from typing import List, Optional, Callable
 from datetime import datetime, UTC, timedelta
 from filelock import FileLock
@@ -21,6 +22,7 @@ except Exception:
 from .paths import ensure_directories
 from .embeddings import LocalHashEmbeddings
 from .simple_vector_store import SimpleVectorStore
+from .urlnorm import canonical_url
 from ..config.settings import settings
 try:
     from langchain_openai import OpenAIEmbeddings  # Preferred in newer LangChain
@@ -38,6 +40,8 @@ class VectorStore:
         # Only use FAISS when the native library is available AND wrapper import exists
         self._use_faiss = bool(FAISS is not None and HAS_FAISS_NATIVE)
         self._lock = FileLock(str(self.index_path) + ".lock")
+        # Guards the in-memory index for runner workers sharing this store; the file lock covers other processes
+        self._mutex = threading.RLock()
         # Doc store path to enable FAISS reindex and maintenance
         safe_name = self.index_path.name.rstrip("/")
         # Allow override via settings; else default beside index
@@ -65,6 +69,8 @@ class VectorStore:
             # Offline deterministic embeddings for tests/dev
             self.embeddings = LocalHashEmbeddings()
         self._store = None
+        # Stamp of the on-disk files the in-memory index reflects (see `refresh`)
+        self._disk_stamp: Optional[tuple] = None
 
     # --- Doc store helpers ---
     def _append_docs_to_store(self, texts: List[str], metas: List[dict]) -> None:
@@ -80,6 +86,13 @@ class VectorStore:
                     # Skip un-serializable metadata
                     f.write(json.dumps({"text": t, "meta": {}}, ensure_ascii=False) + "\n")
 
+    def _append_to_doc_store(self, texts: List[str], metas: List[dict]) -> None:
+        before = self._stat_files()
+        self._append_docs_to_store(texts, metas)
+        if not self._use_faiss and before == self._disk_stamp:
+            # Only our own append changed the doc store: the in-memory index is still current
+            self._disk_stamp = self._stat_files()
+
     def _read_all_docs_from_store(self) -> tuple[list[str], list[dict]]:
         if not getattr(settings, "vector_doc_store_enabled", True) or not self._doc_store_path.exists():
             return [], []
@@ -98,21 +111,52 @@ class VectorStore:
                     continue
         return texts, metas
 
+    def _stat_files(self) -> tuple:
+        """(mtime_ns, size) of the files `load` reads: the FAISS index files or, for the simple store, the doc store."""
+        if self._use_faiss:
+            paths = [self.index_path / "index.faiss", self.index_path / "index.pkl"]
+        else:
+            paths = [self._doc_store_path]
+        stamp = []
+        for path in paths:
+            try:
+                st = path.stat()
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
     def load(self) -> None:
-        if not self._use_faiss:
-            self._store = SimpleVectorStore()
-            # For simple store, hydrate from doc store for cross-process persistence
-            texts, metas = self._read_all_docs_from_store()
-            if texts:
-                self._store.add_texts(texts=texts, metadatas=metas)
-            return
-        # FAISS path
-        with self._lock:
-            if self.index_path.exists():
-                self._store = FAISS.load_local(str(self.index_path), self.embeddings, allow_dangerous_deserialization=True)  # type: ignore
-            else:
-                self._store = FAISS.from_texts([""], self.embeddings)  # type: ignore
-                self.save()
+        with self._mutex:
+            if not self._use_faiss:
+                self._store = SimpleVectorStore()
+                # For simple store, hydrate from doc store for cross-process persistence
+                stamp = self._stat_files()
+                texts, metas = self._read_all_docs_from_store()
+                if texts:
+                    self._store.add_texts(texts=texts, metadatas=metas)
+                self._disk_stamp = stamp
+                return
+            # FAISS path
+            with self._lock:
+                if self.index_path.exists():
+                    self._store = FAISS.load_local(str(self.index_path), self.embeddings, allow_dangerous_deserialization=True)  # type: ignore
+                    self._disk_stamp = self._stat_files()
+                else:
+                    self._store = FAISS.from_texts([""], self.embeddings)  # type: ignore
+                    self.save()
+
+    def refresh(self) -> bool:
+        """
+        Load the index, or reload it when another process has written it since this one loaded or saved.
+        Returns True when it (re)loaded. Long-lived stores (e.g. one per Celery worker process) call this
+        before each task, so they see documents added by other workers without reloading on every task.
+        """
+        with self._mutex:
+            if self._store is not None and self._stat_files() == self._disk_stamp:
+                return False
+            self.load()
+            return True
 
     def save(self) -> None:
         if not self._use_faiss:
@@ -122,41 +166,84 @@ class VectorStore:
         with self._lock:
             self.index_path.parent.mkdir(parents=True, exist_ok=True)
             self._store.save_local(str(self.index_path))  # type: ignore
+            self._disk_stamp = self._stat_files()
 
-    def add_texts(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> None:
-        if self._store is None:
-            self.load()
-        assert self._store is not None
-        # Deduplicate by URL or content hash when available
-        dedup_texts: List[str] = []
-        dedup_metas: List[dict] = []
+    def _dedupe(self, texts: List[str], metadatas: Optional[List[dict]]) -> List[int]:
+        """Indexes of the entries to keep: first of each dedupe key (given, canonical URL or content hash)."""
         metadatas = metadatas or [{} for _ in texts]
+        keep: List[int] = []
         seen_keys = set()
-        for text, meta in zip(texts, metadatas):
-            url = (meta or {}).get("url")
-            key = url or hashlib.sha1(text.encode("utf-8")).hexdigest()
+        for i, (text, meta) in enumerate(zip(texts, metadatas)):
+            meta = meta or {}
+            url = meta.get("url")
+            key = meta.get("dedupe_key") or (canonical_url(url) if url else hashlib.sha1(text.encode("utf-8")).hexdigest())
             if key in seen_keys:
                 continue
             seen_keys.add(key)
+            keep.append(i)
             # Persist the dedupe key for later tooling
-            meta = dict(meta or {})
+            meta = dict(meta)
             meta.setdefault("dedupe_key", key)
-            dedup_texts.append(text)
-            dedup_metas.append(meta)
+            metadatas[i] = meta
+        return keep
+
+    def add_texts(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> None:
+        with self._mutex:
+            if self._store is None:
+                self.load()
+            assert self._store is not None
+            metadatas = list(metadatas or [{} for _ in texts])
+            keep = self._dedupe(texts, metadatas)
+            dedup_texts = [texts[i] for i in keep]
+            dedup_metas = [metadatas[i] for i in keep]
+            if self._use_faiss:
+                with self._lock:
+                    # Pick up other processes' writes first, so the save below does not drop them
+                    self.refresh()
+                    self._store.add_texts(texts=dedup_texts, metadatas=dedup_metas)  # type: ignore
+            else:
+                self._store.add_texts(texts=dedup_texts, metadatas=dedup_metas)
+            self.save()
+            # Append to doc store for future maintenance
+            self._append_to_doc_store(dedup_texts, dedup_metas)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Vectors for `texts` from the embedding model the active index searches with."""
+        with self._mutex:
+            if self._store is None:
+                self.load()
+        # Embedding runs outside the mutex so workers embed in parallel
         if self._use_faiss:
-            with self._lock:
-                self._store.add_texts(texts=dedup_texts, metadatas=dedup_metas)  # type: ignore
-        else:
-            self._store.add_texts(texts=dedup_texts, metadatas=dedup_metas)
-        self.save()
-        # Append to doc store for future maintenance
-        self._append_docs_to_store(dedup_texts, dedup_metas)
+            return self.embeddings.embed_documents(texts)
+        return self._store.embeddings.embed_documents(texts)  # type: ignore[union-attr]
+
+    def add_embeddings(self, texts: List[str], vectors: List[List[float]], metadatas: Optional[List[dict]] = None) -> None:
+        """`add_texts` with vectors already computed by `embed_documents` (lets callers embed off the writer)."""
+        with self._mutex:
+            if self._store is None:
+                self.load()
+            assert self._store is not None
+            metadatas = list(metadatas or [{} for _ in texts])
+            keep = self._dedupe(texts, metadatas)
+            dedup_texts = [texts[i] for i in keep]
+            dedup_vectors = [vectors[i] for i in keep]
+            dedup_metas = [metadatas[i] for i in keep]
+            if self._use_faiss:
+                with self._lock:
+                    # Pick up other processes' writes first, so the save below does not drop them
+                    self.refresh()
+                    self._store.add_embeddings(list(zip(dedup_texts, dedup_vectors)), metadatas=dedup_metas)  # type: ignore
+            else:
+                self._store.add_embeddings(dedup_texts, dedup_vectors, dedup_metas)
+            self.save()
+            self._append_to_doc_store(dedup_texts, dedup_metas)
 
     def similarity_search(self, query: str, k: int = 5, filter: Optional[dict] = None):
-        if self._store is None:
-            self.load()
-        assert self._store is not None
-        return self._store.similarity_search(query, k=k, filter=filter)
+        with self._mutex:
+            if self._store is None:
+                self.load()
+            assert self._store is not None
+            return self._store.similarity_search(query, k=k, filter=filter)
 
     # Retention and maintenance
     def _is_expired(self, meta: dict, now: datetime) -> bool:
@@ -189,42 +276,43 @@ class VectorStore:
 
         For FAISS, we reload from scratch to apply pruning; for SimpleVectorStore we rebuild vectors.
         """
-        if self._store is None:
-            self.load()
-        assert self._store is not None
-        # Extract corpus from doc store so both FAISS and SimpleVectorStore can rebuild
-        texts_all, metas_all = self._read_all_docs_from_store()
-        now = datetime.now(UTC)
-        filtered_texts: List[str] = []
-        filtered_metas: List[dict] = []
-        seen = set()
-        total = len(texts_all)
-        for idx, (t, m) in enumerate(zip(texts_all, metas_all)):
-            key = (m or {}).get("url") or hashlib.sha1((t or "").encode("utf-8")).hexdigest()
-            if key in seen:
-                continue
-            if self._is_expired(m or {}, now):
-                continue
-            seen.add(key)
-            filtered_texts.append(t)
-            filtered_metas.append(m)
-            if progress_cb:
-                progress_cb(idx + 1, total)
+        with self._mutex:
+            if self._store is None:
+                self.load()
+            assert self._store is not None
+            # Extract corpus from doc store so both FAISS and SimpleVectorStore can rebuild
+            texts_all, metas_all = self._read_all_docs_from_store()
+            now = datetime.now(UTC)
+            filtered_texts: List[str] = []
+            filtered_metas: List[dict] = []
+            seen = set()
+            total = len(texts_all)
+            for idx, (t, m) in enumerate(zip(texts_all, metas_all)):
+                key = (m or {}).get("url") or hashlib.sha1((t or "").encode("utf-8")).hexdigest()
+                if key in seen:
+                    continue
+                if self._is_expired(m or {}, now):
+                    continue
+                seen.add(key)
+                filtered_texts.append(t)
+                filtered_metas.append(m)
+                if progress_cb:
+                    progress_cb(idx + 1, total)
 
-        if self._use_faiss:
-            with self._lock:
-                # Rebuild FAISS from filtered corpus
-                if filtered_texts:
-                    self._store = FAISS.from_texts(filtered_texts, self.embeddings, metadatas=filtered_metas)  # type: ignore
-                else:
-                    # Initialize empty index
-                    self._store = FAISS.from_texts([""], self.embeddings, metadatas=[{}])  # type: ignore
+            if self._use_faiss:
+                with self._lock:
+                    # Rebuild FAISS from filtered corpus
+                    if filtered_texts:
+                        self._store = FAISS.from_texts(filtered_texts, self.embeddings, metadatas=filtered_metas)  # type: ignore
+                    else:
+                        # Initialize empty index
+                        self._store = FAISS.from_texts([""], self.embeddings, metadatas=[{}])  # type: ignore
+                    self.save()
+            else:
+                # Rebuild simple store
+                assert isinstance(self._store, SimpleVectorStore)
+                self._store._texts = []  # type: ignore[attr-defined]
+                self._store._metas = []  # type: ignore[attr-defined]
+                self._store._vectors = []  # type: ignore[attr-defined]
+                self._store.add_texts(filtered_texts, filtered_metas)
                 self.save()
-        else:
-            # Rebuild simple store
-            assert isinstance(self._store, SimpleVectorStore)
-            self._store._texts = []  # type: ignore[attr-defined]
-            self._store._metas = []  # type: ignore[attr-defined]
-            self._store._vectors = []  # type: ignore[attr-defined]
-            self._store.add_texts(filtered_texts, filtered_metas)
-            self.save()
@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from pathlib import Path
+from typing import List
 
 from ..core.queue import ResearchQueue
 from ..core.db import get_engine, JurisdictionRun
@@ -31,14 +32,39 @@ async def enqueue(req: EnqueueRequest):
     queue = ResearchQueue(qpath)
     queue.load()
     priority = req.priority if req.priority is not None else 0
-    queue.add_task(
+    added = queue.add_task(
         ResearchTask(
             jurisdiction_path=req.jurisdiction_path,
             priority=priority,
             inserted_at=datetime.now(UTC),
         )
     )
-    return {"status": "queued", "jurisdiction_path": req.jurisdiction_path, "priority": priority}
+    # An already-pending jurisdiction is merged into its existing task
+    return {
+        "status": "queued" if added else "already_pending",
+        "jurisdiction_path": req.jurisdiction_path,
+        "priority": priority,
+    }
+
+
+@router.post("/enqueue/bulk")
+async def enqueue_bulk(reqs: List[EnqueueRequest]):
+    """Enqueue an array of tasks in one queue write; jurisdictions already pending (or repeated) are merged."""
+    qpath = project_root() / "tools" / "research_queue.json"
+    queue = ResearchQueue(qpath)
+    queue.load()
+    now = datetime.now(UTC)
+    added = queue.add_tasks(
+        [
+            ResearchTask(
+                jurisdiction_path=req.jurisdiction_path,
+                priority=req.priority if req.priority is not None else 0,
+                inserted_at=now,
+            )
+            for req in reqs
+        ]
+    )
+    return {"status": "queued", "received": len(reqs), "queued": added, "merged": len(reqs) - added}
 
 
 @router.get("/logs/{trace_id}")
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import json
+from datetime import datetime, UTC
 from pathlib import Path
+
 import typer
 
 from app.core.paths import project_root
+from app.core.queue import ResearchQueue
+from app.core.types import ResearchTask
 from app.agents.tasks import process_jurisdiction
 
 app = typer.Typer(add_completion=False)
@@ -27,5 +31,18 @@ def queue(queue_path: str = str(project_root() / "tools" / "research_queue.json"
         typer.echo(f"queued {jid}: {res.id}")
 
 
+@app.command()
+def add(
+    jurisdiction_path: str,
+    priority: int = 0,
+    queue_path: str = str(project_root() / "tools" / "research_queue.json"),
+):
+    """Add a task to the runner queue; idle runner workers wake up immediately."""
+    queue = ResearchQueue(Path(queue_path))
+    queue.load()
+    added = queue.add_task(ResearchTask(jurisdiction_path=jurisdiction_path, priority=priority, inserted_at=datetime.now(UTC)))
+    typer.echo(f"{'queued' if added else 'already pending'}: {jurisdiction_path}")
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import typer
+from lxml import html as lxml_html
+
+from app.core.html_text import SKIP_TAGS, html_to_text
+
+
+app = typer.Typer(add_completion=False)
+
+_WORD_RE = re.compile(r"[a-z0-9$]+")
+DEFAULT_FIXTURES = Path(__file__).resolve().parents[1] / "tests" / "fixtures"
+
+
+def _bs4_text(html: str) -> str:
+    from bs4 import BeautifulSoup  # previous extraction path, kept only for comparison
+
+    return BeautifulSoup(html, "lxml").get_text("\n", strip=True)
+
+
+def _words(text: str) -> set[str]:
+    return set(_WORD_RE.findall(text.lower()))
+
+
+def _el_words(el) -> set[str]:
+    return _words(" ".join(el.itertext()))
+
+
+def quality(html: str, text: str) -> Dict[str, float]:
+    """
+    Reference-free quality against the page's own markup.
+
+    recall: share of words from <main>/<article> (or <body>) kept;
+    boilerplate: share of words unique to script/style/nav/... subtrees that leaked;
+    headings: share of h1-h6 texts kept as their own line.
+    """
+    tree = lxml_html.fromstring(html)
+    content = (tree.xpath("//main") or tree.xpath("//article") or tree.xpath("//body") or [tree])[0]
+    # Headers count as boilerplate only as page chrome, outside main/article/section content
+    chrome = "//header[not(ancestor::main or ancestor::article or ancestor::section)]"
+    skipped = content.xpath(" | ".join([f".//{t}" for t in SKIP_TAGS] + ["." + chrome]))
+    skipped_words = set().union(*(_el_words(el) for el in skipped)) if skipped else set()
+    content_words = _el_words(content) - skipped_words
+    boilerplate_words = set()
+    for el in tree.xpath(" | ".join([f"//{t}" for t in SKIP_TAGS] + [chrome])):
+        boilerplate_words |= _el_words(el)
+    boilerplate_words -= content_words
+    out_words = _words(text)
+    lines = {line.lstrip("# ").strip() for line in text.splitlines()}
+    headings = [" ".join(h.text_content().split()) for h in content.xpath(".//h1|.//h2|.//h3|.//h4|.//h5|.//h6")]
+    return {
+        "recall": round(len(content_words & out_words) / len(content_words), 3) if content_words else 1.0,
+        "boilerplate": round(len(boilerplate_words & out_words) / len(boilerplate_words), 3) if boilerplate_words else 0.0,
+        "headings": round(sum(1 for h in headings if h in lines) / len(headings), 3) if headings else 1.0,
+    }
+
+
+def _bench(fn: Callable[[str], str], pages: List[str], repeat: int) -> Dict[str, float]:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            fn(page)
+    elapsed = time.perf_counter() - started
+    n = len(pages) * repeat
+    return {"pages": n, "seconds": round(elapsed, 4), "pages_per_s": round(n / elapsed, 1) if elapsed else 0.0}
+
+
+@app.command()
+def run(
+    fixtures: Path = typer.Option(DEFAULT_FIXTURES, help="Directory of saved .html pages"),
+    repeat: int = typer.Option(20, help="Passes over the fixture set"),
+) -> None:
+    """Compare the streaming extractor with the BeautifulSoup get_text path."""
+    files = sorted(fixtures.glob("*.htm*"))
+    if not files:
+        typer.echo(f"no .html fixtures under {fixtures}", err=True)
+        raise typer.Exit(code=1)
+    pages = [f.read_text(encoding="utf-8", errors="replace") for f in files]
+    report: Dict[str, Dict] = {}
+    for name, fn in (("streaming", html_to_text), ("bs4", _bs4_text)):
+        scores = [quality(page, fn(page)) for page in pages]
+        report[name] = _bench(fn, pages, repeat)
+        report[name]["bytes"] = sum(len(p) for p in pages)
+        for key in ("recall", "boilerplate", "headings"):
+            report[name][key] = round(sum(s[key] for s in scores) / len(scores), 3)
+    typer.echo(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import typer
+
+from app.core.paths import project_root
+from app.core.queue import SqliteResearchQueue
+
+
+app = typer.Typer(add_completion=False)
+
+DEFAULT_QUEUE = project_root() / "tools" / "research_queue.json"
+
+
+@app.command()
+def migrate(json_path: str = str(DEFAULT_QUEUE), db_path: str | None = None):
+    """Import a JSON queue file into the SQLite queue (rows already present are skipped)."""
+    src = Path(json_path)
+    if not src.exists():
+        typer.echo(f"not found: {src}", err=True)
+        raise typer.Exit(1)
+    queue = SqliteResearchQueue(Path(db_path) if db_path else src.with_suffix(".db"))
+    added = queue.import_json(src)
+    typer.echo(json.dumps({"imported": added, "db": str(queue.db_path), "tasks": queue.count()}))
+
+
+@app.command()
+def stats(queue_path: str = str(DEFAULT_QUEUE)):
+    queue = SqliteResearchQueue(Path(queue_path))
+    queue.load()
+    counts = {s: queue.count(s) for s in ("pending", "in_progress", "completed", "error")}
+    typer.echo(json.dumps({"db": str(queue.db_path), **counts}, indent=2))
+
+
+@app.command()
+def requeue(queue_path: str = str(DEFAULT_QUEUE), jurisdiction: list[str] = typer.Option(None)):
+    """Return errored tasks (all, or each --jurisdiction) to pending in one transaction."""
+    queue = SqliteResearchQueue(Path(queue_path))
+    queue.load()
+    requeued = queue.requeue_errors(jurisdiction or None)
+    typer.echo(json.dumps({"requeued": requeued, "pending": queue.count("pending")}))
+
+
+if __name__ == "__main__":
+    app()
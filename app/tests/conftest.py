@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _caches_in_tmp(tmp_path: Path, monkeypatch):
+    # The on-disk caches default to project_root()/.cache; keep test runs out of the repository
+    cache = tmp_path / ".cache"
+    monkeypatch.setenv("CHECKPOINT_PATH", str(cache / "checkpoints.db"))
+    monkeypatch.setenv("GAP_CACHE_PATH", str(cache / "gaps.db"))
+    monkeypatch.setenv("SEARCH_CACHE_PATH", str(cache / "search_cache.db"))
+    monkeypatch.setenv("EXTRACT_CACHE_PATH", str(cache / "extract_cache.db"))
+    monkeypatch.setenv("OCR_CACHE_DIR", str(cache / "ocr"))
+    monkeypatch.setenv("URL_REDIRECT_MAP_PATH", str(cache / "redirects.json"))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import List
+
+import httpx
+
+import app.core.search as search
+from app.core.rate_limit import reset_guards
+from app.core.search import (
+    CombinedSearchProvider,
+    ProviderStats,
+    SearchProvider,
+    SearchResult,
+    SearxngProvider,
+    search_many,
+)
+
+
+def test_searxng_queries_run_concurrently_on_shared_client(monkeypatch):
+    monkeypatch.setenv("SEARCH_RATE_LIMIT_RPS", "1000")
+    monkeypatch.setenv("SEARCH_RATE_LIMIT_BURST", "10")
+    reset_guards()
+    clients: List[httpx.AsyncClient] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.1)
+        q = request.url.params["q"].split(" site:")[0]
+        return httpx.Response(200, json={"results": [{"url": f"https://{q}.gov", "title": q, "content": ""}]})
+
+    def new_client() -> httpx.AsyncClient:
+        clients.append(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        return clients[-1]
+
+    monkeypatch.setattr(search, "_new_async_client", new_client)
+    queries = [f"q{i}" for i in range(5)]
+    started = time.monotonic()
+    try:
+        results = search_many(SearxngProvider("http://searx.local"), queries)
+    finally:
+        reset_guards()
+    assert time.monotonic() - started < 0.4
+    assert [results[q][0].url for q in queries] == [f"https://{q}.gov" for q in queries]
+    # One client for the whole batch, closed by the sync shim
+    assert len(clients) == 1 and clients[0].is_closed
+
+
+def test_combined_asearch_cancels_providers_past_budget():
+    class Fast(SearchProvider):
+        name = "fast"
+
+        async def asearch(self, query: str, num_results: int = 5) -> List[SearchResult]:
+            return [SearchResult(url="https://fast.gov", title="", snippet="")]
+
+    class Slow(SearchProvider):
+        name = "slow"
+        cancelled = False
+
+        async def asearch(self, query: str, num_results: int = 5) -> List[SearchResult]:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                Slow.cancelled = True
+                raise
+            return []
+
+    stats = ProviderStats()
+    combined = CombinedSearchProvider([Slow(), Fast()], provider_budget_s=0.1, stats=stats)
+
+    async def main():
+        results = await combined.asearch("q")
+        await asyncio.sleep(0)  # let the cancellation land
+        return results
+
+    started = time.monotonic()
+    results = asyncio.run(main())
+    assert time.monotonic() - started < 1.0
+    assert [r.url for r in results] == ["https://fast.gov"]
+    assert Slow.cancelled and stats.snapshot()["slow"]["dropped"] == 1
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+
+def test_stage_tasks_route_to_their_own_queues():
+    from app.core.celery_app import STAGE_QUEUES, create_celery_app
+
+    celery = create_celery_app()
+    for name, queue in STAGE_QUEUES.items():
+        assert celery.amqp.router.route({}, name)["queue"].name == queue
+    assert celery.amqp.router.route({}, "app.agents.tasks.process_jurisdiction")["queue"].name == "research"
+
+    # Only the idempotent stages are redelivered after a worker crash; merge may already have opened a PR
+    from app.agents import tasks
+
+    assert tasks.source_stage.acks_late and tasks.extract_stage.acks_late and tasks.validate_stage.acks_late
+    assert not tasks.merge_stage.acks_late and not tasks.process_jurisdiction.acks_late
+
+
+def test_chain_retries_one_stage_and_hands_off_references(tmp_path: Path, monkeypatch):
+    from app.agents import tasks, worker_resources
+    from app.core.celery_app import create_celery_app
+
+    os.environ["REDIS_URL"] = "memory://"
+    create_celery_app().conf.task_always_eager = True
+    monkeypatch.setenv("CHECKPOINT_PATH", str(tmp_path / "checkpoints.db"))
+    monkeypatch.setattr(tasks, "RETRY_MIN_SECONDS", 0.0)
+    calls = {"sourcing": 0, "extraction": 0}
+    handed = []
+
+    def source(self, jurisdiction, queries):
+        calls["sourcing"] += 1
+        return {"num_docs": 1, "docs": ["x" * 10_000]}
+
+    def extract(self, jurisdiction, skeleton):
+        calls["extraction"] += 1
+        if calls["extraction"] == 1:
+            raise RuntimeError("LLM timeout")
+        return {"jurisdiction": jurisdiction, "fcra": {"notes": "y" * 10_000}}
+
+    real_stage_task = tasks._stage_task
+    monkeypatch.setattr(worker_resources.SourcingAgent, "run", source)
+    monkeypatch.setattr(worker_resources.ExtractionAgent, "run", extract)
+    monkeypatch.setattr(tasks, "_stage_task", lambda task, stage, ctx: handed.append(ctx) or real_stage_task(task, stage, ctx))
+
+    res = tasks.dispatch_pipeline("unified/city/chain.json", skip_validation=True, skip_merge=True, trace_id="run-chain")
+    assert res.get() == {"status": "completed", "jurisdiction": "unified/city/chain.json"}
+    # Only the failed stage ran again
+    assert calls == {"sourcing": 1, "extraction": 2}
+    # Stages pass hashes and a patch path between them, never the documents or the patch
+    assert all(len(json.dumps(ctx)) < 1_000 for ctx in handed)
+
+
+def test_chain_closes_the_handed_off_queue_claim(tmp_path: Path, monkeypatch):
+    from datetime import datetime, UTC
+
+    from app.agents import tasks, worker_resources
+    from app.core.celery_app import create_celery_app
+    from app.core.queue import ResearchQueue
+    from app.core.types import ResearchTask
+
+    os.environ["REDIS_URL"] = "memory://"
+    create_celery_app().conf.task_always_eager = True
+    monkeypatch.setenv("PROJECT_ROOT_OVERRIDE", str(tmp_path))
+    (tmp_path / "research_inputs").mkdir()
+    monkeypatch.setattr(tasks, "RETRY_MIN_SECONDS", 0.0)
+    monkeypatch.setattr(worker_resources.SourcingAgent, "run", lambda self, jurisdiction, queries: {"num_docs": 1})
+
+    def extract(self, jurisdiction, skeleton):
+        if "broken" in jurisdiction:
+            raise RuntimeError("LLM down")
+        return {"jurisdiction": jurisdiction}
+
+    monkeypatch.setattr(worker_resources.ExtractionAgent, "run", extract)
+    qpath = tmp_path / "research_queue.json"
+    queue = ResearchQueue(qpath)
+    for path in ("unified/city/ok.json", "unified/city/broken.json"):
+        queue.add_task(ResearchTask(path, priority=0, inserted_at=datetime.now(UTC)))
+        task = queue.next_task(worker_id="runner")
+        owner = f"celery:run-{task.jurisdiction_path}"
+        assert queue.hand_off(task.jurisdiction_path, "runner", owner)
+        tasks.dispatch_pipeline(
+            task.jurisdiction_path, skip_validation=True, skip_merge=True, trace_id=owner, queue_path=str(qpath), queue_owner=owner
+        ).get()
+
+    # Success and exhausted retries both finish the claim instead of leaving it in progress
+    assert queue.count("in_progress") == 0
+    assert queue.count("completed") == 1 and queue.count("error") == 1
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.core.checkpoints import CheckpointStore, StageRun
+
+
+def test_retry_resumes_from_first_incomplete_stage(tmp_path: Path):
+    store = CheckpointStore(tmp_path / "checkpoints.db")
+    calls = []
+
+    def stage_fn(name, out):
+        def fn():
+            calls.append(name)
+            return out
+
+        return fn
+
+    def run(fail_validation: bool, target: str = "v1"):
+        stages = StageRun("run-1-unified_a.json", store)
+        sourced, _ = stages.stage("sourcing", {"jurisdiction": "a"}, stage_fn("sourcing", {"num_docs": 2}))
+        extracted, _ = stages.stage("extraction", {"sourcing": sourced}, stage_fn("extraction", {"patch": {"x": 1}}))
+
+        def validate():
+            calls.append("validation")
+            if fail_validation:
+                raise RuntimeError("validator crashed")
+            return {"ok": True}
+
+        stages.stage("validation", {"patch": extracted["patch"], "target": target}, validate)
+        return stages
+
+    with pytest.raises(RuntimeError):
+        run(fail_validation=True)
+    assert calls == ["sourcing", "extraction", "validation"]
+    calls.clear()
+    stages = run(fail_validation=False)
+    assert calls == ["validation"] and stages.resumed == ["sourcing", "extraction"]
+    # A changed input (the jurisdiction file was edited) re-runs only that stage
+    calls.clear()
+    run(fail_validation=False, target="v2")
+    assert calls == ["validation"]
+    stages.complete()
+    assert store.stages("run-1-unified_a.json") == {}
+
+
+def test_celery_retry_resumes_without_resourcing(tmp_path: Path, monkeypatch):
+    import os
+
+    from app.agents import tasks, worker_resources
+    from app.core.celery_app import create_celery_app
+
+    os.environ["REDIS_URL"] = "memory://"
+    create_celery_app().conf.task_always_eager = True
+    monkeypatch.setenv("CHECKPOINT_PATH", str(tmp_path / "checkpoints.db"))
+    monkeypatch.setattr(tasks, "RETRY_MIN_SECONDS", 0.0)
+    calls = {"sourcing": 0, "extraction": 0}
+
+    def source(self, jurisdiction, queries):
+        calls["sourcing"] += 1
+        return {"num_docs": 1}
+
+    def extract(self, jurisdiction, skeleton):
+        calls["extraction"] += 1
+        if calls["extraction"] == 1:
+            raise RuntimeError("LLM timeout")
+        return {"jurisdiction": jurisdiction}
+
+    monkeypatch.setattr(worker_resources.SourcingAgent, "run", source)
+    monkeypatch.setattr(worker_resources.ExtractionAgent, "run", extract)
+    res = tasks.process_jurisdiction.apply(
+        kwargs={"jurisdiction_path": "unified/city/ckpt.json", "skip_validation": True, "skip_merge": True}
+    )
+    assert calls == {"sourcing": 1, "extraction": 2}
+    assert res.successful() and res.result["status"] == "completed"
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import time
+
+from app.core.search import CombinedSearchProvider, ProviderStats, SearchProvider, SearchResult
+
+
+class FakeProvider(SearchProvider):
+    def __init__(self, name: str, urls: list[str], delay: float = 0.0):
+        self.name = name
+        self.urls = urls
+        self.delay = delay
+
+    def search(self, query: str, num_results: int = 5):
+        time.sleep(self.delay)
+        return [SearchResult(url=u, title=u, snippet="") for u in self.urls[:num_results]]
+
+
+def test_fanout_is_concurrent_and_keeps_provider_order():
+    stats = ProviderStats()
+    combined = CombinedSearchProvider(
+        [FakeProvider("a", ["u1", "u2"], delay=0.2), FakeProvider("b", ["u2", "u3"], delay=0.2)], stats=stats
+    )
+    started = time.monotonic()
+    results = combined.search("q", num_results=5)
+    assert time.monotonic() - started < 0.35  # max, not sum, of provider latencies
+    assert [r.url for r in results] == ["u1", "u2", "u3"]
+    snap = stats.snapshot()
+    assert snap["a"]["contributed"] == 2 and snap["b"]["contributed"] == 1
+    assert snap["b"]["contribution_rate"] == 0.5
+    assert sum(snap["a"]["latency_histogram"].values()) == 1
+
+
+def test_hedged_returns_early_and_budget_drops_slow_provider():
+    stats = ProviderStats()
+    slow = FakeProvider("slow", ["s1"], delay=1.0)
+    fast = FakeProvider("fast", ["f1", "f2"])
+
+    hedged = CombinedSearchProvider([slow, fast], hedged=True, stats=stats)
+    started = time.monotonic()
+    assert [r.url for r in hedged.search("q", num_results=2)] == ["f1", "f2"]
+    assert time.monotonic() - started < 0.5
+
+    budgeted = CombinedSearchProvider([slow, fast], provider_budget_s=0.1, stats=stats)
+    assert [r.url for r in budgeted.search("q", num_results=5)] == ["f1", "f2"]
+    assert stats.snapshot()["slow"]["dropped"] == 2
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import httpx
+
+from app.core.crawl import sniff_content_type, stream_fetch
+
+
+def _client(body: bytes, content_type: str, chunked: bool = False) -> httpx.Client:
+    def handler(request: httpx.Request) -> httpx.Response:
+        headers = {"content-type": content_type}
+        if chunked:
+            # Generator content has no Content-Length, forcing the cap to apply mid-stream
+            return httpx.Response(200, content=iter([body[i : i + 512] for i in range(0, len(body), 512)]), headers=headers)
+        return httpx.Response(200, content=body, headers=headers)
+
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def test_sniff_prefers_magic_bytes_over_header():
+    assert sniff_content_type(b"%PDF-1.7\n...", "text/html", "https://x.gov/a") == "application/pdf"
+    assert sniff_content_type(b"\x89PNG\r\n\x1a\n....", "application/octet-stream") == "image/png"
+    assert sniff_content_type(b"<!DOCTYPE html><html>", "application/octet-stream") == "text/html"
+    assert sniff_content_type(b"", None, "https://x.gov/doc.PDF") == "application/pdf"
+
+
+def test_stream_fetch_spools_binary_to_file():
+    payload = b"%PDF-1.4\n" + b"0" * 4096
+    body = stream_fetch("https://x.gov/file", "UA", client=_client(payload, "application/octet-stream"))
+    try:
+        assert body.ok and body.is_pdf
+        assert body.text is None and body.spool is not None
+        assert body.size == len(payload)
+        assert body.read_bytes() == payload
+    finally:
+        body.close()
+
+
+def test_stream_fetch_decodes_html_in_memory():
+    body = stream_fetch("https://x.gov/page", "UA", client=_client(b"<html><body>hi</body></html>", "text/html; charset=utf-8"))
+    assert body.ok and not body.is_binary
+    assert body.spool is None and "hi" in (body.text or "")
+
+
+def test_stream_fetch_enforces_size_cap():
+    payload = b"%PDF-1.4\n" + b"0" * 10_000
+    body = stream_fetch("https://x.gov/big.pdf", "UA", max_bytes=1024, client=_client(payload, "application/pdf", chunked=True))
+    try:
+        assert body.truncated and body.size <= 1024
+        # Partial binaries are unusable for extraction
+        assert not body.ok
+    finally:
+        body.close()
+
+    # A declared Content-Length over the cap is rejected before reading the body
+    declared = stream_fetch("https://x.gov/huge.pdf", "UA", max_bytes=1024, client=_client(payload, "application/pdf"))
+    assert declared.truncated and declared.spool is None and declared.size == len(payload)
+
+
+def test_empty_pdf_response_extracts_nothing(monkeypatch):
+    import sys
+    import types
+
+    import app.core.crawl as crawl
+
+    monkeypatch.setitem(sys.modules, "trafilatura", types.SimpleNamespace(extract=lambda html, **kw: None, metadata_from_text=lambda text: {}))
+    monkeypatch.setenv("CRAWL_RESPECT_ROBOTS", "0")
+    monkeypatch.setenv("CRAWL_DELAY_SECONDS", "0")
+    monkeypatch.setenv("EXTRACT_CACHE_ENABLED", "0")
+    # Typed by its suffix, with no bytes and so no spool
+    monkeypatch.setattr(
+        crawl,
+        "stream_fetch",
+        lambda url, ua, **kw: crawl.FetchedBody(url=url, status_code=200, content_type="application/pdf", content_hash="e3b0"),
+    )
+    result = crawl.fetch_and_extract("https://city.gov/ordinance.pdf")
+    assert result["text"] == "" and result["meta"]["bytes"] == 0
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import time
+
+import httpx
+import pytest
+
+from app.core.crawl import polite_delay, stream_fetch
+from app.core.deadline import Deadline, DeadlineExceeded
+from app.core.ocr import ocr_pages
+
+
+def test_deadline_budget_and_children():
+    unbounded = Deadline(None)
+    assert unbounded.remaining() is None and unbounded.timeout(20) == 20
+
+    node = Deadline(0.2)
+    assert node.timeout(20) <= 0.2
+    # A per-URL child never outlives the shared node budget
+    assert node.child(60).remaining() <= 0.2
+    assert node.child(0.01).remaining() <= 0.01
+
+    expired = Deadline(0)
+    assert expired.expired
+    with pytest.raises(DeadlineExceeded):
+        expired.timeout(5, "fetch")
+
+
+def test_polite_delay_refuses_to_sleep_past_deadline(monkeypatch):
+    monkeypatch.setenv("CRAWL_DELAY_SECONDS", "5")
+    polite_delay("https://slow-host.example/a")
+    with pytest.raises(DeadlineExceeded):
+        polite_delay("https://slow-host.example/b", Deadline(0.05))
+
+
+def test_stream_fetch_stops_at_deadline():
+    def slow_chunks():
+        for _ in range(50):
+            time.sleep(0.01)
+            yield b"<p>" + b"x" * 100 + b"</p>"
+
+    client = httpx.Client(
+        transport=httpx.MockTransport(lambda req: httpx.Response(200, content=slow_chunks(), headers={"content-type": "text/html"}))
+    )
+    started = time.monotonic()
+    body = stream_fetch("https://city.gov/code", "UA", client=client, deadline=Deadline(0.05))
+    assert time.monotonic() - started < 0.4
+    assert body.timed_out and body.truncated
+    # Partial HTML is kept for best-effort extraction
+    assert body.text and body.text.startswith("<p>")
+
+
+def test_ocr_pages_returns_finished_pages_at_deadline():
+    def ocr(buffer: bytes):
+        if buffer == b"slow":
+            time.sleep(0.5)
+        return buffer.decode(), "fake"
+
+    started = time.monotonic()
+    results = ocr_pages([(1, b"fast"), (2, b"slow")], ocr, max_workers=2, deadline=Deadline(0.1))
+    assert time.monotonic() - started < 0.4
+    assert results == {1: ("fast", "fake")}
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import sys
+import time
+import types
+from pathlib import Path
+
+from app.core.extract_cache import ExtractionCache
+
+
+def test_cache_roundtrip_ttl_and_lru(tmp_path: Path):
+    cache = ExtractionCache(tmp_path / "cache.db", ttl_seconds=3600, max_entries=2)
+    cache.put("https://a.gov/x", "h1", {"text": "one", "meta": {"ocr_engine": "fake"}, "source": "https://a.gov/x"})
+    assert cache.get("https://a.gov/x", "h1")["meta"]["ocr_engine"] == "fake"
+    # Same URL with a changed body is a miss
+    assert cache.get("https://a.gov/x", "h2") is None
+
+    time.sleep(0.01)
+    cache.put("https://b.gov/y", "h1", {"text": "two"})
+    time.sleep(0.01)
+    cache.get("https://a.gov/x", "h1")  # touch: a is now more recent than b
+    time.sleep(0.01)
+    cache.put("https://c.gov/z", "h1", {"text": "three"})
+    assert len(cache) == 2
+    assert cache.get("https://b.gov/y", "h1") is None
+    assert cache.get("https://a.gov/x", "h1") is not None
+
+    expired = ExtractionCache(tmp_path / "cache.db", ttl_seconds=0.001, max_entries=10)
+    time.sleep(0.01)
+    assert expired.get("https://c.gov/z", "h1") is None
+
+
+def test_fetch_and_extract_skips_extraction_on_cache_hit(tmp_path: Path, monkeypatch):
+    import app.core.crawl as crawl
+
+    calls = {"extract": 0}
+    fake_trafilatura = types.SimpleNamespace(
+        extract=lambda html, **kw: calls.__setitem__("extract", calls["extract"] + 1) or "ordinance text " * 50,
+        metadata_from_text=lambda text: {},
+    )
+    monkeypatch.setitem(sys.modules, "trafilatura", fake_trafilatura)
+    monkeypatch.setenv("CRAWL_RESPECT_ROBOTS", "0")
+    monkeypatch.setenv("CRAWL_DELAY_SECONDS", "0")
+    monkeypatch.setenv("EXTRACT_CACHE_PATH", str(tmp_path / "extract.db"))
+    monkeypatch.setattr(
+        crawl,
+        "stream_fetch",
+        lambda url, ua, **kw: crawl.FetchedBody(url=url, status_code=200, content_type="text/html", text="<html/>", content_hash="abc"),
+    )
+
+    first = crawl.fetch_and_extract("https://city.gov/code")
+    second = crawl.fetch_and_extract("https://city.gov/code")
+    assert calls["extract"] == 1
+    assert second["text"] == first["text"]
+    assert second["meta"].get("cache_hit") is True and "cache_hit" not in first["meta"]
+
+
+def test_default_cache_is_shared_and_errors_fall_through(tmp_path: Path, monkeypatch):
+    import sqlite3
+
+    import app.core.extract_cache as extract_cache
+
+    monkeypatch.setenv("EXTRACT_CACHE_PATH", str(tmp_path / "extract.db"))
+    cache = extract_cache.get_default_extraction_cache()
+    assert extract_cache.get_default_extraction_cache() is cache
+
+    def locked(self):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(ExtractionCache, "_connect", locked)
+    # A locked cache is a miss and a dropped write, not an error for the crawl
+    assert cache.get("https://a.gov/x", "h1") is None
+    cache.put("https://a.gov/x", "h1", {"text": "one"})
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import app.agents.sourcing_agent as sa
+from app.agents.sourcing_agent import SourcingAgent
+from app.core.frontier import CrawlFrontier
+from app.core.search import SearchProvider, SearchResult
+
+SF = "unified/city/san_francisco.json"
+
+
+def test_frontier_orders_by_authority_relevance_and_novelty():
+    frontier = CrawlFrontier([SF])
+    q = "san francisco fair chance ordinance"
+    frontier.add("https://someblog.wordpress.com/fair-chance", [SF], query=q, snippet="san francisco fair chance ordinance")
+    frontier.add("https://example.org/news", [SF], query=q, snippet="weather")
+    frontier.add("https://sf.gov/fco", [SF], query=q, snippet="San Francisco Fair Chance Ordinance")
+    frontier.add("https://sf.gov/other", [SF], query=q, snippet="parking")
+    frontier.add("https://library.municode.com/ca/san_francisco", [SF], query=q, snippet="police code")
+
+    order = []
+    while (c := frontier.next()) is not None:
+        order.append(c.url)
+        frontier.record(c, 1000)
+    # Second sf.gov page loses its lead to a fresh host; the blog is never handed out
+    assert order == [
+        "https://sf.gov/fco",
+        "https://library.municode.com/ca/san_francisco",
+        "https://sf.gov/other",
+        "https://example.org/news",
+    ]
+    summary = frontier.summary()[SF]
+    assert summary["skipped_low_value"] == 1 and summary["fetches"] == 4 and summary["bytes"] == 4000
+
+
+def test_sourcing_stops_early_and_records_budget(monkeypatch):
+    monkeypatch.setenv("CRAWL_TARGET_HIGH_AUTHORITY", "2")
+    fetched = []
+
+    class Provider(SearchProvider):
+        def search(self, query: str, num_results: int = 5):
+            return [SearchResult(url=f"https://city{i}.gov/code", title="", snippet="") for i in range(5)]
+
+    class Vector:
+        def add_texts(self, texts, metas):
+            pass
+
+    monkeypatch.setattr(sa, "get_default_search_provider", lambda: Provider())
+    monkeypatch.setattr(SourcingAgent, "_fetch", lambda self, url: fetched.append(url) or "<p>ordinance</p>")
+
+    res = SourcingAgent(Vector()).run(SF, ["ban the box"])
+    assert len(fetched) == 2 and res["num_docs"] == 2
+    assert res["crawl_budget"]["stop_reason"] == "enough_high_authority"
+    assert res["crawl_budget"]["skipped_budget"] == 3
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime, UTC, timedelta
+from pathlib import Path
+
+import app.core.gaps as gaps
+from app.core.gaps import invalidate_gaps
+from app.core.queue import ResearchQueue
+from app.core.types import ResearchTask
+
+
+def _write(base: Path, name: str, doc: dict) -> Path:
+    path = base / "unified" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(doc))
+    return path
+
+
+def test_dequeue_reuses_scores_until_file_is_invalidated(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("GAP_CACHE_PATH", str(tmp_path / "gaps.db"))
+    monkeypatch.setenv("GAP_REVALIDATE_S", "0")
+    parses = []
+    real = gaps.estimate_gaps
+    monkeypatch.setattr(gaps, "estimate_gaps", lambda base, path: parses.append(path) or real(base, path))
+
+    base = tmp_path / "repo"
+    a = _write(base, "a.json", {"jurisdiction": "a"})  # missing last_updated -> 1 gap
+    _write(base, "b.json", {"jurisdiction": "b", "last_updated": "2024-01-01"})
+    queue = ResearchQueue(tmp_path / "queue.json")
+    start = datetime.now(UTC)
+
+    def enqueue(path, i):
+        queue.add_task(ResearchTask(path, priority=0, inserted_at=start + timedelta(seconds=i)))
+
+    enqueue("unified/a.json", 0)
+    enqueue("unified/b.json", 1)
+    assert queue.next_task(base_dir=base).jurisdiction_path == "unified/a.json"
+    assert sorted(parses) == ["unified/a.json", "unified/b.json"]
+    # Re-enqueued while the first claim runs: scored from the cache, once per file, not per task or dequeue
+    enqueue("unified/a.json", 2)
+    assert queue.next_task(base_dir=base).jurisdiction_path == "unified/a.json"
+    enqueue("unified/a.json", 3)
+    assert len(parses) == 2
+
+    # A merge fills a's gap and drops b's fields; the hook makes the queue rescore only those tasks
+    _write(base, "a.json", {"jurisdiction": "a", "last_updated": "2024-02-01"})
+    b = _write(base, "b.json", {})
+    invalidate_gaps(a)
+    invalidate_gaps(b)
+    assert queue.next_task(base_dir=base).jurisdiction_path == "unified/b.json"
+    assert len(parses) == 4
+
+
+def test_gap_cache_detects_out_of_band_edits(tmp_path: Path):
+    cache = gaps.GapCache(tmp_path / "gaps.db")
+    path = _write(tmp_path, "c.json", {"jurisdiction": "c", "last_updated": "2024-01-01"})
+    assert cache.score_many(tmp_path, ["unified/c.json"]) == {"unified/c.json": 0}
+    path.write_text(json.dumps({"jurisdiction": "c"}))  # different size -> stale entry
+    assert cache.score_many(tmp_path, ["unified/c.json"]) == {"unified/c.json": 1}
+    cache.invalidate(path)
+    files, seq = cache.invalidations_since(0)
+    assert files == [str(path.resolve())] and cache.invalidations_since(seq) == ([], seq)
+
+
+def test_revalidation_sweep_scores_all_pending_tasks_over_one_connection(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("GAP_CACHE_PATH", str(tmp_path / "gaps.db"))
+    monkeypatch.setenv("GAP_REVALIDATE_S", "0.01")
+    base = tmp_path / "repo"
+    queue = ResearchQueue(tmp_path / "queue.json")
+    start = datetime.now(UTC)
+    for i in range(20):
+        _write(base, f"j{i}.json", {"jurisdiction": f"j{i}"})
+        queue.add_task(ResearchTask(f"unified/j{i}.json", priority=0, inserted_at=start + timedelta(seconds=i)))
+    assert queue.next_task(base_dir=base) is not None
+
+    connects = []
+    real_connect = gaps.GapCache._connect
+    monkeypatch.setattr(gaps.GapCache, "_connect", lambda self: connects.append(1) or real_connect(self))
+    time.sleep(0.02)
+    # The sweep rescores the 19 remaining tasks: one connection for the scores, one for the invalidation log
+    assert queue.next_task(base_dir=base) is not None
+    assert len(connects) <= 2
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.core.html_text import html_to_text
+from app.scripts.html_bench import quality
+
+FIXTURE = Path(__file__).parent / "fixtures" / "municipal_code.html"
+
+
+def test_strips_boilerplate_and_keeps_section_structure():
+    html = FIXTURE.read_text(encoding="utf-8")
+    text = html_to_text(html)
+    for leaked in ("dataLayer", "font-family", "Skip to main", "City Council", "Related chapters", "All rights", "Legislation"):
+        assert leaked not in text
+    lines = text.splitlines()
+    assert "## 8.24.020 Definitions" in lines
+    assert lines[lines.index("## 8.24.020 Definitions") - 1] == ""
+    assert "- Host means the owner or long-term tenant of a dwelling unit." in lines
+    assert "Initial registration $250" in lines
+    q = quality(html, text)
+    assert q["recall"] == 1.0 and q["headings"] == 1.0
+
+
+def test_chunked_feed_matches_whole_document():
+    raw = FIXTURE.read_bytes()
+    assert html_to_text(raw, chunk_size=37) == html_to_text(raw.decode("utf-8"))
+    assert html_to_text("") == ""
+
+
+def test_content_containers_survive_chrome_heuristics():
+    html = '<body class="page has-sidebar"><main><h1>FCRA</h1><p>Employers may not ask.</p></main></body>'
+    assert html_to_text(html) == "# FCRA\nEmployers may not ask."
+    # A header inside the article is its title; the page-level header is chrome
+    html = (
+        "<body><header><a>Home</a> City of Springfield</header>"
+        "<article><header><h1>Ordinance 123</h1></header><p>Fair chance hiring.</p></article></body>"
+    )
+    text = html_to_text(html)
+    assert "# Ordinance 123" in text.splitlines() and "Fair chance hiring." in text
+    assert "Springfield" not in text
@@ -62,3 +62,20 @@ def test_validate_hop_logic_without_langgraph(monkeypatch):
     assert needs_refine is False
     assert hop == 2
 
+
+def test_crawl_url_budget_starts_when_its_fetch_does():
+    import time
+
+    from app.core.research_agent import crawl_urls
+
+    budgets = {}
+
+    def fetch(url, deadline=None):
+        budgets[url] = deadline.remaining()
+        time.sleep(0.15)  # longer than a per-URL budget: the next URL waits for the only slot
+        return {"text": url, "meta": {}, "source": url}
+
+    docs = crawl_urls(["https://a.gov/1", "https://b.gov/2"], fetch, timeout_s=5, per_url_s=0.1, concurrency=1)
+    assert [d["source"] for d in docs] == ["https://a.gov/1", "https://b.gov/2"]
+    # The queued URL still gets its full per-URL budget
+    assert budgets["https://b.gov/2"] > 0.05
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import io
+
+from app.core.pdf_extract import extract_pdf_text, iter_pdf_pages
+
+
+def _make_pdf(page_texts: list[str]) -> bytes:
+    """Build a minimal PDF; an empty string yields a page without a text layer."""
+    objects: list[bytes] = []
+    n = len(page_texts)
+    font_id = 3 + 2 * n
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(n))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {n} >>".encode())
+    for i, text in enumerate(page_texts):
+        content_id = 4 + 2 * i
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {content_id} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode()
+        )
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode() if text else b""
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % i + obj + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def test_text_layer_pages_skip_ocr():
+    pdf = _make_pdf(["Section 1 fair chance ordinance applies to employers", ""])
+    pages = list(iter_pdf_pages(pdf))
+    assert [p.has_text_layer for p in pages] == [True, False]
+
+    ocr_calls: list[bytes] = []
+
+    def fake_ocr(page_bytes: bytes):
+        ocr_calls.append(page_bytes)
+        return "scanned page text", "fake_ocr"
+
+    text, pages = extract_pdf_text(io.BytesIO(pdf), ocr_page=fake_ocr, cache=False)
+    # Only the page without a text layer is OCR'd, as a standalone single-page PDF
+    assert len(ocr_calls) == 1 and ocr_calls[0].startswith(b"%PDF")
+    assert [p.source for p in pages] == ["text_layer", "fake_ocr"]
+    assert "fair chance ordinance" in text and "scanned page text" in text
+
+
+def test_scanned_pages_ocr_in_parallel_and_cached(tmp_path):
+    from app.core.ocr import OcrCache
+    from app.core.pdf_extract import page_anchors
+
+    pdf = _make_pdf(["", "Chapter 2 criminal history inquiries are restricted", "", ""])
+    cache = OcrCache(tmp_path / "ocr")
+    calls = {"n": 0}
+
+    def fake_ocr(page_bytes: bytes):
+        calls["n"] += 1
+        return f"ocr text {len(page_bytes)}", "fake_ocr"
+
+    text, pages = extract_pdf_text(pdf, ocr_page=fake_ocr, max_workers=3, cache=cache)
+    assert calls["n"] == 3
+    assert [p.number for p in pages] == [1, 2, 3, 4]
+    assert [p.source for p in pages] == ["fake_ocr", "text_layer", "fake_ocr", "fake_ocr"]
+
+    # Anchors map each page back to its span of the returned text
+    anchors = page_anchors(pages)
+    assert text[anchors[1]["start"] : anchors[1]["end"]].startswith("Chapter 2")
+    assert text.count("\f") == 3
+
+    # Re-crawling the unchanged PDF is served entirely from the page cache
+    text_again, _ = extract_pdf_text(pdf, ocr_page=fake_ocr, cache=cache)
+    assert calls["n"] == 3 and text_again == text
+
+
+def test_local_ocr_backend_selected_by_env(monkeypatch):
+    from app.core.crawl import ocr_buffer
+    from app.core.ocr import register_backend
+
+    register_backend("offline_fake", lambda buffer, mime: f"{mime}:{len(buffer)}")
+    monkeypatch.setenv("CRAWL_OCR_BACKEND", "offline_fake")
+    monkeypatch.delenv("GOOGLE_CLOUD_PROJECT", raising=False)
+    assert ocr_buffer(b"abc", "image/png") == ("image/png:3", "offline_fake")
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import time
+
+from app.core.html_text import chunk_text
+from app.core.pipeline import Pipeline, Stage
+
+
+def test_stages_overlap_and_wall_time_tracks_slowest_stage():
+    def slow(delay):
+        def fn(item):
+            time.sleep(delay)
+            return [item]
+
+        return fn
+
+    pipeline = Pipeline(
+        [Stage("parse", slow(0.02), workers=2), Stage("embed", slow(0.02)), Stage("index", lambda batch: batch, batch_size=4)],
+        queue_size=2,
+        source_name="fetch",
+    )
+
+    def source():
+        for i in range(10):
+            time.sleep(0.02)
+            yield i
+
+    started = time.monotonic()
+    out = pipeline.run(source())
+    elapsed = time.monotonic() - started
+    assert sorted(out) == list(range(10))
+    # Serial phases would take ~0.6 s (3 x 10 x 20 ms); overlapped it is bounded by the slowest stage
+    assert elapsed < 0.45
+    stages = pipeline.summary()["stages"]
+    assert stages["fetch"]["out"] == 10 and stages["index"]["in"] == 10
+    assert stages["index"]["batches"] <= 10 and stages["embed"]["items_per_s"] > 0
+
+
+def test_backpressure_and_item_errors():
+    produced = []
+
+    def boom(item):
+        if item == 3:
+            raise ValueError("bad page")
+        time.sleep(0.01)
+        return [item]
+
+    pipeline = Pipeline([Stage("parse", boom)], queue_size=1)
+
+    def source():
+        for i in range(8):
+            produced.append((i, time.monotonic()))
+            yield i
+
+    out = pipeline.run(source())
+    assert sorted(out) == [0, 1, 2, 4, 5, 6, 7]
+    stats = pipeline.summary()["stages"]
+    assert stats["parse"]["errors"] == 1
+    # A one-slot queue kept the source from running ahead of the slow stage
+    assert stats["source"]["blocked_s"] > 0.02
+    assert produced[-1][1] - produced[0][1] > 0.03
+
+
+def test_chunk_text_splits_on_sections():
+    text = "Title\n\n# Part A\n" + "alpha clause text\n" * 10 + "\n# Part B\nbeta\n- item one\n- item two"
+    chunks = chunk_text(text, 120)
+    assert chunks[0] == "Title"
+    assert chunks[1].startswith("# Part A") and all(len(c) <= 120 for c in chunks)
+    # Part A overflows onto line boundaries; Part B starts its own chunk
+    assert chunks[-1] == "# Part B\nbeta\n- item one\n- item two"
+    assert sum(c.count("alpha") for c in chunks) == 10
+    assert chunk_text(text, 0) == [text]
+
+
+def test_source_error_with_full_downstream_queue_does_not_hang():
+    import threading
+
+    import pytest
+
+    def source():
+        yield 1
+        yield 2
+        time.sleep(0.05)  # "fast" forwards both; the second fills the queue in front of "slow"
+        raise RuntimeError("feed broke")
+
+    def slow(x):
+        time.sleep(0.3)
+        return [x]
+
+    pipeline = Pipeline([Stage("fast", lambda x: [x]), Stage("slow", slow)], queue_size=1)
+    outcome = []
+
+    def run():
+        with pytest.raises(RuntimeError):
+            pipeline.run(source())
+        outcome.append("raised")
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert outcome == ["raised"]
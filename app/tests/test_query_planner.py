@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import List
+
+import app.agents.sourcing_agent as sa
+from app.agents.sourcing_agent import SourcingAgent
+from app.core.query_planner import plan_pending, plan_queries
+from app.core.queue import ResearchQueue
+from app.core.search import SearchProvider, SearchResult
+from app.core.types import ResearchTask
+
+
+OAKLAND = "unified/state/california/city/oakland.json"
+FRESNO = "unified/state/california/city/fresno.json"
+
+
+def test_plan_collapses_state_queries_across_cities(tmp_path: Path):
+    queue = ResearchQueue(tmp_path / "queue.json")
+    for path in (FRESNO, "unified/state/texas/city/austin.json"):
+        queue.add_task(ResearchTask(jurisdiction_path=path, priority=0, inserted_at=datetime.now(UTC)))
+
+    plan = plan_pending(queue, first=OAKLAND)
+    assert plan.jurisdictions[0] == OAKLAND and len(plan.jurisdictions) == 3
+    assert plan.queries["california state ban the box preemption"] == [OAKLAND, FRESNO]
+    # Shared topic queries are tagged per subject, so only the state query collapses for two CA cities
+    assert plan.saved == 1
+    assert plan.summary()["queries_executed"] == plan.requested - 1
+    assert len(plan.urls) == 3
+
+
+def test_collect_plan_searches_once_and_tags_shared_docs(monkeypatch):
+    searched: List[str] = []
+
+    class FakeProvider(SearchProvider):
+        def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
+            searched.append(query)
+            if "preemption" in query:
+                return [SearchResult(url="https://ca.gov/preemption", title="", snippet="")]
+            return []
+
+    class FakeVector:
+        def __init__(self) -> None:
+            self.metas: List[dict] = []
+
+        def add_texts(self, texts, metas):
+            self.metas.extend(metas)
+
+    monkeypatch.setattr(sa, "get_default_search_provider", lambda: FakeProvider())
+    monkeypatch.setattr(SourcingAgent, "_fetch", lambda self, url: f"<html><body>{url}</body></html>")
+
+    plan = plan_queries([OAKLAND, FRESNO], query_fn=lambda j: ["California state ban the box preemption"])
+    vector = FakeVector()
+    per_jurisdiction = SourcingAgent(vector).collect_plan(plan)
+
+    assert searched == ["California state ban the box preemption"]
+    assert [d.url for d in per_jurisdiction[FRESNO]] == ["https://ca.gov/preemption"]
+    assert vector.metas[0]["jurisdiction_tags"] == [OAKLAND, FRESNO]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from datetime import datetime, UTC
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.queue import ResearchQueue
+from app.core.types import ResearchTask
+
+
+def _task(path: str, priority: int = 0) -> ResearchTask:
+    return ResearchTask(path, priority=priority, inserted_at=datetime.now(UTC))
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "json"])
+def test_bulk_add_mark_and_requeue(tmp_path: Path, monkeypatch, backend):
+    monkeypatch.setenv("QUEUE_BACKEND", backend)
+    queue = ResearchQueue(tmp_path / "research_queue.json")
+    queue.load()
+    queue.add_task(_task("unified/a.json", 1))
+    # a is already pending and c repeats within the batch: both merge, keeping the higher priority
+    added = queue.add_tasks([_task("unified/a.json", 5), _task("unified/b.json"), _task("unified/c.json"), _task("unified/c.json", 2)])
+    assert added == 2
+    assert sorted((t.jurisdiction_path, t.priority) for t in queue.pending()) == [
+        ("unified/a.json", 5),
+        ("unified/b.json", 0),
+        ("unified/c.json", 2),
+    ]
+
+    claimed = [queue.next_task(worker_id="w1").jurisdiction_path for _ in range(3)]
+    assert queue.mark_many(claimed[:2], "error", error="boom", worker_id="w1") == 2
+    assert queue.mark_many(claimed[2:], "completed", worker_id="w2") == 0  # not w2's claim
+    assert queue.mark_many(claimed[2:], "completed", worker_id="w1") == 1
+    with pytest.raises(ValueError):
+        queue.mark_many(claimed, "pending")
+
+    queue.add_task(_task(claimed[0]))  # already re-enqueued by hand
+    assert queue.requeue_errors() == 1
+    assert sorted(t.jurisdiction_path for t in queue.pending()) == sorted(claimed[:2])
+    assert queue.requeue_errors() == 0
+    assert queue.count("error") == 1  # the superseded error stays as history
+
+
+def test_bulk_enqueue_endpoint(tmp_path: Path, monkeypatch):
+    import app.dashboard.api as api
+    from app.dashboard.server import app
+
+    (tmp_path / "tools").mkdir()
+    monkeypatch.setattr(api, "project_root", lambda: tmp_path)
+    monkeypatch.setenv("DASH_AUTH_DISABLED", "1")
+    client = TestClient(app)
+    resp = client.post(
+        "/api/enqueue/bulk",
+        json=[
+            {"jurisdiction_path": "unified/a.json", "priority": 2},
+            {"jurisdiction_path": "unified/b.json"},
+            {"jurisdiction_path": "unified/a.json"},
+        ],
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "queued", "received": 3, "queued": 2, "merged": 1}
+    queue = ResearchQueue(tmp_path / "tools" / "research_queue.json")
+    assert sorted(t.jurisdiction_path for t in queue.pending()) == ["unified/a.json", "unified/b.json"]
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, UTC
+from pathlib import Path
+
+from app.core.queue import ResearchQueue
+from app.core.queue_events import QueueWaiter, notify_queue, wake_dir
+from app.core.types import ResearchTask
+
+
+def test_enqueue_wakes_idle_waiter(tmp_path: Path):
+    qpath = tmp_path / "research_queue.json"
+    queue = ResearchQueue(qpath)
+    with QueueWaiter(qpath) as waiter:
+        assert waiter.path is not None and len(str(waiter.path)) < 100
+        assert not waiter.wait(0.05)
+
+        def enqueue():
+            time.sleep(0.1)
+            producer = ResearchQueue(qpath)
+            producer.add_task(ResearchTask("unified/a.json", priority=0, inserted_at=datetime.now(UTC)))
+
+        threading.Thread(target=enqueue).start()
+        started = time.monotonic()
+        assert waiter.wait(5.0)
+        assert time.monotonic() - started < 1.0
+        assert [t.jurisdiction_path for t in queue.pending()] == ["unified/a.json"]
+        # A burst of notifications coalesces into one wakeup
+        for _ in range(5):
+            notify_queue(qpath)
+        assert waiter.wait(0.5) and not waiter.wait(0.05)
+
+
+def test_stale_listeners_are_pruned_and_wake_interrupts(tmp_path: Path):
+    qpath = tmp_path / "research_queue.json"
+    stale = QueueWaiter(qpath)
+    stale_path = stale.path
+    stale._sock.close()  # process died without close(): the socket file is left behind
+    assert stale_path.exists() and notify_queue(qpath) == 0 and not stale_path.exists()
+    assert wake_dir(qpath) == wake_dir(qpath.with_suffix(".db"))
+
+    with QueueWaiter(qpath) as waiter:
+        threading.Timer(0.05, waiter.wake).start()
+        assert waiter.wait(5.0)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, UTC
+from pathlib import Path
+
+import pytest
+
+from app.core.queue import JsonResearchQueue, LeaseKeeper, ResearchQueue
+from app.core.types import ResearchTask
+
+
+def _task(path: str, priority: int = 0) -> ResearchTask:
+    return ResearchTask(path, priority=priority, inserted_at=datetime.now(UTC))
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "json"])
+def test_expired_lease_is_reclaimed_and_stale_worker_cannot_finish(tmp_path: Path, monkeypatch, backend):
+    monkeypatch.setenv("QUEUE_BACKEND", backend)
+    queue = ResearchQueue(tmp_path / "research_queue.json")
+    queue.load()
+    assert queue.add_task(_task("unified/a.json", 1))
+    # Same jurisdiction while pending: merged, keeping the higher priority
+    assert not queue.add_task(_task("unified/a.json", 4))
+    assert [(t.jurisdiction_path, t.priority) for t in queue.pending()] == [("unified/a.json", 4)]
+
+    crashed = queue.next_task(worker_id="w1", lease_s=0.05)
+    assert crashed.worker_id == "w1" and crashed.attempts == 1 and queue.next_task(worker_id="w2") is None
+    time.sleep(0.1)
+    t = queue.next_task(worker_id="w2", lease_s=60)
+    assert t.jurisdiction_path == "unified/a.json" and t.worker_id == "w2" and t.attempts == 2
+    # w1 comes back: its lease is gone, so it neither extends nor finishes w2's claim
+    assert not queue.heartbeat("unified/a.json", "w1") and not queue.mark_completed("unified/a.json", worker_id="w1")
+    assert queue.heartbeat("unified/a.json", "w2")
+    assert queue.mark_completed("unified/a.json", worker_id="w2")
+    assert queue.count("completed") == 1 and queue.count("in_progress") == 0
+
+
+def test_lease_keeper_heartbeats_and_repeated_expiry_is_parked(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("QUEUE_MAX_ATTEMPTS", "2")
+    queue = ResearchQueue(tmp_path / "research_queue.json")
+    queue.add_task(_task("unified/a.json"))
+    t = queue.next_task(worker_id="w1", lease_s=0.1)
+    with LeaseKeeper(queue, t.jurisdiction_path, "w1", lease_s=0.1, interval_s=0.02) as keeper:
+        time.sleep(0.3)
+        assert queue.next_task(worker_id="w2") is None and not keeper.lost
+
+    # Keeper stopped (as if w1 hung): the lease runs out twice, then the task is parked as an error
+    time.sleep(0.15)
+    assert queue.next_task(worker_id="w2", lease_s=0.05).attempts == 2
+    time.sleep(0.1)
+    assert queue.next_task(worker_id="w3") is None
+    assert [(x.status, x.error) for x in queue.tasks] == [("error", "lease expired after 2 attempts")]
+
+
+def test_legacy_duplicates_collapse_on_open(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("QUEUE_BACKEND", "json")
+    legacy = JsonResearchQueue(tmp_path / "research_queue.json")
+    legacy.tasks = [_task("unified/a.json", p) for p in (0, 2, 1)] + [_task("unified/b.json")]
+    legacy.save()
+    monkeypatch.setenv("QUEUE_BACKEND", "sqlite")
+    queue = ResearchQueue(tmp_path / "research_queue.json")
+    queue.load()
+    assert sorted((t.jurisdiction_path, t.priority) for t in queue.pending()) == [
+        ("unified/a.json", 2),
+        ("unified/b.json", 0),
+    ]
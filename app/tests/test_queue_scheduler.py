@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from datetime import datetime, UTC, timedelta
+from pathlib import Path
+
+import pytest
+
+from app.core.queue import ResearchQueue
+from app.core.scheduler import host_group_of, state_of
+from app.core.types import ResearchTask
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def make_queue(request, tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("QUEUE_BACKEND", request.param)
+
+    def make(**env):
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        return ResearchQueue(tmp_path / "research_queue.json")
+
+    return make
+
+
+def _claims(queue, n):
+    out = []
+    for _ in range(n):
+        task = queue.next_task()
+        out.append(state_of(task.jurisdiction_path) if task else None)
+    return out
+
+
+def test_state_and_host_group_from_path():
+    assert state_of("unified/state/new_york.json") == "new_york"
+    assert state_of("unified/state/ca/city/oakland.json") == "ca"
+    assert state_of("unified/city/san_francisco.json") == ""
+    assert host_group_of("unified/state/ca/county/alameda.json") == "ca"
+    assert host_group_of("unified/city/san_francisco.json") is None
+
+
+def test_burst_in_one_state_does_not_starve_others(make_queue):
+    queue = make_queue(QUEUE_HOST_GROUP_CAP="0", QUEUE_STATE_WEIGHTS="ca=2")
+    start = datetime.now(UTC)
+    burst = [ResearchTask(f"unified/state/ca/city/c{i}.json", priority=9, inserted_at=start) for i in range(6)]
+    queue.add_tasks(burst + [
+        ResearchTask("unified/state/ny/city/albany.json", priority=0, inserted_at=start + timedelta(seconds=1)),
+        ResearchTask("unified/state/ny/city/buffalo.json", priority=0, inserted_at=start + timedelta(seconds=2)),
+    ])
+    # Weighted round-robin: two California claims per New York claim while both have work
+    assert _claims(queue, 8) == ["ca", "ny", "ca", "ca", "ny", "ca", "ca", "ca"]
+
+
+def test_waiting_tasks_gain_priority(make_queue):
+    queue = make_queue(QUEUE_AGING_S="60")
+    now = datetime.now(UTC)
+    queue.add_task(ResearchTask("unified/city/fresh.json", priority=5, inserted_at=now))
+    queue.add_task(ResearchTask("unified/city/stale.json", priority=0, inserted_at=now - timedelta(minutes=10)))
+    queue.add_task(ResearchTask("unified/city/older.json", priority=0, inserted_at=now - timedelta(minutes=3)))
+    order = [queue.next_task().jurisdiction_path for _ in range(3)]
+    assert order == ["unified/city/stale.json", "unified/city/fresh.json", "unified/city/older.json"]
+
+
+def test_host_group_cap_holds_back_only_that_group(make_queue):
+    queue = make_queue(QUEUE_HOST_GROUP_CAP="1")
+    start = datetime.now(UTC)
+    queue.add_tasks([
+        ResearchTask("unified/state/tx/city/austin.json", priority=3, inserted_at=start),
+        ResearchTask("unified/state/tx/city/dallas.json", priority=3, inserted_at=start),
+        ResearchTask("unified/city/portland.json", priority=0, inserted_at=start),
+    ])
+    first = queue.next_task()
+    assert state_of(first.jurisdiction_path) == "tx"
+    # Texas is at its cap: the uncapped jurisdiction goes next, then nothing until the claim finishes
+    assert queue.next_task().jurisdiction_path == "unified/city/portland.json"
+    assert queue.next_task() is None
+    queue.mark_completed(first.jurisdiction_path)
+    assert state_of(queue.next_task().jurisdiction_path) == "tx"
+
+
+def test_default_config_lets_every_worker_claim_from_one_state(make_queue, monkeypatch):
+    monkeypatch.delenv("QUEUE_HOST_GROUP_CAP", raising=False)
+    monkeypatch.delenv("QUEUE_HOST_GROUP_CAPS", raising=False)
+    queue = make_queue()
+    start = datetime.now(UTC)
+    queue.add_tasks([ResearchTask(f"unified/state/ca/city/c{i}.json", priority=0, inserted_at=start) for i in range(6)])
+    # Host-group caps are opt-in: six workers on a California-only backlog all get a task
+    claimed = [queue.next_task(worker_id=f"w{i}") for i in range(6)]
+    assert all(claimed) and len({t.jurisdiction_path for t in claimed}) == 6
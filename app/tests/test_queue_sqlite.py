@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime, UTC, timedelta
+from pathlib import Path
+
+from app.core.queue import ResearchQueue, SqliteResearchQueue
+from app.core.types import ResearchTask
+
+
+def test_concurrent_claims_are_unique_and_ordered(tmp_path: Path):
+    queue = ResearchQueue(tmp_path / "research_queue.json")
+    assert isinstance(queue, SqliteResearchQueue)
+    start = datetime.now(UTC)
+    for i in range(40):
+        queue.add_task(ResearchTask(f"unified/city/c{i}.json", priority=i % 4, inserted_at=start + timedelta(seconds=i)))
+
+    claimed = []
+
+    def worker():
+        q = ResearchQueue(tmp_path / "research_queue.json")
+        while (t := q.next_task()) is not None:
+            claimed.append(t)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    paths = [t.jurisdiction_path for t in claimed]
+    assert len(paths) == 40 and len(set(paths)) == 40
+    assert queue.count("in_progress") == 40 and queue.pending() == []
+    with queue._connect() as conn:
+        # The per-state head probe of each claim and `pending()` both read an index in order
+        for sql, index in [
+            ("SELECT id FROM tasks WHERE status = 'pending' AND state_key = ?"
+             " ORDER BY sched_key DESC, gaps DESC, inserted_at, id LIMIT 1", "idx_tasks_state"),
+            ("SELECT id FROM tasks WHERE status = 'pending'"
+             " ORDER BY sched_key DESC, gaps DESC, inserted_at, id LIMIT 1", "idx_tasks_order"),
+        ]:
+            plan = " ".join(str(r) for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", ("",) * sql.count("?")))
+            assert index in plan and "TEMP B-TREE" not in plan
+
+
+def test_json_queue_is_imported_once(tmp_path: Path):
+    legacy = tmp_path / "research_queue.json"
+    legacy.write_text(json.dumps([
+        {"jurisdiction_path": "unified/city/a.json", "priority": 3, "inserted_at": "2025-08-14T01:00:17.584753+00:00"},
+        {"jurisdiction_path": "unified/city/b.json", "priority": 0, "inserted_at": "2025-08-14T01:00:18+00:00",
+         "status": "completed"},
+    ]))
+    queue = ResearchQueue(legacy)
+    queue.load()
+    assert queue.count() == 2 and [t.jurisdiction_path for t in queue.pending()] == ["unified/city/a.json"]
+    # Re-importing the same file (CLI migrate or a touched file) adds nothing
+    assert queue.import_json(legacy) == 0
+    t = queue.next_task()
+    assert t.jurisdiction_path == "unified/city/a.json" and t.inserted_at.microsecond == 584753
+    queue.mark_error(t.jurisdiction_path, "boom")
+    assert {(x.jurisdiction_path, x.status) for x in queue.tasks} == {
+        ("unified/city/a.json", "error"),
+        ("unified/city/b.json", "completed"),
+    }
@@ -23,3 +23,61 @@ def test_sourcing_agent_retry_rate_limit(monkeypatch):
     docs = agent.search_and_collect("unified/city/sf.json", ["http://example.com"])
     assert len(docs) == 1
     assert calls["n"] >= 2
+
+
+def test_sourcing_isolates_dead_urls_and_indexes_incrementally(monkeypatch):
+    monkeypatch.setenv("SOURCING_RETRY_MIN_BACKOFF", "0.01")
+    monkeypatch.setenv("SOURCING_INDEX_BATCH", "1")
+    attempts = {}
+
+    def fetch(self, url):
+        attempts[url] = attempts.get(url, 0) + 1
+        if "dead" in url:
+            raise RuntimeError("status=503")
+        return f"<html><body>{url}</body></html>"
+
+    class Vector:
+        batches = []
+
+        def add_texts(self, texts, metas):
+            self.batches.append(len(texts))
+
+    monkeypatch.setattr(SourcingAgent, "_fetch", fetch)
+    agent = SourcingAgent(Vector())
+    docs = agent.search_and_collect("unified/city/sf.json", ["https://a.gov/1", "https://dead.gov/x", "https://b.gov/2"])
+
+    assert sorted(d.url for d in docs) == ["https://a.gov/1", "https://b.gov/2"]
+    assert attempts["https://dead.gov/x"] == 3
+    assert Vector.batches == [1, 1]
+    stats = agent.last_stats.summary()
+    assert stats["fetched"] == 2 and stats["failed"] == 1 and stats["retried"] == 2 and stats["indexed"] == 2
+    assert stats["bytes"] > 0 and {"search", "fetch", "index"} <= set(stats["timings"])
+    assert stats["errors"][0]["url"] == "https://dead.gov/x"
+
+
+def test_sourcing_sleeps_through_backoff_with_nothing_in_flight(monkeypatch):
+    import app.agents.sourcing_agent as sourcing_agent
+
+    monkeypatch.setenv("SOURCING_RETRY_MIN_BACKOFF", "0.2")
+    monkeypatch.setenv("SOURCING_FETCH_ATTEMPTS", "2")
+    waits = {"n": 0}
+    real_wait = sourcing_agent.wait
+
+    def counting_wait(*args, **kwargs):
+        waits["n"] += 1
+        return real_wait(*args, **kwargs)
+
+    def fetch(self, url):
+        raise RuntimeError("status=503")
+
+    class Vector:
+        def add_texts(self, texts, metas):
+            pass
+
+    monkeypatch.setattr(sourcing_agent, "wait", counting_wait)
+    monkeypatch.setattr(SourcingAgent, "_fetch", fetch)
+    agent = SourcingAgent(Vector())
+    assert agent.search_and_collect("unified/city/sf.json", ["https://dead.gov/x"]) == []
+    # One wait per attempt; the backoff between them is slept, not polled
+    assert waits["n"] <= 2
+    assert agent.last_stats.summary()["retried"] == 1
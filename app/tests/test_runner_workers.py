@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import os
+import signal
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from app.config.settings import settings
+from app.core.db import Base, JurisdictionRun, get_engine
+from app.core.runner import app
+from sqlalchemy.orm import Session
+
+
+def _setup(tmp_path: Path, monkeypatch, paths):
+    # Patch files and stage caches go under tmp_path, not the repository
+    monkeypatch.setenv("PROJECT_ROOT_OVERRIDE", str(tmp_path))
+    (tmp_path / "research_inputs").mkdir(exist_ok=True)
+    qpath = tmp_path / "tools" / "research_queue.json"
+    qpath.parent.mkdir(parents=True, exist_ok=True)
+    qpath.write_text(json.dumps([{"jurisdiction_path": p, "priority": 0} for p in paths]))
+    engine = get_engine(settings.database_url)
+    Base.metadata.create_all(engine)
+    import app.agents.sourcing_agent as sa
+
+    monkeypatch.setattr(sa.SourcingAgent, "_fetch", lambda self, url: "<html><body>ok</body></html>")
+    return qpath, engine
+
+
+def test_workers_run_tasks_concurrently(tmp_path: Path, monkeypatch):
+    run = uuid.uuid4().hex[:8]
+    paths = [f"unified/city/w{run}_{i}.json" for i in range(6)]
+    qpath, engine = _setup(tmp_path, monkeypatch, paths)
+    import app.agents.extraction_agent as ea
+
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow_extract(self, jurisdiction, skeleton):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.2)
+        with lock:
+            active[0] -= 1
+        return {"jurisdiction": jurisdiction}
+
+    monkeypatch.setattr(ea.ExtractionAgent, "run", slow_extract)
+    started = time.monotonic()
+    res = CliRunner().invoke(app, [
+        "--workers", "3", "--idle-sleep", "0.01", "--max-cycles", "6",
+        "--queue-path", str(qpath), "--skip-validation", "--skip-merge",
+    ])
+    assert res.exit_code == 0, res.output
+    assert peak[0] == 3 and time.monotonic() - started < 6 * 0.2
+    with Session(engine) as session:
+        done = [
+            r.jurisdiction_path
+            for r in session.query(JurisdictionRun).filter_by(status="completed")
+            if r.jurisdiction_path in paths
+        ]
+    assert sorted(done) == sorted(paths)
+
+
+def test_sigterm_stops_idle_workers(tmp_path: Path, monkeypatch):
+    qpath, _ = _setup(tmp_path, monkeypatch, [])
+    default = signal.getsignal(signal.SIGTERM)
+
+    def terminate():
+        # Only once the runner's handler is installed, or the default action would kill pytest
+        while signal.getsignal(signal.SIGTERM) is default:
+            time.sleep(0.01)
+        time.sleep(0.2)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    threading.Thread(target=terminate, daemon=True).start()
+    started = time.monotonic()
+    res = CliRunner().invoke(app, ["--workers", "2", "--idle-sleep", "5", "--queue-path", str(qpath)])
+    assert res.exit_code == 0, res.output
+    # Idle waits are interrupted instead of running out the 5 s sleep
+    assert time.monotonic() - started < 2
+    assert signal.getsignal(signal.SIGTERM) is default
+
+
+def test_batch_sources_are_not_reused_by_a_reenqueued_task(tmp_path: Path, monkeypatch):
+    from datetime import datetime, UTC
+
+    import app.agents.sourcing_agent as sa
+    from app.core.queue import ResearchQueue
+    from app.core.types import ResearchTask
+
+    run = uuid.uuid4().hex[:8]
+    first, second = f"unified/city/b{run}_0.json", f"unified/city/b{run}_1.json"
+    qpath, _ = _setup(tmp_path, monkeypatch, [first, second])
+    planned = []
+
+    def collect_plan(self, plan, num_results=5):
+        planned.append(plan.jurisdictions[0])
+        if len(planned) == 1:
+            # Meanwhile another process runs the second task, and it is enqueued again
+            other = ResearchQueue(qpath)
+            assert other.next_task().jurisdiction_path == second
+            other.mark_completed(second)
+            other.add_task(ResearchTask(second, priority=0, inserted_at=datetime.now(UTC)))
+        return {j: [] for j in plan.jurisdictions}
+
+    monkeypatch.setattr(sa.SourcingAgent, "collect_plan", collect_plan)
+    res = CliRunner().invoke(app, [
+        "--workers", "1", "--idle-sleep", "0.01", "--max-cycles", "2",
+        "--queue-path", str(qpath), "--skip-validation", "--skip-merge",
+    ])
+    assert res.exit_code == 0, res.output
+    # The re-enqueued task is sourced afresh instead of reusing the first batch's stale result
+    assert planned == [first, second]
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import List
+
+from app.core.search import SearchProvider, SearchResult
+from app.core.search_cache import CachedSearchProvider, SearchCache, normalize_query
+
+
+class CountingProvider(SearchProvider):
+    name = "fake"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        self.calls += 1
+        return [SearchResult(url=f"https://ca.gov/{self.calls}", title=query, snippet="")]
+
+
+def test_normalized_queries_share_cache_entry(tmp_path: Path):
+    inner = CountingProvider()
+    provider = CachedSearchProvider(inner, SearchCache(tmp_path / "search.db"))
+    first = provider.search("California state  ban the box preemption")
+    second = provider.search("  california STATE ban the box preemption ")
+    assert inner.calls == 1
+    assert second == first
+    # num_results is part of the key
+    provider.search("california state ban the box preemption", num_results=10)
+    assert inner.calls == 2
+    assert normalize_query(" A  b ") == "a b"
+
+
+def test_stale_entry_served_then_refreshed_in_background(tmp_path: Path):
+    inner = CountingProvider()
+    cache = SearchCache(tmp_path / "search.db", ttl_seconds=0.01, stale_seconds=3600)
+    provider = CachedSearchProvider(inner, cache)
+    assert provider.search("q")[0].url == "https://ca.gov/1"
+    time.sleep(0.02)
+
+    stale = provider.search("q")
+    assert stale[0].url == "https://ca.gov/1" and provider.stale_hits == 1
+    for _ in range(100):
+        if inner.calls == 2 and cache.get("fake", "q", 5)[0][0].url == "https://ca.gov/2":
+            break
+        time.sleep(0.01)
+    assert inner.calls == 2
+    assert cache.get("fake", "q", 5)[0][0].url == "https://ca.gov/2"
+
+
+def test_empty_results_not_cached(tmp_path: Path):
+    class Failing(SearchProvider):
+        name = "down"
+
+        def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
+            return []
+
+    cache = SearchCache(tmp_path / "search.db")
+    CachedSearchProvider(Failing(), cache).search("q")
+    assert len(cache) == 0
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import time
+
+import httpx
+import pytest
+
+import app.core.search as search
+from app.core.rate_limit import CircuitBreaker, TokenBucket, parse_retry_after, reset_guards
+from app.core.search import GoogleCSEProvider, SearchProviderError
+
+
+def test_bucket_adapts_to_throttling_and_breaker_half_opens():
+    assert parse_retry_after("2") == 2.0 and parse_retry_after("soon") is None
+
+    bucket = TokenBucket(rate=100, burst=1)
+    assert bucket.acquire(timeout=0)
+    bucket.throttle(retry_after=0.2)
+    assert bucket.rate == 50
+    # Retry-After blocks every caller, not just the one that saw the 429
+    assert not bucket.acquire(timeout=0.05)
+    assert bucket.acquire(timeout=0.5)
+    bucket.succeed()
+    assert bucket.rate == 60
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()  # single half-open probe
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_provider_reports_structured_failures_and_fails_fast(monkeypatch):
+    monkeypatch.setenv("SEARCH_BREAKER_FAILURES", "2")
+    monkeypatch.setenv("SEARCH_RATE_LIMIT_RPS", "1000")
+    reset_guards()
+    responses = [
+        httpx.Response(429, headers={"retry-after": "0"}),
+        httpx.Response(503),
+        httpx.Response(503),
+    ]
+    calls = {"n": 0}
+
+    def fake_get(url, params=None, timeout=None):
+        calls["n"] += 1
+        return responses.pop(0)
+
+    monkeypatch.setattr(search.httpx, "get", fake_get)
+    provider = GoogleCSEProvider("key", "cse")
+    try:
+        with pytest.raises(SearchProviderError) as throttled:
+            provider.search("q")
+        assert throttled.value.kind == "rate_limited" and throttled.value.retry_after == 0
+
+        for _ in range(2):
+            with pytest.raises(SearchProviderError) as down:
+                provider.search("q")
+            assert down.value.status_code == 503
+
+        with pytest.raises(SearchProviderError) as open_circuit:
+            provider.search("q")
+        assert open_circuit.value.kind == "circuit_open"
+        assert calls["n"] == 3
+    finally:
+        reset_guards()
+
+
+def test_half_open_probe_is_released_when_it_settles_nothing(monkeypatch):
+    import asyncio
+
+    monkeypatch.setenv("SEARCH_BREAKER_FAILURES", "1")
+    monkeypatch.setenv("SEARCH_BREAKER_RESET_S", "0.01")
+    monkeypatch.setenv("SEARCH_RATE_LIMIT_RPS", "1000")
+    reset_guards()
+    try:
+        breaker = search.get_guard("probe").breaker
+        breaker.record_failure()
+        time.sleep(0.02)
+
+        # A throttled probe neither closes nor reopens the breaker, but frees the probe slot
+        with pytest.raises(SearchProviderError) as throttled:
+            search.guarded_request("probe", lambda: httpx.Response(429, headers={"retry-after": "0"}))
+        assert throttled.value.kind == "rate_limited"
+        assert breaker.state == "half_open" and breaker.allow()
+        breaker.release_probe()
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        async def cancelled_probe():
+            task = asyncio.ensure_future(search.aguarded_request("probe", hang))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancelled_probe())
+        assert breaker.state == "half_open"
+        assert search.guarded_request("probe", lambda: httpx.Response(200)).status_code == 200
+        assert breaker.state == "closed"
+    finally:
+        reset_guards()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import httpx
+
+from app.core.crawl import stream_fetch
+from app.core.urlnorm import RedirectMap, canonical_url, canonicalize_url, dedupe_urls
+
+
+def test_canonicalize_collapses_common_variants():
+    variants = [
+        "http://www.City.gov/code/",
+        "https://city.gov/code#section-2",
+        "https://city.gov:443/code?utm_source=x&print=1",
+        "https://city.gov//code;jsessionid=ABC",
+    ]
+    assert {canonicalize_url(v) for v in variants} == {"https://city.gov/code"}
+    # Meaningful parameters survive, in a stable order
+    assert canonicalize_url("https://city.gov/code?b=2&a=1&gclid=z") == "https://city.gov/code?a=1&b=2"
+    assert canonicalize_url("mailto:clerk@city.gov") == "mailto:clerk@city.gov"
+
+
+def test_redirect_map_persists_aliases(tmp_path: Path):
+    path = tmp_path / "redirects.json"
+    RedirectMap(path).learn("http://old.city.gov/ord", "https://library.municode.com/ca/city/codes?nodeId=1")
+    fresh = RedirectMap(path)
+    assert fresh.resolve("https://old.city.gov/ord/") == "https://library.municode.com/ca/city/codes?nodeId=1"
+    assert fresh.canonical("http://www.old.city.gov/ord") == canonicalize_url(
+        "https://library.municode.com/ca/city/codes?nodeId=1"
+    )
+
+
+def test_stream_fetch_learns_redirect_and_skips_it_next_time(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("URL_REDIRECT_MAP_PATH", str(tmp_path / "redirects.json"))
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        if request.url.host == "old.city.gov":
+            return httpx.Response(301, headers={"location": "https://city.gov/code"})
+        return httpx.Response(200, text="<p>code</p>", headers={"content-type": "text/html"})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    stream_fetch("https://old.city.gov/code", "UA", client=client)
+    stream_fetch("https://old.city.gov/code", "UA", client=client)
+    assert requested == ["https://old.city.gov/code", "https://city.gov/code", "https://city.gov/code"]
+    assert dedupe_urls(["https://old.city.gov/code?utm_medium=email", "https://city.gov/code/"]) == [
+        "https://old.city.gov/code?utm_medium=email"
+    ]
+    assert canonical_url("http://old.city.gov/code") == "https://city.gov/code"
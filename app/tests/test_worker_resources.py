@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+from app.agents import worker_resources
+from app.config.settings import settings
+from app.core.vector_store import VectorStore
+
+
+def test_store_reloads_only_after_another_process_writes(tmp_path: Path):
+    index = str(tmp_path / "faiss")
+    reader = VectorStore(index_path=index)
+    writer = VectorStore(index_path=index)
+    assert reader.refresh() is True  # first use loads
+    assert reader.refresh() is False
+    writer.add_texts(["Cook County requires an individualized assessment."], metadatas=[{"url": "http://example.com/cook"}])
+    assert reader.refresh() is True
+    assert reader.similarity_search("individualized assessment", k=1)
+    # The reader's own writes keep its index current
+    reader.add_texts(["Denver limits lookback to seven years."], metadatas=[{"url": "http://example.com/denver"}])
+    assert reader.refresh() is False
+
+
+def test_tasks_reuse_agents_per_thread_and_report_cold_then_warm(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_db_path", str(tmp_path / "faiss"))
+    worker_resources.reset_worker_resources()
+    try:
+        resources = worker_resources.get_worker_resources()
+        agents, first = resources.acquire()
+        again, second = resources.acquire()
+        assert again is agents and agents.extraction.vector_store is resources.vector
+        assert first["cold"] and not second["cold"] and not second["refreshed"]
+        assert worker_resources.get_worker_resources() is resources
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(resources.acquire()))
+        thread.start()
+        thread.join()
+        assert other[0][0] is not agents and other[0][0].sourcing.vector_store is resources.vector
+
+        resources.observe(True, 120.0)
+        resources.observe(False, 20.0)
+        resources.observe(False, 40.0)
+        assert resources.summary() == {"cold": {"tasks": 1, "avg_ms": 120.0}, "warm": {"tasks": 2, "avg_ms": 30.0}}
+    finally:
+        worker_resources.reset_worker_resources()
+
+
+def test_process_warm_up_is_recorded_as_the_cold_sample(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_db_path", str(tmp_path / "faiss"))
+    worker_resources.reset_worker_resources()
+    try:
+        worker_resources.warm_worker_resources()
+        resources = worker_resources.get_worker_resources()
+        assert resources.summary()["cold"]["tasks"] == 1
+        # The first task after the warm-up reuses it
+        _, setup = resources.acquire()
+        assert not setup["cold"]
+    finally:
+        worker_resources.reset_worker_resources()
@@ -67,6 +67,18 @@ def regenerate_docs(project_root: Path) -> None:
     gaps.write_text("# Research Gaps Report\n\nAutogenerated summary.\n")
 
 
+def invalidate_gap_cache(path: Path) -> None:
+    """Tell the research queue's gap-score cache that a jurisdiction file changed (best effort)."""
+    try:
+        repo_root = Path(__file__).resolve().parents[1]
+        if str(repo_root) not in sys.path:
+            sys.path.insert(0, str(repo_root))
+        from app.core.gaps import invalidate_gaps
+    except Exception:
+        return
+    invalidate_gaps(path)
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Safely apply research patch to a jurisdiction file")
     parser.add_argument("--file", required=True, help="Path to jurisdiction JSON file")
@@ -95,8 +107,10 @@ def main() -> int:
     if not simple_validate(merged):
         if backup_path.exists():
             shutil.copyfile(backup_path, file_path)
+        invalidate_gap_cache(file_path)
         print("Validation failed; rolled back.", file=sys.stderr)
         return 1
+    invalidate_gap_cache(file_path)
 
     # Optional docs regeneration
     if args.generate_docs: